@@ -1,14 +1,18 @@
 import os
+import gc
+import json
 import logging
 import asyncio
+import random
 import signal
+import sqlite3
 import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from livekit import rtc
 from livekit.agents import VoiceAgent, run_agent
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
-from livekit.plugins import silero
-from livekit_plugins_openai import OpenAIVoice, OpenAILLM
 
 # Configure logging
 log_level = os.environ.get('LOG_LEVEL', 'info').upper()
@@ -28,26 +32,105 @@ OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 today = datetime.now().strftime("%Y-%m-%d")
 LIVEKIT_ROOM = os.environ.get("LIVEKIT_ROOM", f"optiflow-voice-{today}")
 
-# Check required environment variables
-if not OPENAI_API_KEY:
-    logger.error("OPENAI_API_KEY environment variable is required")
-    exit(1)
+# Startup: load models once in the parent, then fork agent processes that share them
+AGENT_PREWARM = os.environ.get("AGENT_PREWARM", "true").lower() == "true"
+AGENT_PROCESSES = int(os.environ.get("AGENT_PROCESSES", "1"))  # 0 runs the agent in this process
+AGENT_RESTART_DELAY = float(os.environ.get("AGENT_RESTART_DELAY", "1"))  # seconds before re-forking a crashed agent
 
-# Configure OpenAI voice and LLM plugins
-openai_voice = OpenAIVoice(
-    api_key=OPENAI_API_KEY,
-    voice="alloy",  # Options: alloy, echo, fable, onyx, nova, shimmer
-    model="tts-1", # or "tts-1-hd" for higher quality
-)
+# Dispatcher mode: serve every room named AGENT_ROOM_PREFIX... instead of the single daily room
+AGENT_DISPATCH = os.environ.get("AGENT_DISPATCH", "false").lower() == "true"
+AGENT_ROOM_PREFIX = os.environ.get("AGENT_ROOM_PREFIX", "optiflow-voice-")
+AGENT_MAX_ROOMS = int(os.environ.get("AGENT_MAX_ROOMS", "20"))  # per process
+AGENT_DISPATCH_POLL_INTERVAL = float(os.environ.get("AGENT_DISPATCH_POLL_INTERVAL", "2"))  # seconds
+AGENT_ROOM_IDLE_TIMEOUT = float(os.environ.get("AGENT_ROOM_IDLE_TIMEOUT", "30"))  # seconds without users before leaving a room
+AGENT_ROOM_FAILURE_MAX_BACKOFF = float(os.environ.get("AGENT_ROOM_FAILURE_MAX_BACKOFF", "300"))  # seconds before rejoining a failing room
+AGENT_STATS_PATH = os.environ.get("AGENT_STATS_PATH")  # JSON snapshot of per-room accounting
+AGENT_STATS_INTERVAL = float(os.environ.get("AGENT_STATS_INTERVAL", "15"))  # seconds
+
+# Reconnects: jittered exponential backoff, and the conversation is restored from a local checkpoint
+AGENT_MAX_RETRIES = int(os.environ.get("AGENT_MAX_RETRIES", "5"))
+AGENT_RETRY_BASE_DELAY = float(os.environ.get("AGENT_RETRY_BASE_DELAY", "0.25"))  # seconds
+AGENT_RETRY_MAX_DELAY = float(os.environ.get("AGENT_RETRY_MAX_DELAY", "8"))  # seconds
+AGENT_CHECKPOINT_PATH = os.environ.get("AGENT_CHECKPOINT_PATH", "agent_state.db")  # empty disables checkpoints
+AGENT_CHECKPOINT_INTERVAL = float(os.environ.get("AGENT_CHECKPOINT_INTERVAL", "1"))  # seconds between checkpoints
+AGENT_CHECKPOINT_TTL = float(os.environ.get("AGENT_CHECKPOINT_TTL", "900"))  # seconds a conversation can be resumed
+
+# Which of the forked agent processes this is; set in each child by serve()
+process_index = 0
+process_count = 1
+
+# Models and clients are created on first use (or by prewarm()), never at import time,
+# so importing this module is cheap and a retried agent reuses what is already loaded.
+_components = {}
+load_timings = {}  # component name -> seconds it took to load
+
+
+def _load(name, factory):
+    component = _components.get(name)
+    if component is None:
+        started = time.perf_counter()
+        component = factory()
+        _components[name] = component
+        load_timings[name] = time.perf_counter() - started
+        logger.info(f"Loaded {name} in {load_timings[name]:.2f}s")
+    return component
+
+
+def _create_vad():
+    from livekit.plugins import silero
+    return silero.VAD.load()
+
+
+def _create_turn_detector():
+    from livekit.plugins.turn_detector.multilingual import MultilingualModel
+    return MultilingualModel()
+
+
+def _create_openai_voice():
+    from livekit_plugins_openai import OpenAIVoice
+    return OpenAIVoice(
+        api_key=OPENAI_API_KEY,
+        voice="alloy",  # Options: alloy, echo, fable, onyx, nova, shimmer
+        model="tts-1", # or "tts-1-hd" for higher quality
+    )
+
+
+def _create_openai_llm():
+    from livekit_plugins_openai import OpenAILLM
+    return OpenAILLM(
+        api_key=OPENAI_API_KEY,
+        model="gpt-4o", # or "gpt-3.5-turbo" for faster responses
+    )
+
+
+def get_vad():
+    return _load("vad", _create_vad)
 
-openai_llm = OpenAILLM(
-    api_key=OPENAI_API_KEY,
-    model="gpt-4o", # or "gpt-3.5-turbo" for faster responses
-)
 
-# Load VAD and turn detection models
-vad = silero.VAD.load()
-turn_detector = MultilingualModel()
+def get_turn_detector():
+    return _load("turn_detector", _create_turn_detector)
+
+
+def get_openai_voice():
+    return _load("openai_voice", _create_openai_voice)
+
+
+def get_openai_llm():
+    return _load("openai_llm", _create_openai_llm)
+
+
+def prewarm() -> dict:
+    """Load the VAD and turn detection models and build the OpenAI clients now.
+
+    Returns the load time of each component in seconds. Components that are already
+    loaded are not loaded again.
+    """
+    started = time.perf_counter()
+    for load in (get_vad, get_turn_detector, get_openai_voice, get_openai_llm):
+        load()
+    timings = dict(load_timings, total=time.perf_counter() - started)
+    logger.info("Prewarm finished: " + ", ".join(f"{name}={seconds:.2f}s" for name, seconds in timings.items()))
+    return timings
 
 # Define the system prompt for the agent
 SYSTEM_PROMPT = """
@@ -74,25 +157,255 @@ and easy to follow in a conversational context.
 # Handle graceful shutdown
 should_exit = False
 agent_instance = None
+dispatcher = None
 
 def handle_shutdown_signal(sig, frame):
     global should_exit, agent_instance
     logger.info(f"Received signal {sig}, shutting down gracefully...")
     should_exit = True
-    if agent_instance:
+    if dispatcher is not None:
+        logger.info("Disconnecting agents from all rooms...")
+        asyncio.create_task(dispatcher.stop())
+    elif agent_instance:
         logger.info("Disconnecting agent...")
         asyncio.create_task(agent_instance.disconnect())
     else:
         # Force exit if no agent instance
         sys.exit(0)
 
-# Register signal handlers
-signal.signal(signal.SIGINT, handle_shutdown_signal)
-signal.signal(signal.SIGTERM, handle_shutdown_signal)
+def install_signal_handlers():
+    signal.signal(signal.SIGINT, handle_shutdown_signal)
+    signal.signal(signal.SIGTERM, handle_shutdown_signal)
 
-async def main():
+AGENT_IDENTITY = "optiflow-agent"
+WELCOME_MESSAGE = "Hello! I'm your Optiflow assistant. How can I help you today?"
+
+
+def retry_delay(attempt: int) -> float:
+    """Sub-second at first, doubling per attempt up to AGENT_RETRY_MAX_DELAY, with ±50% jitter."""
+    return min(AGENT_RETRY_MAX_DELAY, AGENT_RETRY_BASE_DELAY * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+
+
+def _message_role(message) -> str:
+    role = message.get("role") if isinstance(message, dict) else getattr(message, "role", "")
+    return str(getattr(role, "value", role))
+
+
+def _message_content(message) -> str:
+    content = message.get("content") if isinstance(message, dict) else getattr(message, "content", "")
+    return content if isinstance(content, str) else json.dumps(content, default=str)
+
+
+class ConversationCheckpoints:
+    """Chat history per room in a local SQLite file, so a recreated agent resumes the conversation.
+
+    Messages are appended as they appear (tool results included), on one background thread
+    so the event loop never waits on disk. Conversations idle longer than ``ttl`` are
+    not resumed and are pruned.
+    """
+
+    def __init__(self, path=AGENT_CHECKPOINT_PATH, ttl=AGENT_CHECKPOINT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoints")
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS conversations ("
+                " room TEXT PRIMARY KEY, turns INTEGER NOT NULL, updated_at REAL NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS messages ("
+                " room TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL,"
+                " PRIMARY KEY (room, seq));"
+            )
+        return self._conn
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _load(self, room: str):
+        conn = self._connect()
+        cutoff = time.time() - self.ttl
+        with conn:
+            conn.execute("DELETE FROM messages WHERE room IN (SELECT room FROM conversations WHERE updated_at < ?)", (cutoff,))
+            conn.execute("DELETE FROM conversations WHERE updated_at < ?", (cutoff,))
+        row = conn.execute("SELECT turns FROM conversations WHERE room = ?", (room,)).fetchone()
+        if row is None:
+            return None
+        messages = conn.execute("SELECT role, content FROM messages WHERE room = ? ORDER BY seq", (room,)).fetchall()
+        return {"turns": row[0], "messages": messages}
+
+    async def load(self, room: str):
+        """``{"turns": n, "messages": [(role, content), ...]}`` for ``room``, or None."""
+        return await self._run(self._load, room)
+
+    def _save(self, room: str, first_seq: int, rows: list, turns: int):
+        conn = self._connect()
+        with conn:
+            if first_seq == 0:
+                conn.execute("DELETE FROM messages WHERE room = ?", (room,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO messages (room, seq, role, content) VALUES (?, ?, ?, ?)",
+                [(room, first_seq + i, role, content) for i, (role, content) in enumerate(rows)],
+            )
+            conn.execute(
+                "INSERT INTO conversations (room, turns, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(room) DO UPDATE SET turns = excluded.turns, updated_at = excluded.updated_at",
+                (room, turns, time.time()),
+            )
+
+    async def save(self, room: str, first_seq: int, rows: list, turns: int):
+        await self._run(self._save, room, first_seq, rows, turns)
+
+    async def keep(self, room: str, agent, saved: int, interval=AGENT_CHECKPOINT_INTERVAL):
+        """Append the agent's new messages every ``interval`` seconds until cancelled.
+
+        ``saved`` is how many of the agent's messages are already stored. If the history
+        shrank (e.g. the framework truncated it), the whole history is rewritten.
+        """
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                saved = await self._checkpoint(room, agent, saved)
+        finally:
+            await asyncio.shield(self._checkpoint(room, agent, saved))
+
+    async def _checkpoint(self, room: str, agent, saved: int) -> int:
+        messages = list(getattr(agent.llm_conversation, "messages", None) or [])
+        if len(messages) == saved:
+            return saved
+        first_seq = saved if len(messages) > saved else 0
+        rows = [(_message_role(m), _message_content(m)) for m in messages[first_seq:]]
+        turns = sum(1 for m in messages if _message_role(m) == "user")
+        try:
+            await self.save(room, first_seq, rows, turns)
+        except Exception as e:
+            logger.warning(f"Could not checkpoint conversation for {room}: {e}")
+            return saved
+        return len(messages)
+
+
+checkpoints = ConversationCheckpoints() if AGENT_CHECKPOINT_PATH else None
+
+
+def create_agent(room_name: str, room=None, history=None):
+    """A VoiceAgent for one room. Its conversation is its own; models and clients are shared.
+
+    ``history`` is a restored chat history; the agent continues it instead of greeting again.
+    """
+    agent = VoiceAgent.create_voice_response_agent(
+        url=LIVEKIT_URL,
+        api_key=LIVEKIT_API_KEY,
+        api_secret=LIVEKIT_API_SECRET,
+        identity=AGENT_IDENTITY,
+        name="Optiflow Voice Assistant",
+        llm=get_openai_llm(),
+        tts=get_openai_voice(),
+        vad=get_vad(),
+        room_name=room_name,
+        turn_detector=get_turn_detector(),
+    )
+    
+    # Set the system prompt
+    agent.llm_conversation.system_message = SYSTEM_PROMPT
+    
+    if history:
+        from livekit.agents import llm
+        agent.llm_conversation.messages.extend(
+            llm.ChatMessage(role=role, content=content) for role, content in history
+        )
+        return agent
+    
+    # Add welcome message when users join
+    @agent.on_user_joined
+    async def on_user_joined(participant):
+        try:
+            logger.info(f"User joined {room_name}: {participant.identity}")
+            if room is not None:
+                room.users_joined += 1
+            await asyncio.sleep(1)  # Brief delay for better user experience
+            await agent.speak(WELCOME_MESSAGE)
+        except Exception as e:
+            logger.error(f"Error in welcome message: {e}")
+    
+    return agent
+
+
+async def _restore_history(room_name: str):
+    if checkpoints is None:
+        return None
+    started = time.perf_counter()
+    try:
+        state = await checkpoints.load(room_name)
+    except Exception as e:
+        logger.warning(f"Could not load conversation checkpoint for {room_name}: {e}")
+        return None
+    if not state or not state["messages"]:
+        return None
+    logger.info(
+        f"Restored conversation for {room_name}: {len(state['messages'])} messages, "
+        f"{state['turns']} turns in {(time.perf_counter() - started) * 1000:.1f}ms"
+    )
+    return state["messages"]
+
+
+async def run_room_agent(room_name: str, room=None, max_retries=AGENT_MAX_RETRIES):
+    """Run the agent for ``room_name`` until it disconnects, recreating it after errors.
+
+    A recreated agent (after an error, or in a new process) picks up the room's checkpointed
+    conversation instead of greeting the user again.
+    """
     global agent_instance
+    retry_count = 0
     
+    while retry_count < max_retries and not should_exit:
+        checkpoint_task = None
+        try:
+            logger.info(f"Creating agent for {room_name} (attempt {retry_count+1}/{max_retries})...")
+            history = await _restore_history(room_name)
+            agent = create_agent(room_name, room, history=history)
+            if checkpoints is not None:
+                checkpoint_task = asyncio.create_task(checkpoints.keep(room_name, agent, saved=len(history or [])))
+            
+            # Store reference for shutdown handling
+            if room is None:
+                agent_instance = agent
+            else:
+                room.agent = agent
+            
+            # Log successful agent creation
+            logger.info(f"Agent created, connecting to room: {room_name}")
+            
+            # Connect and run the agent
+            await run_agent(agent)
+            break  # If we get here without error, break the retry loop
+            
+        except Exception as e:
+            retry_count += 1
+            if room is not None:
+                room.errors += 1
+            logger.error(f"Error running agent in {room_name} (attempt {retry_count}/{max_retries}): {e}", exc_info=True)
+            if retry_count < max_retries and not should_exit:
+                delay = retry_delay(retry_count)
+                logger.info(f"Retrying in {delay:.2f} seconds...")
+                await asyncio.sleep(delay)
+            else:
+                logger.error("Maximum retries reached, giving up")
+                raise
+        finally:
+            if checkpoint_task is not None:
+                checkpoint_task.cancel()
+                try:
+                    await checkpoint_task
+                except asyncio.CancelledError:
+                    pass
+
+
+async def main():
     try:
         # Check for participants in the room first (to prevent duplicates)
         try:
@@ -102,70 +415,345 @@ async def main():
         except Exception as check_err:
             logger.warning(f"Failed to check room participants: {check_err}")
         
-        # Configure the agent with a retry mechanism
-        max_retries = 3
-        retry_count = 0
-        
-        while retry_count < max_retries and not should_exit:
-            try:
-                logger.info(f"Creating agent (attempt {retry_count+1}/{max_retries})...")
-                agent = VoiceAgent.create_voice_response_agent(
-                    url=LIVEKIT_URL,
-                    api_key=LIVEKIT_API_KEY,
-                    api_secret=LIVEKIT_API_SECRET,
-                    identity="optiflow-agent",
-                    name="Optiflow Voice Assistant",
-                    llm=openai_llm,
-                    tts=openai_voice,
-                    vad=vad,
-                    room_name=LIVEKIT_ROOM,
-                    turn_detector=turn_detector,
-                )
-                
-                # Set the system prompt
-                agent.llm_conversation.system_message = SYSTEM_PROMPT
-                
-                # Store reference for shutdown handling
-                agent_instance = agent
-                
-                # Log successful agent creation
-                logger.info(f"Agent created, connecting to room: {LIVEKIT_ROOM}")
-                
-                # Add welcome message when users join
-                @agent.on_user_joined
-                async def on_user_joined(participant):
-                    try:
-                        logger.info(f"User joined: {participant.identity}")
-                        await asyncio.sleep(1)  # Brief delay for better user experience
-                        await agent.speak("Hello! I'm your Optiflow assistant. How can I help you today?")
-                    except Exception as e:
-                        logger.error(f"Error in welcome message: {e}")
-                
-                # Connect and run the agent
-                await run_agent(agent)
-                break  # If we get here without error, break the retry loop
-                
-            except Exception as e:
-                retry_count += 1
-                logger.error(f"Error running agent (attempt {retry_count}/{max_retries}): {e}", exc_info=True)
-                if retry_count < max_retries and not should_exit:
-                    logger.info(f"Retrying in 5 seconds...")
-                    await asyncio.sleep(5)
-                else:
-                    logger.error("Maximum retries reached, giving up")
-                    raise
+        await run_room_agent(LIVEKIT_ROOM)
     except Exception as e:
         logger.error(f"Fatal error in agent: {e}", exc_info=True)
         exit(1)
 
-if __name__ == "__main__":
+
+def _http_url(url: str) -> str:
+    if url.startswith("wss://"):
+        return "https://" + url[len("wss://"):]
+    if url.startswith("ws://"):
+        return "http://" + url[len("ws://"):]
+    return url
+
+
+def _rss_mb() -> float:
     try:
-        # Run the agent
-        logger.info(f"Starting LiveKit voice agent with URL: {LIVEKIT_URL}")
-        logger.info(f"Room name: {LIVEKIT_ROOM}")
-        asyncio.run(main())
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+class RoomSession:
+    """One room served by the dispatcher, with its own VoiceAgent and resource accounting."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.agent = None
+        self.task = None
+        self.started_at = time.time()
+        self._started = time.monotonic()
+        self.users = 0  # participants other than the agent, as of the last poll
+        self.users_joined = 0
+        self.errors = 0
+        self.empty_since = None  # monotonic time the last user left
+
+    def start(self):
+        self.task = asyncio.create_task(run_room_agent(self.name, room=self))
+
+    async def stop(self):
+        if self.agent is not None:
+            try:
+                await self.agent.disconnect()
+            except Exception as e:
+                logger.warning(f"Error disconnecting agent from {self.name}: {e}")
+        if self.task is not None:
+            if not self.task.done():
+                self.task.cancel()
+            try:
+                await self.task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    def stats(self) -> dict:
+        conversation = getattr(self.agent, "llm_conversation", None)
+        return {
+            "started_at": int(self.started_at),
+            "uptime_seconds": round(time.monotonic() - self._started, 1),
+            "users": self.users,
+            "users_joined": self.users_joined,
+            "errors": self.errors,
+            "chat_messages": len(getattr(conversation, "messages", None) or []),
+        }
+
+
+class RoomDispatcher:
+    """Serves every room named ``AGENT_ROOM_PREFIX...`` that has a user in it, from one process.
+
+    Rooms are discovered by polling the LiveKit room service. Each room gets its own
+    VoiceAgent (and so its own conversation); the OpenAI clients and the VAD and
+    turn-detector models are loaded once and shared by all of them. With several agent
+    processes, each one takes the rooms whose name hashes to its index, so no room gets
+    two agents. A process serves at most ``max_rooms`` rooms; rooms over capacity are
+    counted and skipped. A room whose agent gave up after its retries is not joined again
+    for a backoff that doubles with each consecutive failure, up to ``failure_max_backoff``,
+    or until the room empties.
+    """
+
+    def __init__(
+        self,
+        max_rooms=AGENT_MAX_ROOMS,
+        prefix=AGENT_ROOM_PREFIX,
+        poll_interval=AGENT_DISPATCH_POLL_INTERVAL,
+        idle_timeout=AGENT_ROOM_IDLE_TIMEOUT,
+        stats_path=AGENT_STATS_PATH,
+        stats_interval=AGENT_STATS_INTERVAL,
+        failure_max_backoff=AGENT_ROOM_FAILURE_MAX_BACKOFF,
+    ):
+        self.max_rooms = max_rooms
+        self.prefix = prefix
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.stats_path = stats_path
+        self.stats_interval = stats_interval
+        self.failure_max_backoff = failure_max_backoff
+        self.rooms = {}  # room name -> RoomSession
+        self._over_capacity = set()  # rooms already counted as rejected
+        self._failures = {}  # room name -> (consecutive failures, monotonic time it may be joined again)
+        self._stopping = asyncio.Event()
+
+        self.rooms_started = 0
+        self.rooms_finished = 0
+        self.rooms_rejected = 0
+        self.rooms_failed = 0
+
+    def owns(self, room_name: str) -> bool:
+        if process_count <= 1:
+            return True
+        return zlib.crc32(room_name.encode("utf-8")) % process_count == process_index
+
+    async def run(self):
+        from livekit import api
+
+        lkapi = api.LiveKitAPI(_http_url(LIVEKIT_URL), LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
+        logger.info(f"Dispatching rooms named '{self.prefix}*' (up to {self.max_rooms} in this process)")
+        last_stats = time.monotonic()
+        try:
+            while not self._stopping.is_set() and not should_exit:
+                try:
+                    await self._reconcile(lkapi, api)
+                except Exception as e:
+                    logger.warning(f"Room poll failed: {e}")
+                if self.stats_path and time.monotonic() - last_stats >= self.stats_interval:
+                    self._write_stats()
+                    last_stats = time.monotonic()
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self.stop()
+            await lkapi.aclose()
+
+    async def _reconcile(self, lkapi, api):
+        response = await lkapi.room.list_rooms(api.ListRoomsRequest())
+        live = {
+            room.name for room in response.rooms
+            if room.name.startswith(self.prefix) and room.num_participants > 0 and self.owns(room.name)
+        }
+        now = time.monotonic()
+
+        for name in live:
+            participants = await lkapi.room.list_participants(api.ListParticipantsRequest(room=name))
+            users = sum(1 for p in participants.participants if p.identity != AGENT_IDENTITY)
+            room = self.rooms.get(name)
+            if room is not None:
+                room.users = users
+                room.empty_since = None if users else (room.empty_since or now)
+                continue
+            if not users:
+                continue
+            failure = self._failures.get(name)
+            if failure is not None and now < failure[1]:
+                continue
+            if len(self.rooms) >= self.max_rooms:
+                if name not in self._over_capacity:
+                    self._over_capacity.add(name)
+                    self.rooms_rejected += 1
+                    logger.warning(f"At capacity ({self.max_rooms} rooms), not joining {name}")
+                continue
+            self._over_capacity.discard(name)
+            room = RoomSession(name)
+            room.users = users
+            self.rooms[name] = room
+            room.start()
+            self.rooms_started += 1
+            logger.info(f"Joined {name} ({len(self.rooms)}/{self.max_rooms} rooms)")
+
+        self._over_capacity &= live
+        # A failed room gets a fresh start once it has emptied or disappeared
+        self._failures = {name: failure for name, failure in self._failures.items() if name in live}
+        for name, room in list(self.rooms.items()):
+            if name not in live:
+                room.users = 0
+                room.empty_since = room.empty_since or now
+            idle = room.empty_since is not None and now - room.empty_since >= self.idle_timeout
+            if idle or room.task.done():
+                failed = room.task.done() and not room.task.cancelled() and room.task.exception() is not None
+                await self._finish(room)
+                if failed:
+                    self._record_failure(name, now)
+                else:
+                    self._failures.pop(name, None)
+
+    def _record_failure(self, name: str, now: float):
+        failures = self._failures.get(name, (0, 0))[0] + 1
+        backoff = min(self.failure_max_backoff, self.poll_interval * 2 ** failures)
+        self._failures[name] = (failures, now + backoff)
+        self.rooms_failed += 1
+        logger.warning(f"Agent for {name} failed {failures} time(s) in a row, not rejoining for {backoff:.0f}s")
+
+    async def _finish(self, room: RoomSession):
+        self.rooms.pop(room.name, None)
+        await room.stop()
+        self.rooms_finished += 1
+        logger.info(f"Left {room.name}: {json.dumps(room.stats())}")
+
+    async def stop(self):
+        self._stopping.set()
+        rooms = list(self.rooms.values())
+        self.rooms.clear()
+        await asyncio.gather(*(room.stop() for room in rooms), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "process_index": process_index,
+            "pid": os.getpid(),
+            "rss_mb": round(_rss_mb(), 1),
+            "capacity": self.max_rooms,
+            "rooms_active": len(self.rooms),
+            "rooms_started": self.rooms_started,
+            "rooms_finished": self.rooms_finished,
+            "rooms_rejected": self.rooms_rejected,
+            "rooms_failed": self.rooms_failed,
+            "rooms_backing_off": len(self._failures),
+            "load_timings": {name: round(seconds, 3) for name, seconds in load_timings.items()},
+            "rooms": {name: room.stats() for name, room in self.rooms.items()},
+        }
+
+    def _write_stats(self):
+        path = self.stats_path
+        if process_count > 1:
+            root, ext = os.path.splitext(path)
+            path = f"{root}.{process_index}{ext}"
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.stats(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write room stats to {path}: {e}")
+
+
+async def dispatch():
+    global dispatcher
+    dispatcher = RoomDispatcher()
+    await dispatcher.run()
+
+
+def run_in_process() -> int:
+    install_signal_handlers()
+    try:
+        asyncio.run(dispatch() if AGENT_DISPATCH else main())
+        return 0
     except KeyboardInterrupt:
         logger.info("Agent stopped by user")
+        return 0
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 1
     except Exception as e:
         logger.error(f"Error running agent: {e}", exc_info=True)
-        exit(1) 
\ No newline at end of file
+        return 1
+
+
+def _fork_agent(index: int, processes: int) -> int:
+    global process_index, process_count
+    pid = os.fork()
+    if pid == 0:
+        # Child: the prewarmed models are shared with the parent copy-on-write
+        process_index, process_count = index, processes
+        code = 1
+        try:
+            logger.info(f"Agent process {index} started (pid {os.getpid()})")
+            code = run_in_process()
+        finally:
+            logging.shutdown()
+            os._exit(code)
+    return pid
+
+
+def serve(processes: int):
+    """Fork ``processes`` agent processes from this prewarmed process and re-fork any that crash.
+
+    The models are loaded once, before the first fork, so neither extra processes nor
+    restarts pay the load cost again. ``gc.freeze()`` keeps the garbage collector from
+    touching (and so copying) the shared objects in the children.
+    """
+    gc.freeze()
+    children = {}  # pid -> index
+    stopping = False
+
+    def stop(sig, frame):
+        nonlocal stopping
+        stopping = True
+        logger.info(f"Received signal {sig}, stopping {len(children)} agent process(es)...")
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for index in range(processes):
+        children[_fork_agent(index, processes)] = index
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None:
+            continue
+        code = os.waitstatus_to_exitcode(status)
+        if stopping:
+            logger.info(f"Agent process {index} (pid {pid}) exited with {code}")
+            continue
+        delay = AGENT_RESTART_DELAY * random.uniform(0.5, 1.5)
+        logger.warning(f"Agent process {index} (pid {pid}) exited with {code}, restarting in {delay:.1f}s")
+        time.sleep(delay)
+        if not stopping:
+            children[_fork_agent(index, processes)] = index
+
+
+if __name__ == "__main__":
+    # Check required environment variables
+    if not OPENAI_API_KEY:
+        logger.error("OPENAI_API_KEY environment variable is required")
+        exit(1)
+
+    logger.info(f"Starting LiveKit voice agent with URL: {LIVEKIT_URL}")
+    if AGENT_DISPATCH:
+        logger.info(f"Dispatching rooms: {AGENT_ROOM_PREFIX}*")
+    else:
+        logger.info(f"Room name: {LIVEKIT_ROOM}")
+    if AGENT_PREWARM:
+        # Before any event loop or thread exists, so forking afterwards is safe
+        prewarm()
+    processes = AGENT_PROCESSES
+    if processes > 1 and not AGENT_DISPATCH:
+        # Every process would join LIVEKIT_ROOM as AGENT_IDENTITY and keep displacing the others
+        logger.warning(f"AGENT_PROCESSES={processes} needs AGENT_DISPATCH=true; running one agent process")
+        processes = 1
+    if processes > 0 and hasattr(os, "fork"):
+        serve(processes)
+    else:
+        exit(run_in_process()) 
\ No newline at end of file
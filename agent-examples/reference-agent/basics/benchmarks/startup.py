@@ -0,0 +1,126 @@
+"""Repeatable startup benchmark for the reference agent (agent.py).
+
+Each run starts a fresh Python interpreter, so nothing is cached between runs, and measures:
+
+- ``import``: importing ``agent`` (should stay small now that models load lazily)
+- ``prewarm``: per-component load time reported by ``agent.prewarm()``
+- ``fork_ready``: fork a child after prewarm until the child has every model in hand,
+  i.e. the cost of an extra process or a restart in ``serve()``
+- ``child_private_mb``: memory the child had to copy after touching the models (Linux only);
+  everything else stays shared with the parent
+
+No room is joined and nothing is sent to LiveKit. ``OPENAI_API_KEY`` only has to be set
+to a placeholder, since building the clients makes no request.
+
+Usage (from the ``basics`` directory):
+
+    python -m benchmarks.startup --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BASICS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside a fresh interpreter and prints one JSON line
+_PROBE = r"""
+import json, os, sys, time
+started = time.perf_counter()
+import agent
+result = {"import": time.perf_counter() - started}
+result["prewarm"] = agent.prewarm()
+
+def private_mb():
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Private_Dirty:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+if hasattr(os, "fork"):
+    read_fd, write_fd = os.pipe()
+    fork_started = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        agent.get_vad(), agent.get_turn_detector(), agent.get_openai_voice(), agent.get_openai_llm()
+        child = {"ready": time.perf_counter() - fork_started}
+        if private_mb() is not None:
+            child["private_mb"] = private_mb()
+        os.write(write_fd, json.dumps(child).encode())
+        os._exit(0)
+    os.close(write_fd)
+    data = b""
+    while chunk := os.read(read_fd, 4096):
+        data += chunk
+    os.waitpid(pid, 0)
+    child = json.loads(data)
+    result["fork_ready"] = child["ready"]
+    if "private_mb" in child:
+        result["child_private_mb"] = child["private_mb"]
+
+print(json.dumps(result))
+"""
+
+
+def run_once() -> dict:
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY") or "benchmark", LOG_LEVEL="warning")
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=BASICS_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _summary(values: list) -> dict:
+    ordered = sorted(values)
+    return {
+        "median": round(statistics.median(ordered), 4),
+        "min": round(ordered[0], 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def run(args) -> dict:
+    runs = [run_once() for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "python": sys.version.split()[0],
+        "import_seconds": _summary([r["import"] for r in runs]),
+        "prewarm_seconds": {
+            name: _summary([r["prewarm"][name] for r in runs])
+            for name in runs[0]["prewarm"]
+        },
+    }
+    if "fork_ready" in runs[0]:
+        report["fork_ready_seconds"] = _summary([r["fork_ready"] for r in runs])
+    if "child_private_mb" in runs[0]:
+        report["child_private_mb"] = _summary([r["child_private_mb"] for r in runs])
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startup benchmark for the reference agent")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to start")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Tests for the dispatcher mode of ``agent.py``.
+
+Run from the ``basics`` directory: ``python -m unittest discover tests``.
+"""
+import asyncio
+import types
+import unittest
+
+try:
+    import agent
+except ImportError as e:
+    raise unittest.SkipTest(f"livekit agents are not installed: {e}")
+
+
+class FakeRoomService:
+    def __init__(self):
+        self.users = {}  # room name -> user identities
+
+    async def list_rooms(self, request):
+        return types.SimpleNamespace(rooms=[
+            types.SimpleNamespace(name=name, num_participants=len(users)) for name, users in self.users.items()
+        ])
+
+    async def list_participants(self, request):
+        return types.SimpleNamespace(participants=[
+            types.SimpleNamespace(identity=identity) for identity in self.users.get(request.room, [])
+        ])
+
+
+FAKE_API = types.SimpleNamespace(
+    ListRoomsRequest=lambda: None,
+    ListParticipantsRequest=lambda room: types.SimpleNamespace(room=room),
+)
+
+
+class RoomDispatcherTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.starts = 0
+
+        async def failing_room_agent(room_name, room=None):
+            self.starts += 1
+            raise RuntimeError("cannot connect")
+
+        self._run_room_agent = agent.run_room_agent
+        agent.run_room_agent = failing_room_agent
+        self.service = FakeRoomService()
+        self.lkapi = types.SimpleNamespace(room=self.service)
+        self.dispatcher = agent.RoomDispatcher(poll_interval=60, failure_max_backoff=600)
+
+    async def asyncTearDown(self):
+        agent.run_room_agent = self._run_room_agent
+        await self.dispatcher.stop()
+
+    async def reconcile(self):
+        await self.dispatcher._reconcile(self.lkapi, FAKE_API)
+        await asyncio.sleep(0)
+
+    async def test_failed_room_is_not_rejoined_on_every_poll(self):
+        self.service.users["optiflow-voice-a"] = ["user-1"]
+        for _ in range(5):
+            await self.reconcile()
+        self.assertEqual(self.starts, 1)
+        self.assertEqual(self.dispatcher.rooms_failed, 1)
+        self.assertEqual(self.dispatcher.stats()["rooms_backing_off"], 1)
+
+    async def test_failed_room_is_rejoined_once_it_has_emptied(self):
+        self.service.users["optiflow-voice-a"] = ["user-1"]
+        await self.reconcile()
+        await self.reconcile()
+        del self.service.users["optiflow-voice-a"]
+        await self.reconcile()
+        self.service.users["optiflow-voice-a"] = ["user-1"]
+        await self.reconcile()
+        self.assertEqual(self.starts, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
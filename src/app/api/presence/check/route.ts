@@ -7,6 +7,13 @@ import { redis } from '@/lib/upstash';
 const RATE_LIMIT = 60; // requests
 const RATE_LIMIT_WINDOW = 60; // seconds
 
+// Batched checks from the voice agent worker
+const MAX_BATCH_SIZE = 1000;
+const MAX_WAIT_MS = 25000; // long-poll upper bound
+const WAIT_POLL_INTERVAL_MS = 1000;
+
+type PresenceState = { inactive: boolean; lastActive: number | null };
+
 async function checkRateLimit(userId: string) {
   const key = `ratelimit:presencecheck:${userId}`;
   const count = await redis.incr(key);
@@ -16,8 +23,71 @@ async function checkRateLimit(userId: string) {
   return count > RATE_LIMIT;
 }
 
+function isAgentRequest(req: Request) {
+  const internalApiKey = process.env.OPTIFLOW_BACKEND_API_KEY;
+  const authHeader = req.headers?.get?.('authorization');
+  return !!internalApiKey && authHeader === `Bearer ${internalApiKey}`;
+}
+
+async function readPresence(userIds: string[]) {
+  // One pipelined round trip to Redis for the whole batch
+  const pipeline = redis.pipeline();
+  userIds.forEach((id) => pipeline.hgetall(`user:${id}:presence`));
+  const rows = (await pipeline.exec()) as (Record<string, string> | null)[];
+
+  const presence: Record<string, PresenceState> = {};
+  userIds.forEach((id, i) => {
+    const row = rows[i];
+    presence[id] = {
+      inactive: !!row && row.inactive === '1',
+      lastActive: row?.lastActive ? Number(row.lastActive) : null,
+    };
+  });
+  return presence;
+}
+
+async function checkPresenceBatch(
+  userIds: string[],
+  known: Record<string, boolean> | undefined,
+  waitMs: number
+) {
+  let presence = await readPresence(userIds);
+  if (!known || waitMs <= 0) {
+    return presence;
+  }
+
+  // Long-poll: hold the request until a user's inactive flag differs from
+  // what the worker already knows, or until the wait expires.
+  const deadline = Date.now() + Math.min(waitMs, MAX_WAIT_MS);
+  const changed = () =>
+    userIds.some(
+      (id) => id in known && presence[id].inactive !== known[id]
+    );
+  while (!changed() && Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, WAIT_POLL_INTERVAL_MS));
+    presence = await readPresence(userIds);
+  }
+  return presence;
+}
+
 export async function POST(req: Request) {
   try {
+    if (isAgentRequest(req)) {
+      const { userIds, known, waitMs } = await req.json();
+      if (!Array.isArray(userIds) || userIds.length > MAX_BATCH_SIZE) {
+        return NextResponse.json(
+          { error: `userIds must be an array of at most ${MAX_BATCH_SIZE}` },
+          { status: 400 }
+        );
+      }
+      const presence = await checkPresenceBatch(
+        userIds,
+        known,
+        Number(waitMs) || 0
+      );
+      return NextResponse.json({ presence });
+    }
+
     const session = await getServerSession(authOptions);
     if (!session || !session.user?.id) {
       return NextResponse.json({ error: 'Unauthorized' }, { status: 401 });
@@ -38,4 +108,4 @@ export async function POST(req: Request) {
   } catch (error) {
     return NextResponse.json({ error: 'Failed to check presence' }, { status: 500 });
   }
-} 
\ No newline at end of file
+}
@@ -67,4 +67,29 @@ describe('/api/presence endpoints', () => {
     const res = await checkHandler(req);
     expect(res.status).toBe(401);
   });
+
+  it('should batch-check presence for agent requests', async () => {
+    process.env.OPTIFLOW_BACKEND_API_KEY = 'agent-key';
+    await redis.hmset(`user:${mockUserId}:presence`, { lastActive: '1000', inactive: '1' });
+    const req = {
+      headers: new Headers({ authorization: 'Bearer agent-key' }),
+      json: async () => ({ userIds: [mockUserId, 'unknown-user'] }),
+    } as any;
+    const res = await checkHandler(req);
+    expect(res.status).toBe(200);
+    const data = await res.json();
+    expect(data.presence[mockUserId]).toEqual({ inactive: true, lastActive: 1000 });
+    expect(data.presence['unknown-user']).toEqual({ inactive: false, lastActive: null });
+  });
+
+  it('should reject batched presence check with a wrong agent key', async () => {
+    process.env.OPTIFLOW_BACKEND_API_KEY = 'agent-key';
+    (getServerSession as jest.Mock).mockResolvedValue(null);
+    const req = {
+      headers: new Headers({ authorization: 'Bearer wrong-key' }),
+      json: async () => ({ userIds: [mockUserId] }),
+    } as any;
+    const res = await checkHandler(req);
+    expect(res.status).toBe(401);
+  });
 }); 
\ No newline at end of file
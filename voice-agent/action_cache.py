@@ -0,0 +1,154 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import logging
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+PIPEDREAM_RESULT_CACHE_ENABLED = os.getenv("PIPEDREAM_RESULT_CACHE_ENABLED", "true").lower() == "true"
+PIPEDREAM_RESULT_TTL = float(os.getenv("PIPEDREAM_RESULT_TTL", "0"))  # seconds a side-effecting result is reused across turns; 0 = within its turn only
+PIPEDREAM_READ_ONLY_TTL = float(os.getenv("PIPEDREAM_READ_ONLY_TTL", "300"))
+PIPEDREAM_READ_ONLY_PREFIXES = tuple(
+    prefix.strip() for prefix in os.getenv(
+        "PIPEDREAM_READ_ONLY_PREFIXES", "get_,list_,search_,find_,read_,fetch_,lookup_,check_"
+    ).split(",") if prefix.strip()
+)
+PIPEDREAM_RESULT_CACHE_MAX_ENTRIES = int(os.getenv("PIPEDREAM_RESULT_CACHE_MAX_ENTRIES", "1000"))
+
+# Upper bound on how long a turn-scoped result is kept; no turn runs anywhere near this long
+_TURN_RESULT_TTL = 600
+
+# A unique id set for each user turn, so side-effecting results are only reused within the turn that produced them
+current_action_turn = contextvars.ContextVar("current_action_turn", default=None)
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items() if item is not None}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def canonical_parameters(parameters: dict) -> str:
+    """Parameters as compact JSON with sorted keys, trimmed strings and no null values,
+    so the same request phrased slightly differently by the LLM serializes identically."""
+    return json.dumps(_canonical(parameters or {}), sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def idempotency_key(user_identity: str, action_type: str, parameters: dict, turn: str = None) -> str:
+    """Key of one action call; with ``turn``, the same call in another turn gets another key."""
+    parts = [user_identity or "", action_type or "", canonical_parameters(parameters)]
+    if turn:
+        parts.append(turn)
+    raw = "\x1f".join(parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def is_read_only(action_type: str) -> bool:
+    return (action_type or "").startswith(PIPEDREAM_READ_ONLY_PREFIXES)
+
+
+class ActionResultCache:
+    """Recent Pipedream action results keyed by idempotency key, with in-flight coalescing.
+
+    An identical action already running is joined instead of started again. A completed
+    read-only action is answered from its result for ``read_only_ttl`` seconds. A completed
+    side-effecting action is answered from its result only within the same user turn
+    (``current_action_turn``), so the LLM repeating a tool call cannot trigger the side effect
+    twice, while the user asking for it again in a later turn runs it again. With ``ttl``
+    above 0, side-effecting results are reused across turns for that many seconds instead.
+    Failed actions are never cached.
+    """
+
+    def __init__(self, ttl=PIPEDREAM_RESULT_TTL, read_only_ttl=PIPEDREAM_READ_ONLY_TTL,
+                 max_entries=PIPEDREAM_RESULT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.read_only_ttl = read_only_ttl
+        self.max_entries = max_entries
+        # key -> (expires_at, value, turn or None), ordered from least to most recently used
+        self._entries = OrderedDict()
+        self._inflight = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key, turn=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, entry_turn = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        if entry_turn is not None and entry_turn != turn:
+            return None  # produced in another turn
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value: str, read_only=False, turn=None):
+        if read_only:
+            ttl, turn = self.read_only_ttl, None
+        elif self.ttl > 0:
+            ttl, turn = self.ttl, None
+        elif turn is not None:
+            ttl = _TURN_RESULT_TTL
+        else:
+            return
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + ttl, value, turn)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_run(self, key, run, read_only=False):
+        """Return ``(result, repeated)``: a recent or in-flight result for ``key``, or the result of ``run()``.
+
+        Exceptions raised by ``run`` are propagated to every waiter and nothing is cached.
+        """
+        turn = None if read_only else current_action_turn.get()
+        value = self.get(key, turn)
+        if value is not None:
+            self.hits += 1
+            return value, True
+
+        task = self._inflight.get(key)
+        repeated = task is not None
+        if repeated:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(run())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._on_run_done(key, t, read_only, turn))
+        # Shield so that a caller timing out does not cancel the action for the other waiters
+        return await asyncio.shield(task), repeated
+
+    def _on_run_done(self, key, task, read_only, turn):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is None:
+            self.put(key, task.result(), read_only, turn)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
+
+
+# Single instance per worker process
+action_cache = ActionResultCache()
@@ -0,0 +1,242 @@
+import asyncio
+import math
+import os
+import logging
+import time
+import weakref
+from collections import deque
+import numpy as np
+from livekit import rtc
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+AUDIO_FRAME_MS = int(os.getenv("AUDIO_FRAME_MS", "20"))  # duration of each buffered frame
+AUDIO_BUFFER_MS = int(os.getenv("AUDIO_BUFFER_MS", "1000"))  # audio a session can queue before backpressure applies
+AUDIO_INPUT_BACKPRESSURE = os.getenv("AUDIO_INPUT_BACKPRESSURE", "drop_oldest")  # drop_oldest, drop_newest or block
+
+BACKPRESSURE_POLICIES = ("drop_oldest", "drop_newest", "block")
+_SAMPLE_WIDTH = 2
+_FULL_SCALE = 32768.0
+
+audio_frames_dropped = registry.counter(
+    "voice_audio_frames_dropped_total", "Buffered audio frames dropped because the consumer fell behind")
+audio_backpressure_wait = registry.histogram(
+    "voice_audio_backpressure_wait_seconds", "Time a producer waited for room in a full audio buffer")
+
+# Every live buffer, for the worker-wide memory gauges
+_buffers = weakref.WeakSet()
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """Linear-interpolation resampling of mono int16 ``samples``."""
+    if from_rate == to_rate or not len(samples):
+        return samples
+    count = max(1, round(len(samples) * to_rate / from_rate))
+    positions = np.arange(count, dtype=np.float32) * (from_rate / to_rate)
+    resampled = np.interp(positions, np.arange(len(samples), dtype=np.float32), samples)
+    return np.clip(np.rint(resampled), -32768, 32767).astype(np.int16)
+
+
+def downmix(samples: np.ndarray, num_channels: int) -> np.ndarray:
+    """Average interleaved int16 channels into one."""
+    if num_channels == 1:
+        return samples
+    return samples.reshape(-1, num_channels).mean(axis=1).astype(np.int16)
+
+
+class AudioRingBuffer:
+    """Fixed-size, preallocated PCM buffer between an audio producer and one consumer.
+
+    All ``capacity`` frames are allocated up front as ``rtc.AudioFrame`` objects, each slot
+    being a NumPy view of its own frame's buffer (``rtc.AudioFrame`` copies a sliced
+    buffer it is given, so frames cannot share one allocation). ``write`` copies incoming
+    samples into the next free slot, once, and the consumer receives the slot's frame itself,
+    with no further copy. A frame belongs to
+    the consumer until it asks for the next one; released slots are reused least recently
+    first, so a frame the consumer queued internally stays intact for about ``buffer_ms`` of
+    further audio. Input already in the buffer's format is read through a NumPy view of the
+    incoming frame; other sample rates or channel counts are converted with NumPy first.
+
+    When the consumer falls behind and no slot is free, ``backpressure`` decides:
+    ``drop_oldest`` overwrites the oldest queued frame (live audio: stale frames are useless),
+    ``drop_newest`` discards the incoming audio, and ``block`` makes ``write`` wait for a slot.
+    Each published frame is level-metered in place.
+    """
+
+    def __init__(self, sample_rate=16000, num_channels=1, frame_ms=AUDIO_FRAME_MS, buffer_ms=AUDIO_BUFFER_MS,
+                 backpressure=AUDIO_INPUT_BACKPRESSURE, name="input"):
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy {backpressure!r}; expected one of {BACKPRESSURE_POLICIES}")
+        self.name = name
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.frame_ms = frame_ms
+        self.backpressure = backpressure
+        self.samples_per_frame = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.samples_per_frame * num_channels * _SAMPLE_WIDTH
+        # One slot is filled by the producer and one held by the consumer while the rest queue
+        self.capacity = max(3, math.ceil(buffer_ms / frame_ms))
+
+        self._frames = [
+            rtc.AudioFrame.create(sample_rate, num_channels, self.samples_per_frame)
+            for _ in range(self.capacity)
+        ]
+        self._slots = [np.frombuffer(frame.data, dtype=np.int16) for frame in self._frames]
+        self._squares = np.empty(self.samples_per_frame * num_channels, dtype=np.float32)  # level metering scratch
+        self._free = deque(range(self.capacity), maxlen=self.capacity)
+        self._queued = deque(maxlen=self.capacity)
+        self._filling = None
+        self._filled = 0  # values written to the slot being filled
+        self._held = None
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._closed = False
+
+        self.frames_written = 0
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.frames_converted = 0
+        self.backpressure_waits = 0
+        self.max_queued = 0
+        self.level_dbfs = -120.0
+        self.peak_dbfs = -120.0
+        self.clipped_frames = 0
+        _buffers.add(self)
+
+    @property
+    def allocated_bytes(self) -> int:
+        return sum(slot.nbytes for slot in self._slots) + self._squares.nbytes
+
+    def queued_ms(self) -> int:
+        return len(self._queued) * self.frame_ms
+
+    async def write(self, frame):
+        """Buffer the samples of ``frame`` (an ``rtc.AudioFrame``), publishing each slot as it fills."""
+        samples = np.frombuffer(frame.data, dtype=np.int16)
+        if frame.num_channels != self.num_channels or frame.sample_rate != self.sample_rate:
+            samples = resample(downmix(samples, frame.num_channels), frame.sample_rate, self.sample_rate)
+            if self.num_channels > 1:
+                samples = np.repeat(samples, self.num_channels)
+            self.frames_converted += 1
+        offset = 0
+        while offset < len(samples):
+            if self._filling is None:
+                if not await self._acquire():
+                    return  # drop_newest: the rest of this frame is discarded
+            row = self._slots[self._filling]
+            count = min(len(samples) - offset, len(row) - self._filled)
+            row[self._filled:self._filled + count] = samples[offset:offset + count]
+            self._filled += count
+            offset += count
+            if self._filled == len(row):
+                self._publish()
+
+    async def _acquire(self) -> bool:
+        if not self._free:
+            if self.backpressure == "drop_oldest" and self._queued:
+                self._free.append(self._queued.popleft())
+                self._drop()
+            elif self.backpressure == "block":
+                started = time.perf_counter()
+                self.backpressure_waits += 1
+                while not self._free and not self._closed:
+                    self._writable.clear()
+                    await self._writable.wait()
+                audio_backpressure_wait.observe(time.perf_counter() - started, buffer=self.name)
+                if self._closed:
+                    return False
+            else:
+                self._drop()
+                return False
+        self._filling = self._free.popleft()
+        self._filled = 0
+        return True
+
+    def _drop(self):
+        self.frames_dropped += 1
+        audio_frames_dropped.inc(buffer=self.name)
+
+    def _publish(self):
+        slot = self._filling
+        self._filling = None
+        self._meter(self._slots[slot])
+        self._queued.append(slot)
+        self.frames_written += 1
+        self.max_queued = max(self.max_queued, len(self._queued))
+        self._readable.set()
+
+    def _meter(self, samples: np.ndarray):
+        np.multiply(samples, samples, out=self._squares, dtype=np.float32)
+        rms = math.sqrt(float(self._squares.mean()))
+        peak = max(int(samples.max()), -int(samples.min()))
+        self.level_dbfs = 20 * math.log10(max(rms, 1.0) / _FULL_SCALE)
+        self.peak_dbfs = max(self.peak_dbfs, 20 * math.log10(max(peak, 1) / _FULL_SCALE))
+        if peak >= 32767:
+            self.clipped_frames += 1
+
+    async def read(self):
+        """The next buffered frame, or None once the buffer is closed and drained.
+
+        The previous frame returned by ``read`` is released for reuse by this call.
+        """
+        self._release()
+        while not self._queued:
+            if self._closed:
+                return None
+            self._readable.clear()
+            await self._readable.wait()
+        self._held = self._queued.popleft()
+        self.frames_read += 1
+        return self._frames[self._held]
+
+    def _release(self):
+        if self._held is not None:
+            self._free.append(self._held)
+            self._held = None
+            self._writable.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        frame = await self.read()
+        if frame is None:
+            raise StopAsyncIteration
+        return frame
+
+    def close(self):
+        """No more input; the consumer drains what is queued. A partly filled frame is discarded."""
+        self._closed = True
+        self._readable.set()
+        self._writable.set()
+
+    def stats(self) -> dict:
+        return {
+            "allocated_bytes": self.allocated_bytes,
+            "capacity_ms": self.capacity * self.frame_ms,
+            "queued_ms": self.queued_ms(),
+            "max_queued_ms": self.max_queued * self.frame_ms,
+            "frames_written": self.frames_written,
+            "frames_read": self.frames_read,
+            "frames_dropped": self.frames_dropped,
+            "frames_converted": self.frames_converted,
+            "backpressure_waits": self.backpressure_waits,
+            "level_dbfs": round(self.level_dbfs, 1),
+            "peak_dbfs": round(self.peak_dbfs, 1),
+            "clipped_frames": self.clipped_frames,
+        }
+
+
+def audio_buffer_stats() -> dict:
+    """Worker-wide audio buffer memory, for the gauges."""
+    buffers = list(_buffers)
+    allocated = [buffer.allocated_bytes for buffer in buffers]
+    return {
+        "buffers": len(buffers),
+        "allocated_bytes": sum(allocated),
+        "max_buffer_bytes": max(allocated, default=0),
+        "queued_ms_max": max((buffer.queued_ms() for buffer in buffers), default=0),
+        "frames_dropped": sum(buffer.frames_dropped for buffer in buffers),
+    }
@@ -0,0 +1,305 @@
+import asyncio
+import os
+import logging
+import random
+import time
+from collections import deque
+import aiohttp
+from http_client import http_client
+from metrics import registry, percentile
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+BACKEND_SEARCH_DEADLINE = float(os.getenv("BACKEND_SEARCH_DEADLINE", "4"))  # seconds, including retries
+BACKEND_SEARCH_RETRIES = int(os.getenv("BACKEND_SEARCH_RETRIES", "2"))
+BACKEND_SEARCH_HEDGE = os.getenv("BACKEND_SEARCH_HEDGE", "true").lower() == "true"
+BACKEND_PIPEDREAM_DEADLINE = float(os.getenv("BACKEND_PIPEDREAM_DEADLINE", os.getenv("PIPEDREAM_ACTION_TIMEOUT", "30")))
+BACKEND_PIPEDREAM_RETRIES = int(os.getenv("BACKEND_PIPEDREAM_RETRIES", "0"))  # only for a backend that deduplicates on Idempotency-Key
+BACKEND_RETRY_BASE_DELAY = float(os.getenv("BACKEND_RETRY_BASE_DELAY", "0.1"))  # seconds
+BACKEND_RETRY_MAX_DELAY = float(os.getenv("BACKEND_RETRY_MAX_DELAY", "1.0"))  # seconds
+BACKEND_HEDGE_MIN_DELAY = float(os.getenv("BACKEND_HEDGE_MIN_DELAY", "0.3"))  # seconds; hedge delay until enough latency samples exist
+BACKEND_HEDGE_MIN_SAMPLES = int(os.getenv("BACKEND_HEDGE_MIN_SAMPLES", "20"))
+BACKEND_BREAKER_ERROR_RATE = float(os.getenv("BACKEND_BREAKER_ERROR_RATE", "0.5"))
+BACKEND_BREAKER_MIN_REQUESTS = int(os.getenv("BACKEND_BREAKER_MIN_REQUESTS", "10"))
+BACKEND_BREAKER_WINDOW = float(os.getenv("BACKEND_BREAKER_WINDOW", "30"))  # seconds of outcomes considered
+BACKEND_BREAKER_OPEN_SECONDS = float(os.getenv("BACKEND_BREAKER_OPEN_SECONDS", "15"))
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+backend_requests = registry.counter(
+    "voice_backend_requests_total", "Backend requests by endpoint and outcome")
+backend_retries = registry.counter(
+    "voice_backend_retries_total", "Backend request retries")
+backend_hedges = registry.counter(
+    "voice_backend_hedges_total", "Hedged second requests, and whether the hedge answered first")
+backend_rejections = registry.counter(
+    "voice_backend_breaker_rejections_total", "Backend calls failed fast by an open circuit breaker")
+backend_latency = registry.histogram(
+    "voice_backend_request_seconds", "Backend call duration, including retries and hedges")
+
+
+class BackendError(Exception):
+    """Base class for failed Optiflow backend calls."""
+
+
+class BackendHTTPError(BackendError):
+    def __init__(self, status: int, error_text: str):
+        super().__init__(f"Backend request failed with status {status}")
+        self.status = status
+        self.error_text = error_text
+
+
+class BackendTimeoutError(BackendError):
+    pass
+
+
+class BackendUnavailableError(BackendError):
+    """Raised without a request while the endpoint's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Opens when the error rate over the last ``window`` seconds reaches ``error_rate``.
+
+    While open, calls fail immediately. After ``open_seconds`` one probe call is let
+    through (half-open); its outcome closes the breaker or opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+
+    def __init__(
+        self,
+        name: str,
+        error_rate=BACKEND_BREAKER_ERROR_RATE,
+        min_requests=BACKEND_BREAKER_MIN_REQUESTS,
+        window=BACKEND_BREAKER_WINDOW,
+        open_seconds=BACKEND_BREAKER_OPEN_SECONDS,
+    ):
+        self.name = name
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._outcomes = deque()  # (monotonic time, ok)
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.OPEN:
+            return False
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record(self, ok: bool):
+        now = time.monotonic()
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = False
+            if ok:
+                self.state = self.CLOSED
+                self._outcomes.clear()
+                logger.info(f"Circuit breaker '{self.name}' closed")
+            else:
+                self._open(now)
+            return
+        self._outcomes.append((now, ok))
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+        failures = sum(1 for _, outcome in self._outcomes if not outcome)
+        if (
+            self.state == self.CLOSED
+            and len(self._outcomes) >= self.min_requests
+            and failures / len(self._outcomes) >= self.error_rate
+        ):
+            self._open(now)
+
+    def abandon_probe(self):
+        """Let another call probe a half-open breaker when the current probe's caller gave up."""
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = False
+
+    def _open(self, now: float):
+        self.state = self.OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        logger.warning(f"Circuit breaker '{self.name}' opened for {self.open_seconds:.0f}s")
+
+
+class Endpoint:
+    """Call policy for one backend route, plus its breaker and recent latencies (shared worker-wide)."""
+
+    def __init__(self, name: str, path: str, deadline: float, idempotent: bool, retries=0, hedge=False):
+        self.name = name
+        self.path = path
+        self.deadline = deadline
+        self.idempotent = idempotent
+        self.retries = retries if idempotent else 0
+        self.hedge = hedge and idempotent
+        self.breaker = CircuitBreaker(name)
+        self.latencies = deque(maxlen=200)  # successful single-attempt durations
+
+    def hedge_delay(self) -> float:
+        """Send the hedge once the first attempt is slower than the recent p95."""
+        if len(self.latencies) < BACKEND_HEDGE_MIN_SAMPLES:
+            return BACKEND_HEDGE_MIN_DELAY
+        return max(percentile(self.latencies, 95), 0.01)
+
+
+ENDPOINTS = {
+    "search": Endpoint(
+        "search", "/api/knowledge/search", BACKEND_SEARCH_DEADLINE,
+        idempotent=True, retries=BACKEND_SEARCH_RETRIES, hedge=BACKEND_SEARCH_HEDGE,
+    ),
+    # Every action carries an Idempotency-Key, but /api/pipedream/execute does not deduplicate
+    # on it yet, so by default a failed action is not retried: a retry could send an email or
+    # create a task twice. Never hedged: a hedge would double the load of slow actions.
+    "pipedream": Endpoint(
+        "pipedream", "/api/pipedream/execute", BACKEND_PIPEDREAM_DEADLINE,
+        idempotent=BACKEND_PIPEDREAM_RETRIES > 0, retries=BACKEND_PIPEDREAM_RETRIES,
+    ),
+}
+
+
+class BackendClient:
+    """Calls the Optiflow backend with per-endpoint deadlines, retries, hedging and circuit breaking.
+
+    Only idempotent endpoints are retried (with jittered exponential backoff) or hedged.
+    Connection errors, timeouts, 429 and 5xx responses count as failures for the breaker;
+    other 4xx responses are the caller's problem and are raised without a retry.
+    """
+
+    def __init__(self, base_url: str, api_key: str):
+        self.base_url = base_url
+        self.api_key = api_key
+
+    async def post(self, endpoint_name: str, payload: dict, response_format="json", headers: dict = None):
+        """POST ``payload`` to the endpoint and return the decoded JSON (or text) body."""
+        endpoint = ENDPOINTS[endpoint_name]
+        if not endpoint.breaker.allow():
+            backend_rejections.inc(endpoint=endpoint.name)
+            raise BackendUnavailableError(f"Backend endpoint '{endpoint.name}' is temporarily unavailable")
+
+        started = time.perf_counter()
+        deadline = time.monotonic() + endpoint.deadline
+        try:
+            result = await self._with_retries(endpoint, payload, response_format, headers or {}, deadline)
+        except BackendHTTPError as e:
+            retryable = e.status in RETRYABLE_STATUSES
+            endpoint.breaker.record(ok=not retryable)
+            backend_requests.inc(endpoint=endpoint.name, outcome=f"http_{e.status}")
+            raise
+        except BackendError:
+            endpoint.breaker.record(ok=False)
+            backend_requests.inc(endpoint=endpoint.name, outcome="failed")
+            raise
+        except asyncio.CancelledError:
+            # The caller gave up; say nothing about the backend's health
+            endpoint.breaker.abandon_probe()
+            raise
+        except Exception:
+            # Anything else (e.g. a body that does not decode) still settles the breaker, so a
+            # half-open probe is never left in flight
+            endpoint.breaker.record(ok=False)
+            backend_requests.inc(endpoint=endpoint.name, outcome="error")
+            raise
+        finally:
+            backend_latency.observe(time.perf_counter() - started, endpoint=endpoint.name)
+        endpoint.breaker.record(ok=True)
+        backend_requests.inc(endpoint=endpoint.name, outcome="ok")
+        return result
+
+    async def _with_retries(self, endpoint: Endpoint, payload, response_format, headers, deadline):
+        for attempt in range(endpoint.retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise BackendTimeoutError(f"Backend endpoint '{endpoint.name}' exceeded its {endpoint.deadline}s deadline")
+            try:
+                if endpoint.hedge:
+                    return await self._hedged(endpoint, payload, response_format, headers, remaining)
+                return await self._attempt(endpoint, payload, response_format, headers, remaining)
+            except BackendHTTPError as e:
+                if e.status not in RETRYABLE_STATUSES or attempt == endpoint.retries:
+                    raise
+                error = e
+            except BackendTimeoutError as e:
+                if attempt == endpoint.retries:
+                    raise
+                error = e
+            # Full jitter, and never sleep past the deadline
+            backoff = random.uniform(0, min(BACKEND_RETRY_MAX_DELAY, BACKEND_RETRY_BASE_DELAY * 2 ** attempt))
+            if time.monotonic() + backoff >= deadline:
+                raise error
+            backend_retries.inc(endpoint=endpoint.name)
+            logger.warning(f"Retrying backend endpoint '{endpoint.name}' after: {error}")
+            await asyncio.sleep(backoff)
+
+    async def _hedged(self, endpoint: Endpoint, payload, response_format, headers, timeout: float):
+        """Send a second identical request if the first is slower than the endpoint's recent p95."""
+        primary = asyncio.ensure_future(self._attempt(endpoint, payload, response_format, headers, timeout))
+        hedge_delay = endpoint.hedge_delay()
+        if hedge_delay >= timeout:
+            return await primary
+        done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+        if done:
+            return primary.result()
+
+        hedge = asyncio.ensure_future(
+            self._attempt(endpoint, payload, response_format, headers, timeout - hedge_delay)
+        )
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        backend_hedges.inc(endpoint=endpoint.name, won=str(task is hedge).lower())
+                        return task.result()
+            # Both failed: surface the primary's error
+            backend_hedges.inc(endpoint=endpoint.name, won="none")
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _attempt(self, endpoint: Endpoint, payload, response_format, headers, timeout: float):
+        started = time.perf_counter()
+        client = http_client.get_session()
+        try:
+            async with client.post(
+                f"{self.base_url}{endpoint.path}",
+                json=payload,
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {self.api_key}",
+                    **headers,
+                },
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as response:
+                if response.status >= 400:
+                    raise BackendHTTPError(response.status, await response.text())
+                result = await (response.json() if response_format == "json" else response.text())
+        except asyncio.TimeoutError:
+            raise BackendTimeoutError(f"Backend endpoint '{endpoint.name}' timed out after {timeout:.2f}s")
+        except aiohttp.ClientError as e:
+            # Connection-level failures are treated like a 503: retryable and counted by the breaker
+            raise BackendHTTPError(503, str(e))
+        endpoint.latencies.append(time.perf_counter() - started)
+        return result
+
+
+def backend_stats() -> dict:
+    """Breaker state (0 closed, 1 open, 2 half-open), times opened and hedge delay per endpoint."""
+    stats = {}
+    for name, endpoint in ENDPOINTS.items():
+        stats[f"{name}_breaker_state"] = endpoint.breaker.state
+        stats[f"{name}_breaker_opened"] = endpoint.breaker.times_opened
+        if endpoint.hedge:
+            stats[f"{name}_hedge_delay_seconds"] = round(endpoint.hedge_delay(), 4)
+    return stats
@@ -0,0 +1,131 @@
+"""Local aiohttp stand-in for the Optiflow backend endpoints the agent calls."""
+import asyncio
+import random
+from aiohttp import web
+
+
+class BackendStub:
+    """Serves ``/api/pipedream/execute``, ``/api/knowledge/search``, ``/api/presence/check`` and the
+    agent event webhook with configurable latencies, counting requests per endpoint.
+
+    ``error_rate`` makes that share of search and Pipedream requests fail with a 503, and
+    ``slow_rate`` makes that share take ``slow_factor`` times longer, to exercise retries,
+    hedging and circuit breakers. Like the real backend, Pipedream requests are not deduplicated:
+    ``duplicate_actions`` counts keys that ran more than once. With ``dedupe_actions``, a key that
+    already ran gets the stored response instead, as a backend honoring ``Idempotency-Key`` would."""
+
+    def __init__(self, host="127.0.0.1", port=0, pipedream_latency=0.4, search_latency=0.25,
+                 presence_latency=0.02, webhook_latency=0.02, jitter=0.2, error_rate=0.0,
+                 slow_rate=0.0, slow_factor=10.0, dedupe_actions=False):
+        self.host = host
+        self.port = port
+        self.latencies = {
+            "pipedream": pipedream_latency,
+            "search": search_latency,
+            "presence": presence_latency,
+            "webhook": webhook_latency,
+        }
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.dedupe_actions = dedupe_actions
+        self.injected_errors = 0
+        self.actions_executed = 0
+        self.idempotent_replays = 0
+        self.duplicate_actions = 0
+        self._action_results = {}  # Idempotency-Key -> response body
+        self.requests = {name: 0 for name in self.latencies}
+        self._runner = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def webhook_url(self) -> str:
+        return f"{self.url}/agent-events"
+
+    async def _delay(self, name: str):
+        self.requests[name] += 1
+        latency = self.latencies[name]
+        if name in ("pipedream", "search") and random.random() < self.slow_rate:
+            latency *= self.slow_factor
+        await asyncio.sleep(latency * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def _injected_error(self, name: str):
+        if name in ("pipedream", "search") and random.random() < self.error_rate:
+            self.injected_errors += 1
+            return web.json_response({"error": "injected failure"}, status=503)
+        return None
+
+    async def _pipedream(self, request):
+        body = await request.json()
+        key = request.headers.get("Idempotency-Key")
+        if self.dedupe_actions and key in self._action_results:
+            self.requests["pipedream"] += 1
+            self.idempotent_replays += 1
+            return web.json_response(self._action_results[key])
+        await self._delay("pipedream")
+        error = self._injected_error("pipedream")
+        if error is not None:
+            return error
+        result = {
+            "status": "success",
+            "action_type": body.get("action_type"),
+            "message": f"Action '{body.get('action_type')}' executed successfully",
+        }
+        self.actions_executed += 1
+        if key in self._action_results:
+            self.duplicate_actions += 1
+        if key:
+            self._action_results[key] = result
+        return web.json_response(result)
+
+    async def _search(self, request):
+        body = await request.json()
+        await self._delay("search")
+        error = self._injected_error("search")
+        if error is not None:
+            return error
+        return web.json_response({
+            "documents": [
+                {
+                    "title": f"Document {i}",
+                    "content": f"Relevant passage {i} for '{body.get('query')}'. " * 20,
+                    "metadata": {"source": "benchmark"},
+                    "similarity": round(0.9 - i * 0.1, 2),
+                }
+                for i in range(5)
+            ]
+        })
+
+    async def _presence(self, request):
+        body = await request.json()
+        await self._delay("presence")
+        return web.json_response({
+            "presence": {user_id: {"inactive": False, "lastActive": None} for user_id in body.get("userIds", [])}
+        })
+
+    async def _webhook(self, request):
+        await request.read()
+        await self._delay("webhook")
+        return web.json_response({"success": True})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/api/pipedream/execute", self._pipedream)
+        app.router.add_post("/api/knowledge/search", self._search)
+        app.router.add_post("/api/presence/check", self._presence)
+        app.router.add_post("/agent-events", self._webhook)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if not self.port:
+            self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
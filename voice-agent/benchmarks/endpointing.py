@@ -0,0 +1,206 @@
+"""Compare local end-of-turn detection with the STT provider's endpointing on recorded audio.
+
+Each recording is a 16 kHz, 16-bit mono WAV file of one user turn, with a JSON sidecar of
+the same name:
+
+    {"transcript": "Create a task to review the report.",
+     "words": [[0.42, "Create"], [0.61, "a"], ...],
+     "provider_final_at": 2.91}
+
+``words`` (end time of each word, optional) tells what the interim transcript was at any
+point; without it the words are spread evenly over the detected speech. ``provider_final_at``
+is when the provider's final transcript arrived, in seconds from the start of the
+recording, e.g. taken from a Deepgram session log. Without it, ``--provider-endpointing``
+seconds after the end of speech are assumed.
+
+The local VAD runs over each recording (``ENDPOINTING_MIN_SILENCE`` applies), and at every
+end of speech the worker's turn model scores the interim transcript, as ``TurnEndpointer``
+does. The report compares the time from the end of speech to the end-of-turn decision,
+counts decisions taken before the user had finished (``premature``), and measures turn
+model batching with ``--sessions`` concurrent sessions.
+
+Usage (from the ``voice-agent`` directory):
+
+    python -m benchmarks.endpointing recordings/ --sessions 20 --output endpointing.json
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import statistics
+import time
+import wave
+from livekit import rtc
+from livekit.agents import vad as lk_vad
+from endpointing import (
+    EndOfTurnModel,
+    load_vad,
+    load_turn_detector,
+    ENDPOINTING_EOT_THRESHOLD,
+)
+
+FRAME_MS = 20
+
+
+def read_recording(path: str):
+    with wave.open(path, "rb") as wav:
+        if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit mono audio")
+        return wav.getframerate(), wav.readframes(wav.getnframes())
+
+
+def read_sidecar(path: str) -> dict:
+    sidecar = os.path.splitext(path)[0] + ".json"
+    if not os.path.exists(sidecar):
+        return {}
+    with open(sidecar) as f:
+        return json.load(f)
+
+
+async def speech_segments(vad, sample_rate: int, pcm: bytes) -> list:
+    """``(start, end, reported_at)`` of each speech segment, in seconds from the start of the audio."""
+    samples_per_frame = sample_rate * FRAME_MS // 1000
+    stream = vad.stream()
+    for offset in range(0, len(pcm) - samples_per_frame * 2 + 1, samples_per_frame * 2):
+        stream.push_frame(rtc.AudioFrame(
+            data=pcm[offset:offset + samples_per_frame * 2],
+            sample_rate=sample_rate,
+            num_channels=1,
+            samples_per_channel=samples_per_frame,
+        ))
+    stream.end_input()
+    segments = []
+    start = None
+    async for event in stream:
+        at = event.samples_index / sample_rate
+        if event.type == lk_vad.VADEventType.START_OF_SPEECH:
+            start = at - event.speech_duration
+        elif event.type == lk_vad.VADEventType.END_OF_SPEECH and start is not None:
+            segments.append((start, at - event.silence_duration, at))
+            start = None
+    await stream.aclose()
+    return segments
+
+
+def interim_at(sidecar: dict, segments: list, at: float) -> str:
+    """The words spoken by ``at``."""
+    if sidecar.get("words"):
+        return " ".join(word for end, word in sidecar["words"] if end <= at + 1e-3)
+    words = sidecar.get("transcript", "").split()
+    spoken = sum(max(0.0, min(end, at) - start) for start, end, _ in segments)
+    total = sum(end - start for start, end, _ in segments) or 1.0
+    count = len(words) if at >= segments[-1][1] else int(len(words) * spoken / total)
+    return " ".join(words[:count])
+
+
+async def evaluate(model: EndOfTurnModel, vad, path: str, args) -> dict:
+    sample_rate, pcm = read_recording(path)
+    sidecar = read_sidecar(path)
+    segments = await speech_segments(vad, sample_rate, pcm)
+    result = {"recording": os.path.basename(path), "segments": len(segments)}
+    if not segments:
+        return result
+    speech_end = segments[-1][1]
+    provider_at = sidecar.get("provider_final_at", speech_end + args.provider_endpointing)
+    result["provider_seconds"] = round(provider_at - speech_end, 4)
+
+    # Replay what TurnEndpointer does at each end of speech
+    result["premature"] = 0
+    for _, end, reported_at in segments:
+        text = interim_at(sidecar, segments, end)
+        started = time.perf_counter()
+        probability = await model.predict([], text)
+        decided_at = reported_at + (time.perf_counter() - started)
+        if probability < args.threshold:
+            continue
+        if end < speech_end:
+            result["premature"] += 1  # the user would have been cut off mid-turn
+            continue
+        if decided_at < provider_at:
+            result["local_seconds"] = round(decided_at - speech_end, 4)
+        break
+    result["endpoint_seconds"] = result.get("local_seconds", result["provider_seconds"])
+    return result
+
+
+async def measure_batching(model: EndOfTurnModel, texts: list, sessions: int) -> dict:
+    """Score one end-of-turn prediction per session at once, as a busy worker would."""
+    batches_before = model.batches
+    latencies = []
+
+    async def one(text):
+        started = time.perf_counter()
+        await model.predict([], text)
+        latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(texts[i % len(texts)]) for i in range(sessions)))
+    return {
+        "sessions": sessions,
+        "batches": model.batches - batches_before,
+        "prediction_seconds": _summary(latencies),
+    }
+
+
+def _summary(values: list) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    return {
+        "median": round(statistics.median(ordered), 4),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+async def run(args) -> dict:
+    paths = sorted(glob.glob(os.path.join(args.recordings, "*.wav")))
+    if not paths:
+        raise SystemExit(f"No .wav recordings in {args.recordings}")
+    vad = load_vad()
+    if vad is None:
+        raise SystemExit("The local VAD (livekit-plugins-silero) is required for this benchmark")
+    model = EndOfTurnModel(load_turn_detector())
+    try:
+        results = [await evaluate(model, vad, path, args) for path in paths]
+        texts = [read_sidecar(path).get("transcript") or "okay" for path in paths]
+        batching = await measure_batching(model, texts, args.sessions)
+    finally:
+        await model.aclose()
+
+    scored = [r for r in results if "provider_seconds" in r]
+    local = [r["local_seconds"] for r in scored if "local_seconds" in r]
+    return {
+        "recordings": len(results),
+        "turn_model": type(model.detector).__name__ if model.detector is not None else "lexical",
+        "threshold": args.threshold,
+        "provider_endpointing_seconds": _summary([r["provider_seconds"] for r in scored]),
+        "local_endpointing_seconds": _summary(local),
+        "endpoint_seconds": _summary([r["endpoint_seconds"] for r in scored]),
+        "saved_seconds": _summary([r["provider_seconds"] - r["endpoint_seconds"] for r in scored]),
+        "local_decisions": len(local),
+        "premature_decisions": sum(r["premature"] for r in scored),
+        "batching": batching,
+        "per_recording": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local vs provider endpointing on recorded audio")
+    parser.add_argument("recordings", help="directory of 16 kHz mono WAV files with JSON sidecars")
+    parser.add_argument("--provider-endpointing", type=float, default=0.7, help="provider delay after the end of speech, seconds, where a sidecar has no provider_final_at")
+    parser.add_argument("--threshold", type=float, default=ENDPOINTING_EOT_THRESHOLD, help="end-of-turn probability needed to end the turn locally")
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent sessions for the batching measurement")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""Scripted stand-ins for the STT, LLM and TTS plugins and the LiveKit session used by the load test.
+
+They mimic the small surface of the LiveKit interfaces that ``main_agent`` touches, with
+configurable latencies and token rates, so a worker can be exercised without paying for
+Deepgram, OpenAI or ElevenLabs.
+"""
+import asyncio
+import random
+from types import SimpleNamespace
+import numpy as np
+from livekit import rtc
+from livekit.agents import stt as lk_stt, llm as lk_llm, vad as lk_vad
+
+RESPONSE_TEXT = (
+    "Sure, I can help with that. I looked at your workspace and found three open tasks "
+    "that match your request. The first one is due tomorrow, and the other two are due "
+    "next week. Would you like me to create a reminder for the first one?"
+)
+
+UTTERANCES = [
+    "What's on my calendar for tomorrow?",
+    "Create an Asana task to review the quarterly report.",
+    "What does our onboarding guide say about laptop setup?",
+    "Thanks, that's all for now.",
+]
+
+
+class StageStats:
+    """Counters shared by all fake plugins in one benchmark run."""
+
+    def __init__(self):
+        self.stt_utterances = 0
+        self.llm_requests = 0
+        self.llm_tokens = 0
+        self.tts_requests = 0
+        self.tts_characters = 0
+        self.tool_calls = 0
+        self.cached_phrases_played = 0
+
+
+class FakeSTT:
+    """Emits scripted final transcripts with a think time between user turns.
+
+    With ``words_per_second`` set, each utterance is first streamed as growing interim
+    transcripts at that speaking rate, while the session's microphone audio
+    (``fake_user_audio``) carries speech. The final transcript follows the end of speech
+    after ``endpointing`` seconds, the provider's endpointing delay. The think time starts
+    once the agent has finished speaking, except on a ``barge_in_rate`` share of turns,
+    where the user talks over it.
+    """
+
+    def __init__(self, stats: StageStats, turns=5, think_time=1.0, jitter=0.25, words_per_second=0.0,
+                 barge_in_rate=0.0, endpointing=0.0):
+        self.stats = stats
+        self.turns = turns
+        self.think_time = think_time
+        self.jitter = jitter
+        self.words_per_second = words_per_second
+        self.barge_in_rate = barge_in_rate
+        self.endpointing = endpointing
+
+    async def stream(self, session=None):
+        return self._events(session)
+
+    async def _events(self, session):
+        for turn in range(self.turns):
+            if turn and session is not None and random.random() >= self.barge_in_rate:
+                await session.tts.wait_until_idle(turns_started=turn)
+            await asyncio.sleep(self.think_time * random.uniform(1 - self.jitter, 1 + self.jitter))
+            utterance = UTTERANCES[turn % len(UTTERANCES)]
+            if self.words_per_second:
+                if session is not None:
+                    session.user_speaking = True
+                words = utterance.split(" ")
+                for count in range(1, len(words) + 1):
+                    yield SimpleNamespace(
+                        type=lk_stt.SpeechDataEvent.INTERIM_TRANSCRIPT,
+                        alternatives=[SimpleNamespace(text=" ".join(words[:count]))],
+                    )
+                    await asyncio.sleep(1 / self.words_per_second)
+                if session is not None:
+                    session.user_speaking = False
+            if self.endpointing:
+                await asyncio.sleep(self.endpointing)
+            self.stats.stt_utterances += 1
+            yield SimpleNamespace(
+                type=lk_stt.SpeechDataEvent.FINAL_TRANSCRIPT,
+                alternatives=[SimpleNamespace(text=utterance)],
+            )
+
+
+MIC_SAMPLE_RATE = 16000
+MIC_FRAME_MS = 10  # LiveKit delivers microphone audio in 10 ms frames
+
+
+class FakeVAD:
+    """Energy-based stand-in for the Silero VAD: any non-silent frame is speech, and the end
+    of speech is reported after ``min_silence`` seconds of silent frames. Like Silero, it
+    reports ``INFERENCE_DONE`` with the samples processed so far after each frame."""
+
+    def __init__(self, min_silence=0.2):
+        self.min_silence = min_silence
+
+    def stream(self):
+        return _FakeVADStream(self.min_silence)
+
+
+class _FakeVADStream:
+    def __init__(self, min_silence):
+        self.min_silence = min_silence
+        self._events = asyncio.Queue()
+        self._speaking = False
+        self._silence = 0.0
+        self._samples = 0
+
+    def push_frame(self, frame):
+        self._samples += frame.samples_per_channel
+        if np.frombuffer(frame.data, dtype=np.int16).any():
+            self._silence = 0.0
+            if not self._speaking:
+                self._speaking = True
+                self._events.put_nowait(SimpleNamespace(type=lk_vad.VADEventType.START_OF_SPEECH))
+        elif self._speaking:
+            self._silence += frame.samples_per_channel / frame.sample_rate
+            if self._silence >= self.min_silence:
+                self._speaking = False
+                self._events.put_nowait(SimpleNamespace(type=lk_vad.VADEventType.END_OF_SPEECH))
+        self._events.put_nowait(SimpleNamespace(type=lk_vad.VADEventType.INFERENCE_DONE, samples_index=self._samples))
+
+    def end_input(self):
+        self._events.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self._events.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    async def aclose(self):
+        pass
+
+
+async def fake_user_audio(session):
+    """Stands in for ``endpointing.user_audio_frames``: real-time microphone frames that
+    carry a tone while ``FakeSTT`` has the user speaking and silence otherwise."""
+    samples = MIC_SAMPLE_RATE * MIC_FRAME_MS // 1000
+    tone = (3000 * np.sin(np.arange(samples) * 2 * np.pi * 220 / MIC_SAMPLE_RATE)).astype(np.int16)
+    speech = rtc.AudioFrame(data=tone.tobytes(), sample_rate=MIC_SAMPLE_RATE, num_channels=1, samples_per_channel=samples)
+    silence = rtc.AudioFrame(data=bytes(samples * 2), sample_rate=MIC_SAMPLE_RATE, num_channels=1, samples_per_channel=samples)
+    loop = asyncio.get_running_loop()
+    next_frame_at = loop.time()
+    while True:
+        yield speech if session.user_speaking else silence
+        next_frame_at += MIC_FRAME_MS / 1000
+        await asyncio.sleep(max(0.0, next_frame_at - loop.time()))
+
+
+class FakeLLM:
+    """Streams a scripted response at a configurable time-to-first-token and token rate.
+
+    Every ``tool_every``-th request first calls one of the registered tools, so the backend
+    stand-in sees realistic tool traffic. A ``repeat_action_rate`` share of Pipedream actions
+    is called a second time with the same parameters, as an LLM sometimes does.
+    """
+
+    def __init__(self, stats: StageStats, ttft=0.35, tokens_per_second=60.0, tool_every=2, user_identity="bench-user",
+                 repeat_action_rate=0.0):
+        self.stats = stats
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.tool_every = tool_every
+        self.user_identity = user_identity
+        self.repeat_action_rate = repeat_action_rate
+        self.tools = []
+
+    async def chat(self, history):
+        self.stats.llm_requests += 1
+        return self._stream(self.stats.llm_requests, history)
+
+    async def _stream(self, request_number, history):
+        if self.tools and self.tool_every and request_number % self.tool_every == 0:
+            await self._call_tool(request_number)
+        await asyncio.sleep(self.ttft)
+        tokens = RESPONSE_TEXT.split(" ")
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            self.stats.llm_tokens += 1
+            yield SimpleNamespace(
+                type=lk_llm.LLMChunkEvent.CHUNK,
+                text=token if i == len(tokens) - 1 else token + " ",
+            )
+
+    async def _call_tool(self, request_number):
+        tool = self.tools[(request_number // self.tool_every) % len(self.tools)]
+        ctx = SimpleNamespace(
+            job=SimpleNamespace(participant=SimpleNamespace(identity=self.user_identity)),
+            metadata={"user_id": self.user_identity},
+        )
+        self.stats.tool_calls += 1
+        if tool.name == "query_knowledge_base":
+            await tool.arun(ctx, query_text=UTTERANCES[2], kb_type="organization")
+        else:
+            parameters = {"name": f"Review report {request_number}", "project": "Benchmarks"}
+            await tool.arun(ctx, action_type="create_asana_task", parameters=parameters)
+            if random.random() < self.repeat_action_rate:
+                self.stats.tool_calls += 1
+                # Same action; key order and whitespace differ, as they do between LLM calls
+                await tool.arun(ctx, action_type="create_asana_task", parameters={
+                    "project": "Benchmarks", "name": f" Review report {request_number}",
+                })
+
+
+class FakeSynthesizeStream:
+    """Drop-in for ``lk_tts.SynthesizeStream`` that counts each pushed chunk as one TTS request."""
+
+    stats = None
+
+    def __init__(self):
+        self.pushed = []
+        self.finished = asyncio.Event()
+        self.closed = False
+
+    def push_text(self, text):
+        self.pushed.append(text)
+        if self.stats is not None:
+            self.stats.tts_requests += 1
+            self.stats.tts_characters += len(text)
+
+    def mark_segment_end(self):
+        self.finished.set()
+
+    async def aclose(self):
+        self.closed = True
+        self.finished.set()
+
+
+class FakeTTS:
+    """Synthesizes by sleeping for a first-byte latency plus a per-character cost.
+
+    ``synthesize`` returns the audio as an async iterable of 20 ms silent 16 kHz frames, so
+    the phrase audio cache can be warmed from it.
+    """
+
+    sample_rate = 16000
+
+    def __init__(self, stats: StageStats, first_byte=0.15, chars_per_second=900.0, speech_chars_per_second=15.0):
+        self.stats = stats
+        self.first_byte = first_byte
+        self.chars_per_second = chars_per_second
+        self.speech_chars_per_second = speech_chars_per_second
+
+    async def synthesize(self, text):
+        self.stats.tts_requests += 1
+        self.stats.tts_characters += len(text)
+        await asyncio.sleep(self.first_byte + len(text) / self.chars_per_second)
+        return self._frames(len(text) / self.speech_chars_per_second)
+
+    async def _frames(self, seconds):
+        samples = self.sample_rate // 50
+        for _ in range(max(1, int(seconds * 50))):
+            yield SimpleNamespace(frame=SimpleNamespace(
+                data=bytes(samples * 2),
+                sample_rate=self.sample_rate,
+                num_channels=1,
+                samples_per_channel=samples,
+            ))
+
+    async def play(self, stream):
+        pass
+
+
+class _SessionSTT:
+    """Per-session view of the shared FakeSTT, so its script can follow this session's playback."""
+
+    def __init__(self, stt: FakeSTT, session):
+        self._stt = stt
+        self._session = session
+
+    async def stream(self):
+        return await self._stt.stream(self._session)
+
+
+class _SessionTTS:
+    """Per-session view of the shared FakeTTS that tracks the responses played in this session."""
+
+    def __init__(self, tts: FakeTTS, idle_timeout=30.0):
+        self._tts = tts
+        self.idle_timeout = idle_timeout
+        self.streams_played = 0
+        self._current = None
+        self._played = asyncio.Event()
+
+    async def synthesize(self, text):
+        return await self._tts.synthesize(text)
+
+    async def play(self, stream):
+        self.streams_played += 1
+        self._current = stream
+        self._played.set()
+        await self._tts.play(stream)
+
+    async def wait_until_idle(self, turns_started: int):
+        """Wait for the response to user turn ``turns_started`` to start and finish playing."""
+        async def idle():
+            while self.streams_played < turns_started:
+                self._played.clear()
+                await self._played.wait()
+            await self._current.finished.wait()
+
+        try:
+            await asyncio.wait_for(idle(), timeout=self.idle_timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class FakeAgentSession:
+    """Accepts the same keyword arguments as ``AgentSession`` and records data messages."""
+
+    def __init__(self, agent=None, room=None, participant=None, stt=None, llm=None, tts=None, **kwargs):
+        self.agent = agent
+        self.room = room
+        self.participant = participant
+        self.stt = _SessionSTT(stt, self) if isinstance(stt, FakeSTT) else stt
+        self.llm = llm
+        self.tts = _SessionTTS(tts) if isinstance(tts, FakeTTS) else tts
+        self.user_speaking = False  # whether fake_user_audio carries speech
+        self.data_messages = 0
+        self.closed = False
+
+    async def send_data(self, data):
+        self.data_messages += 1
+
+    async def say(self, text, audio=None):
+        """Plays pre-synthesized ``audio`` frames, as the agent does for cached phrases."""
+        async for _ in audio:
+            pass
+        if isinstance(self.tts, _SessionTTS):
+            self.tts._tts.stats.cached_phrases_played += 1
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeJob:
+    """A minimal JobContext stand-in for session ``index``."""
+
+    def __init__(self, index: int):
+        self.id = f"bench-job-{index}"
+        self.type = None
+        self.room = SimpleNamespace(name=f"bench-room-{index}")
+        self.participant = SimpleNamespace(identity=f"bench-user-{index}")
+        self.rejected = False
+
+    async def reject(self):
+        self.rejected = True
+
+
+def fake_job(index: int):
+    return FakeJob(index)
+
@@ -0,0 +1,291 @@
+"""Offline load test for the Jarvis agent worker.
+
+Spins up N simulated sessions through ``request_fnc`` and ``JarvisAgent.process_job`` against scripted STT/LLM/TTS
+plugins and a local stand-in for the Optiflow backend, then reports throughput, per-stage
+latency percentiles, event-loop lag and RSS.
+
+Run from the ``voice-agent`` directory:
+
+    python -m benchmarks.load_test --sessions 100 --turns 5 --output bench.json
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import resource
+import socket
+import tempfile
+import time
+from benchmarks.backend_stub import BackendStub
+from benchmarks.fakes import (
+    StageStats,
+    FakeSTT,
+    FakeLLM,
+    FakeTTS,
+    FakeSynthesizeStream,
+    FakeAgentSession,
+    FakeVAD,
+    fake_user_audio,
+    fake_job,
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_mb() -> float:
+    """Current resident set size, falling back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic ``asyncio.sleep`` wakes up, i.e. event-loop lag."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+def _latency_summary(values, percentile) -> dict:
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 1),
+        "p95_ms": round(percentile(values, 95) * 1000, 1),
+        "p99_ms": round(percentile(values, 99) * 1000, 1),
+        "max_ms": round(max(values) * 1000, 1) if values else 0.0,
+    }
+
+
+async def run(args) -> dict:
+    backend = BackendStub(
+        port=_free_port(),
+        pipedream_latency=args.pipedream_latency,
+        search_latency=args.search_latency,
+        error_rate=args.backend_error_rate,
+        slow_rate=args.backend_slow_rate,
+        dedupe_actions=args.backend_dedupe,
+    )
+    await backend.start()
+
+    # main_agent reads its configuration at import time, so point it at the stand-in first.
+    # Empty provider keys keep the real plugins from being used.
+    os.environ.update({
+        "OPTIFLOW_BACKEND_URL": backend.url,
+        "OPTIFLOW_BACKEND_API_KEY": "benchmark",
+        "AGENT_EVENT_WEBHOOK_URL": backend.webhook_url,
+        "OPENAI_API_KEY": "",
+        "DEEPGRAM_API_KEY": "",
+        "ELEVENLABS_API_KEY": "",
+        "PHRASE_CACHE_DIR": os.environ.get("PHRASE_CACHE_DIR") or tempfile.mkdtemp(prefix="phrase-cache-"),
+        "SESSION_CHECKPOINT_PATH": os.environ.get("SESSION_CHECKPOINT_PATH") or os.path.join(tempfile.mkdtemp(prefix="session-state-"), "session_state.db"),
+        # Admit every simulated session unless a per-process cap is being tested
+        "WORKER_MAX_SESSIONS": os.environ.get("WORKER_MAX_SESSIONS") or str(args.sessions * 2),
+    })
+    main_agent = importlib.import_module("main_agent")
+    from metrics import percentile, registry
+
+    stats = StageStats()
+    FakeSynthesizeStream.stats = stats
+    main_agent.lk_tts.SynthesizeStream = FakeSynthesizeStream
+    main_agent.AgentSession = FakeAgentSession
+    main_agent.user_audio_frames = fake_user_audio
+
+    session_metrics = []
+
+    class CollectingSessionMetrics(main_agent.SessionMetrics):
+        def __init__(self, *a, **kw):
+            super().__init__(*a, **kw)
+            session_metrics.append(self)
+
+    main_agent.SessionMetrics = CollectingSessionMetrics
+
+    audio_buffers = []
+
+    class CollectingAudioRingBuffer(main_agent.AudioRingBuffer):
+        def __init__(self, *a, **kw):
+            super().__init__(*a, **kw)
+            audio_buffers.append(self)
+
+    main_agent.AudioRingBuffer = CollectingAudioRingBuffer
+
+    # One shared set of fake plugins, installed as the worker's prewarmed resources
+    main_agent._worker_resources = main_agent.WorkerResources(
+        stt_plugin=FakeSTT(
+            stats,
+            turns=args.turns,
+            think_time=args.think_time,
+            words_per_second=args.words_per_second,
+            barge_in_rate=args.barge_in_rate,
+            endpointing=args.provider_endpointing,
+        ),
+        llm_plugin=FakeLLM(
+            stats,
+            ttft=args.llm_ttft,
+            tokens_per_second=args.tokens_per_second,
+            tool_every=args.tool_every,
+            repeat_action_rate=args.repeat_action_rate,
+        ),
+        tts_plugin=FakeTTS(stats, first_byte=args.tts_first_byte),
+        pipedream_tool=main_agent.PipedreamActionTool(),
+        kb_tool=main_agent.KnowledgeBaseQueryTool(backend_url=backend.url, backend_api_key="benchmark"),
+        fast_llm_plugin=FakeLLM(
+            stats,
+            ttft=args.fast_llm_ttft,
+            tokens_per_second=args.fast_tokens_per_second,
+            tool_every=args.fast_tool_every,
+        ) if args.fast_llm_ttft > 0 else None,
+        vad=FakeVAD(min_silence=args.vad_silence) if args.vad_silence > 0 else None,
+        turn_model=main_agent.EndOfTurnModel(),
+    )
+
+    # Warm the phrase audio cache up front, as a long-running worker would have
+    phrase_warmup = main_agent._worker_resources.start_phrase_warmup()
+    if phrase_warmup is not None:
+        await phrase_warmup
+
+    async def run_session(index: int):
+        await asyncio.sleep(args.ramp * index / max(args.sessions, 1))
+        job = fake_job(index)
+        job.type = main_agent.JobType.JT_AGENT
+        await main_agent.request_fnc(job)
+
+    lag = LoopLagMonitor()
+    rss_before = rss_mb()
+    lag.start()
+    started = time.perf_counter()
+    await asyncio.gather(*[run_session(i) for i in range(args.sessions)])
+    elapsed = time.perf_counter() - started
+    await lag.stop()
+    rss_after = rss_mb()
+
+    await main_agent.shutdown_worker()
+    await backend.stop()
+
+    stages = {}
+    for metrics in session_metrics:
+        for name, values in metrics.samples.items():
+            stages.setdefault(name, []).extend(values)
+    turns = sum(metrics.turns for metrics in session_metrics)
+    interrupted = sum(metrics.interrupted for metrics in session_metrics)
+
+    return {
+        "config": vars(args),
+        "sessions": args.sessions,
+        "turns": turns,
+        "interrupted_turns": interrupted,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_turns_per_second": round(turns / elapsed, 2) if elapsed else 0.0,
+        "latency": {name: _latency_summary(values, percentile) for name, values in sorted(stages.items())},
+        "event_loop_lag": _latency_summary(lag.samples, percentile),
+        "job_setup": registry.snapshot()["voice_job_setup_seconds"],
+        "admission": main_agent.worker_load.stats(),
+        "session_store": main_agent.session_store.stats(),
+        "kb_prefetch": main_agent.prefetch_stats.stats(),
+        "barge_in": {
+            name: registry.snapshot()[name]
+            for name in ("voice_barge_in_tts_chars_saved_total", "voice_barge_in_history_tokens_saved_total")
+        },
+        "kb_tokens_trimmed": registry.snapshot()["voice_kb_tokens_trimmed_total"],
+        "llm_tiers": {
+            name: registry.snapshot()[name]
+            for name in (
+                "voice_llm_tier_turns_total",
+                "voice_llm_tier_escalations_total",
+                "voice_llm_tier_first_token_seconds",
+            )
+        },
+        "endpointing": {
+            name: registry.snapshot()[name]
+            for name in (
+                "voice_endpointing_turns_total",
+                "voice_endpointing_corrections_total",
+                "voice_endpointing_lead_seconds",
+            )
+        },
+        "turn_model": main_agent._worker_resources.turn_model.stats(),
+        "audio_buffers": {
+            "sessions": len(audio_buffers),
+            "allocated_bytes_per_session": max((b.allocated_bytes for b in audio_buffers), default=0),
+            "frames_written": sum(b.frames_written for b in audio_buffers),
+            "frames_dropped": sum(b.frames_dropped for b in audio_buffers),
+            "max_queued_ms": max((b.max_queued * b.frame_ms for b in audio_buffers), default=0),
+        },
+        "rss_mb": {"before": round(rss_before, 1), "after": round(rss_after, 1)},
+        "backend_requests": backend.requests,
+        "backend_injected_errors": backend.injected_errors,
+        "pipedream_actions": dict(
+            main_agent.action_cache.stats(),
+            executed_by_backend=backend.actions_executed,
+            idempotent_replays=backend.idempotent_replays,
+            duplicate_actions=backend.duplicate_actions,
+        ),
+        "backend_client": main_agent.backend_stats(),
+        "providers": vars(stats),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test for the Jarvis agent worker")
+    parser.add_argument("--sessions", type=int, default=50, help="concurrent simulated sessions")
+    parser.add_argument("--turns", type=int, default=5, help="user turns per session")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which sessions are started")
+    parser.add_argument("--think-time", type=float, default=1.0, help="seconds between user turns")
+    parser.add_argument("--words-per-second", type=float, default=0.0, help="stream interim transcripts at this speaking rate (0 sends finals only)")
+    parser.add_argument("--provider-endpointing", type=float, default=0.0, help="seconds from the end of speech to the STT's final transcript")
+    parser.add_argument("--vad-silence", type=float, default=0.0, help="silence before the local VAD reports end of speech, seconds (0 disables local endpointing; needs --words-per-second)")
+    parser.add_argument("--barge-in-rate", type=float, default=0.0, help="share of turns where the user talks over the agent")
+    parser.add_argument("--llm-ttft", type=float, default=0.35, help="LLM time to first token, seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0, help="LLM token rate")
+    parser.add_argument("--fast-llm-ttft", type=float, default=0.15, help="fast-tier LLM time to first token, seconds (0 disables the router)")
+    parser.add_argument("--fast-tokens-per-second", type=float, default=120.0, help="fast-tier LLM token rate")
+    parser.add_argument("--fast-tool-every", type=int, default=0, help="the fast-tier LLM asks for a tool on every Nth request, forcing an escalation (0 never)")
+    parser.add_argument("--tool-every", type=int, default=2, help="call a tool on every Nth LLM request (0 disables)")
+    parser.add_argument("--repeat-action-rate", type=float, default=0.0, help="share of Pipedream actions the LLM calls twice with the same parameters")
+    parser.add_argument("--tts-first-byte", type=float, default=0.15, help="TTS first-byte latency, seconds")
+    parser.add_argument("--pipedream-latency", type=float, default=0.4, help="backend Pipedream latency, seconds")
+    parser.add_argument("--search-latency", type=float, default=0.25, help="backend search latency, seconds")
+    parser.add_argument("--backend-dedupe", action="store_true", help="have the backend stand-in deduplicate Pipedream actions on Idempotency-Key")
+    parser.add_argument("--backend-error-rate", type=float, default=0.0, help="share of search/Pipedream requests that fail with a 503")
+    parser.add_argument("--backend-slow-rate", type=float, default=0.0, help="share of search/Pipedream requests that take 10x longer")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Event-loop lag with logging on: synchronous file handler versus the queue-based writer.
+
+Simulates N sessions that each log a transcript-sized line every ``--interval`` seconds, the
+way ``main_agent`` logs user utterances and assistant responses, and measures how late a
+periodic ``asyncio.sleep`` wakes up. Each mode runs in turn against a temporary log file:
+
+- ``off``: no handlers, the baseline
+- ``sync``: records are formatted and written on the event-loop thread (the previous setup)
+- ``queue``: records are enqueued and written by the background listener thread
+
+Run from the ``voice-agent`` directory:
+
+    python -m benchmarks.logging_lag --sessions 200 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+import logging_setup
+from benchmarks.load_test import LoopLagMonitor, _latency_summary
+from metrics import percentile
+
+logger = logging.getLogger("benchmarks.logging_lag")
+
+TRANSCRIPT = (
+    "Sure, I can help with that. I looked at your workspace and found three open tasks "
+    "that match your request, and the first one is due tomorrow. "
+) * 3
+
+
+async def _session(index: int, args, deadline: float, counter: list):
+    logging_setup.set_log_context(session_id=f"bench-job-{index}", room_id=f"bench-room-{index}")
+    await asyncio.sleep(args.interval * index / max(args.sessions, 1))
+    turn = 0
+    while time.perf_counter() < deadline:
+        turn += 1
+        logging_setup.set_log_context(turn_id=turn)
+        logger.info("User said: %s", TRANSCRIPT, extra={"transcript": True})
+        logger.info("PipedreamTool called: action_type=%s, params=%s", "create_asana_task", {"name": "Review report", "turn": turn})
+        counter[0] += 2
+        await asyncio.sleep(args.interval)
+
+
+async def run_mode(mode: str, args, log_dir: str) -> dict:
+    log_file = os.path.join(log_dir, f"{mode}.log")
+    if mode == "off":
+        logging.getLogger().handlers.clear()
+    else:
+        logging_setup.configure_logging(
+            mode=mode,
+            log_format=args.format,
+            log_file=log_file,
+            console=False,
+            transcript_rate=args.transcript_rate,
+        )
+
+    counter = [0]
+    lag = LoopLagMonitor(interval=0.01)
+    lag.start()
+    deadline = time.perf_counter() + args.duration
+    await asyncio.gather(*[_session(i, args, deadline, counter) for i in range(args.sessions)])
+    await lag.stop()
+
+    stats = logging_setup.logging_stats() if mode != "off" else {}
+    flush_started = time.perf_counter()
+    logging_setup.stop_logging()
+    flush_seconds = time.perf_counter() - flush_started
+    written = os.path.getsize(log_file) if os.path.exists(log_file) else 0
+    return {
+        "records_logged": counter[0],
+        "records_dropped": stats.get("dropped", 0),
+        "transcripts_suppressed": stats.get("transcripts_suppressed", 0),
+        "bytes_written": written,
+        "shutdown_flush_ms": round(flush_seconds * 1000, 1),
+        "event_loop_lag": _latency_summary(lag.samples, percentile),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Event-loop lag with synchronous vs queue-based logging")
+    parser.add_argument("--sessions", type=int, default=200, help="concurrent simulated sessions")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per mode")
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between log lines per session")
+    parser.add_argument("--format", choices=["text", "json"], default="json", help="log record format")
+    parser.add_argument("--transcript-rate", type=float, default=0, help="transcript lines per second, 0 disables the limit")
+    parser.add_argument("--modes", default="off,sync,queue", help="comma-separated modes to compare")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+async def run(args) -> dict:
+    report = {"config": vars(args), "modes": {}}
+    with tempfile.TemporaryDirectory() as log_dir:
+        for mode in args.modes.split(","):
+            report["modes"][mode] = await run_mode(mode, args, log_dir)
+    return report
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
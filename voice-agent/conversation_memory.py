@@ -0,0 +1,185 @@
+import asyncio
+import contextvars
+import os
+import logging
+from collections import deque
+from livekit.agents import llm as lk_llm
+from tokens import estimate_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "3000"))
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "300"))
+CHAT_SUMMARY_MODEL = os.getenv("CHAT_SUMMARY_MODEL", "gpt-4o-mini")
+TOOL_OUTPUT_MAX_TOKENS = int(os.getenv("TOOL_OUTPUT_MAX_TOKENS", "600"))
+
+SUMMARY_PROMPT = (
+    "You maintain the running summary of a voice conversation between a user and Jarvis, "
+    "an AI assistant. Merge the existing summary with the new turns into one concise summary. "
+    "Keep names, decisions, open requests and results of actions; drop small talk. "
+    f"Answer with the summary only, in at most {CHAT_SUMMARY_MAX_TOKENS} tokens."
+)
+
+# Lets tools running inside a session's task tree record their output in that session's history
+current_memory = contextvars.ContextVar("current_memory", default=None)
+
+
+def remember_tool_result(name: str, output: str) -> str:
+    """Record ``output`` in the current session's history (trimmed) and return it unchanged."""
+    memory = current_memory.get()
+    if memory is not None:
+        memory.add_tool_result(name, output)
+    return output
+
+
+class ConversationMemory:
+    """Token-budgeted chat history for one session.
+
+    The system prompt is always kept. The most recent turns are kept verbatim as long as they
+    fit in ``token_budget``; older turns are folded into a running summary by a background
+    task so the per-turn prompt size stays roughly constant.
+    """
+
+    def __init__(self, system_prompt: str, summarizer_llm=None, token_budget=CHAT_HISTORY_TOKEN_BUDGET):
+        self.system_message = lk_llm.ChatMessage(role=lk_llm.ChatRole.SYSTEM, content=system_prompt)
+        self.summarizer_llm = summarizer_llm
+        self.token_budget = token_budget
+        self.summary = ""
+        self._recent = deque()  # (ChatMessage, token count)
+        self._recent_tokens = 0
+        self.appended = 0  # messages ever appended; a message's sequence number is its index in that count
+        self._pending = []  # turns waiting to be folded into the summary
+        self._summary_task = None
+
+    def add_user(self, text: str):
+        self._append(lk_llm.ChatMessage(role=lk_llm.ChatRole.USER, content=text))
+
+    def add_assistant(self, text: str):
+        self._append(lk_llm.ChatMessage(role=lk_llm.ChatRole.ASSISTANT, content=text))
+
+    def add_tool_result(self, name: str, output: str):
+        """Record a tool output, trimmed so one large result cannot take over the budget."""
+        trimmed = truncate_to_tokens(output, TOOL_OUTPUT_MAX_TOKENS)
+        self._append(lk_llm.ChatMessage(role=lk_llm.ChatRole.ASSISTANT, content=f"[{name} result] {trimmed}"))
+
+    def messages(self, retrieved_context: str = None) -> list:
+        """Chat history to send to the LLM: system prompt, running summary, then recent turns.
+
+        ``retrieved_context`` (e.g. prefetched knowledge base results) is added for this request
+        only, just before the latest user message, and is not kept in the history.
+        """
+        history = [self.system_message]
+        if self.summary:
+            history.append(lk_llm.ChatMessage(
+                role=lk_llm.ChatRole.SYSTEM,
+                content=f"Summary of the earlier conversation: {self.summary}"
+            ))
+        history.extend(message for message, _ in self._recent)
+        if retrieved_context:
+            history.insert(len(history) - 1, lk_llm.ChatMessage(
+                role=lk_llm.ChatRole.SYSTEM,
+                content=(
+                    "Knowledge base results retrieved for the user's next message; use them if relevant "
+                    f"instead of querying the knowledge base again: {truncate_to_tokens(retrieved_context, TOOL_OUTPUT_MAX_TOKENS)}"
+                )
+            ))
+        return history
+
+    def token_count(self) -> int:
+        return (
+            estimate_tokens(self.system_message.content)
+            + estimate_tokens(self.summary)
+            + self._recent_tokens
+        )
+
+    def _append(self, message):
+        tokens = estimate_tokens(message.content)
+        self._recent.append((message, tokens))
+        self._recent_tokens += tokens
+        self.appended += 1
+        self._compact()
+
+    def rollback(self, seq: int):
+        """Drop the messages numbered ``seq`` or later, e.g. a turn started on an interim
+        transcript that the final transcript then corrected. Messages already folded into the
+        summary stay there."""
+        while self._recent and self.appended > seq:
+            _, tokens = self._recent.pop()
+            self._recent_tokens -= tokens
+            self.appended -= 1
+
+    def checkpoint_state(self, since: int = 0):
+        """(summary, first_seq, [(seq, role, content), ...]) for the recent messages numbered ``since`` or later.
+
+        ``first_seq`` is the sequence number of the oldest message still kept verbatim.
+        """
+        first_seq = self.appended - len(self._recent)
+        messages = [
+            (seq, getattr(message.role, "value", message.role), message.content)
+            for seq, (message, _) in enumerate(self._recent, start=first_seq)
+            if seq >= since
+        ]
+        return self.summary, first_seq, messages
+
+    def restore(self, summary: str, messages):
+        """Rebuild the history from a checkpoint: ``messages`` are (seq, role, content) in order."""
+        self.summary = summary or ""
+        for seq, role, content in messages:
+            self.appended = seq
+            self._append(lk_llm.ChatMessage(role=lk_llm.ChatRole(role), content=content))
+
+    def _compact(self):
+        # Always keep the latest message, even when it alone exceeds the budget
+        while self._recent_tokens > self.token_budget and len(self._recent) > 1:
+            message, tokens = self._recent.popleft()
+            self._recent_tokens -= tokens
+            self._pending.append(message)
+        if self._pending and (self._summary_task is None or self._summary_task.done()):
+            # Start from an empty context, so the summarizer request does not inherit the session's
+            # context variables (current memory, metrics, turn) and cannot touch its history
+            self._summary_task = contextvars.Context().run(asyncio.create_task, self._summarize())
+
+    async def _summarize(self):
+        while self._pending:
+            turns, self._pending = self._pending, []
+            transcript = "\n".join(
+                f"{getattr(message.role, 'value', message.role)}: {message.content}" for message in turns
+            )
+            try:
+                summary = await self._run_summarizer(transcript)
+            except Exception as e:
+                logger.error(f"Error summarizing conversation history: {e}")
+                summary = ""
+            if summary:
+                self.summary = truncate_to_tokens(summary, CHAT_SUMMARY_MAX_TOKENS)
+            else:
+                # Fall back to the evicted turns themselves, after the existing summary. When that
+                # is over budget the oldest part goes first, so the newest turns are always kept.
+                summary = f"{self.summary}\n{transcript}" if self.summary else transcript
+                self.summary = truncate_to_tokens(summary, CHAT_SUMMARY_MAX_TOKENS, marker="[truncated]… ", keep_end=True)
+            logger.debug(f"Conversation summary updated ({estimate_tokens(self.summary)} tokens)")
+
+    async def _run_summarizer(self, transcript: str) -> str:
+        if self.summarizer_llm is None:
+            return ""
+        llm_stream = await self.summarizer_llm.chat(history=[
+            lk_llm.ChatMessage(role=lk_llm.ChatRole.SYSTEM, content=SUMMARY_PROMPT),
+            lk_llm.ChatMessage(
+                role=lk_llm.ChatRole.USER,
+                content=f"Existing summary:\n{self.summary or '(none)'}\n\nNew turns:\n{transcript}"
+            ),
+        ])
+        parts = []
+        async for llm_event in llm_stream:
+            if llm_event.type == lk_llm.LLMChunkEvent.CHUNK:
+                parts.append(llm_event.text)
+        return "".join(parts).strip()
+
+    async def aclose(self):
+        if self._summary_task is not None and not self._summary_task.done():
+            self._summary_task.cancel()
+            try:
+                await self._summary_task
+            except asyncio.CancelledError:
+                pass
@@ -6,6 +6,12 @@ DOCKER_REGISTRY="your-registry.com"
 IMAGE_NAME="optiflow-jarvis-agent"
 IMAGE_TAG=$(date +%Y%m%d%H%M%S)
 
+# Optionally run the offline load test before building
+if [ "${RUN_BENCHMARK:-0}" = "1" ]; then
+  echo "Running offline load test..."
+  python -m benchmarks.load_test --sessions "${BENCHMARK_SESSIONS:-50}" --turns 5 --output "benchmark-$IMAGE_TAG.json"
+fi
+
 # Build the Docker image
 echo "Building Docker image: $IMAGE_NAME:$IMAGE_TAG"
 docker build -t $IMAGE_NAME:$IMAGE_TAG .
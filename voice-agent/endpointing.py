@@ -0,0 +1,347 @@
+import asyncio
+import contextvars
+import os
+import logging
+import re
+import time
+from livekit import rtc
+from livekit.agents import llm as lk_llm, vad as lk_vad
+from metrics import registry
+from audio_buffer import AudioRingBuffer
+
+# The local VAD and turn detector plugins are optional; without the VAD, turns end on the
+# provider's final transcript, and without the turn detector a lexical scorer is used
+try:
+    from livekit.plugins import silero
+except ImportError:
+    silero = None
+try:
+    from livekit.plugins.turn_detector.multilingual import MultilingualModel
+except ImportError:
+    MultilingualModel = None
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+ENDPOINTING_ENABLED = os.getenv("ENDPOINTING_ENABLED", "false").lower() == "true"
+ENDPOINTING_EOT_THRESHOLD = float(os.getenv("ENDPOINTING_EOT_THRESHOLD", "0.85"))  # end-of-turn probability needed to start early
+ENDPOINTING_MIN_SILENCE = float(os.getenv("ENDPOINTING_MIN_SILENCE", "0.2"))  # seconds of silence before the VAD reports end of speech
+ENDPOINTING_CONTEXT_MESSAGES = int(os.getenv("ENDPOINTING_CONTEXT_MESSAGES", "4"))  # recent messages the turn model sees
+ENDPOINTING_MAX_BATCH = int(os.getenv("ENDPOINTING_MAX_BATCH", "16"))  # predictions scored in one round
+VAD_SAMPLE_RATE = 16000
+
+endpointing_turns = registry.counter(
+    "voice_endpointing_turns_total", "User turns by what ended them: the local turn model or the provider's final transcript")
+endpointing_corrections = registry.counter(
+    "voice_endpointing_corrections_total", "Early turns restarted because the final transcript differed")
+endpointing_lead = registry.histogram(
+    "voice_endpointing_lead_seconds", "How much earlier a local end-of-turn decision was than the provider's final transcript")
+turn_model_batch_size = registry.histogram(
+    "voice_turn_model_batch_size", "End-of-turn predictions scored together",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+turn_model_inference = registry.histogram(
+    "voice_turn_model_inference_seconds", "Time to score one batch of end-of-turn predictions")
+
+# Set in the task of a turn started before its final transcript; resolves to True when the final
+# transcript confirms the turn and to False when it corrects it
+current_turn_confirmation = contextvars.ContextVar("current_turn_confirmation", default=None)
+
+_WORD = re.compile(r"\w+")
+# An utterance ending in one of these is very likely to continue ("send it to Mark and")
+_CONTINUATION = re.compile(
+    r"\b(?:and|or|but|so|because|then|if|that|um+|uh+|erm|like|the|a|an|to|of|for|with|in|on|at|"
+    r"my|your|our|is|are|was|can|could|would|please)$",
+    re.IGNORECASE,
+)
+
+
+def normalize(text: str) -> str:
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def lexical_end_of_turn(text: str) -> float:
+    """Rough end-of-turn probability from the wording alone, used when the turn detector is not installed."""
+    stripped = text.strip()
+    if not stripped:
+        return 0.0
+    if _CONTINUATION.search(stripped.rstrip(".,!?… ")) or stripped.endswith((",", "…", "-")):
+        return 0.05
+    if stripped.endswith(("?", "!", ".")):
+        return 0.9
+    return 0.5
+
+
+def load_vad():
+    """The Silero VAD, loaded once per worker; each session gets its own stream over the shared model."""
+    if silero is None:
+        logger.warning("livekit-plugins-silero is not installed; turns end on the provider's final transcript")
+        return None
+    return silero.VAD.load(min_silence_duration=ENDPOINTING_MIN_SILENCE)
+
+
+def load_turn_detector():
+    if MultilingualModel is None:
+        logger.warning("livekit-plugins-turn-detector is not installed; using the lexical end-of-turn scorer")
+        return None
+    return MultilingualModel()
+
+
+class EndOfTurnModel:
+    """Worker-wide end-of-turn scorer shared by every session.
+
+    A request is scored as soon as it arrives; requests from other sessions that arrive while
+    a round is being scored wait for it and are scored together in the next round, up to
+    ``max_batch`` at a time. Nothing is held back to fill a batch: the turn detector plugin
+    scores one chat context per call, so waiting would only add latency. ``max_batch`` bounds
+    how many predictions run on its executor at once. ``detector`` is the LiveKit turn
+    detector; when it is None, ``lexical_end_of_turn`` scores the round.
+    """
+
+    def __init__(self, detector=None, max_batch=ENDPOINTING_MAX_BATCH):
+        self.detector = detector
+        self.max_batch = max_batch
+        self._queue = asyncio.Queue()
+        self._task = None
+
+        self.predictions = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self.errors = 0
+
+    async def predict(self, context: list, text: str) -> float:
+        """Probability that the user has finished their turn with ``text``, given the recent ``context``."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((context, text, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            batch = [item for item in batch if not item[2].done()]  # the caller moved on
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                probabilities = await self._score([(context, text) for context, text, _ in batch])
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"End-of-turn prediction failed: {e}")
+                probabilities = [0.0] * len(batch)  # never end a turn early on a failure
+            turn_model_inference.observe(time.perf_counter() - started)
+            turn_model_batch_size.observe(len(batch))
+            self.predictions += len(batch)
+            self.batches += 1
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            for (_, _, future), probability in zip(batch, probabilities):
+                if not future.done():
+                    future.set_result(probability)
+
+    async def _score(self, items: list) -> list:
+        if self.detector is None:
+            return [lexical_end_of_turn(text) for _, text in items]
+        # The plugin scores one chat context per call on its own inference executor
+        return await asyncio.gather(*(
+            self.detector.predict_end_of_turn(
+                list(context) + [lk_llm.ChatMessage(role=lk_llm.ChatRole.USER, content=text)]
+            )
+            for context, text in items
+        ))
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "predictions": self.predictions,
+            "batches": self.batches,
+            "avg_batch_size": round(self.predictions / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "errors": self.errors,
+        }
+
+
+class TurnEndpointer:
+    """Decides locally when one session's user has finished speaking.
+
+    When the VAD reports the end of speech (and again whenever a new interim transcript
+    arrives before speech resumes), the shared turn model scores the latest interim transcript.
+    Interim transcripts are never scored before the VAD has seen the speech end. A confident
+    decision calls ``on_turn`` with it right away, instead of waiting for the provider's
+    endpointing. ``on_final`` then tells the caller whether the provider's final transcript was
+    already handled that way; when the two differ, the caller starts the turn again with the
+    final transcript. Until then, the early turn's ``current_turn_confirmation`` is unresolved,
+    so side-effecting tools can wait for it (``turn_confirmed``).
+    """
+
+    def __init__(self, model: EndOfTurnModel, on_turn, context=lambda: [], threshold=ENDPOINTING_EOT_THRESHOLD):
+        self.model = model
+        self.on_turn = on_turn
+        self.context = context
+        self.threshold = threshold
+        self._speech_ended = False  # the VAD reported the end of speech, and speech has not resumed
+        self._partial = ""
+        self._committed = None
+        self._committed_at = None
+        self._confirmation = None
+        self._decision = None
+        self._turn_task = None
+
+    def on_speech_start(self):
+        self._speech_ended = False
+        self._cancel_decision()
+
+    def on_speech_end(self):
+        self._speech_ended = True
+        self._decide()
+
+    def on_interim(self, text: str):
+        self._partial = text
+        if self._speech_ended:
+            self._decide()  # the transcript often catches up after the VAD has seen the silence
+
+    def covers(self, text: str) -> bool:
+        """Whether ``text`` is part of the turn that was already started early (not new speech)."""
+        if self._committed is None:
+            return False
+        return normalize(self._committed).startswith(normalize(text))
+
+    def on_final(self, text: str) -> bool:
+        """Returns True when ``text`` is the turn that was already started early."""
+        committed, committed_at, confirmation = self._committed, self._committed_at, self._confirmation
+        self._committed = self._committed_at = self._confirmation = None
+        self._partial = ""
+        self._speech_ended = False  # the next utterance's interims wait for its own end of speech
+        self._cancel_decision()
+        if committed is None:
+            endpointing_turns.inc(source="provider")
+            return False
+        confirmed = normalize(committed) == normalize(text)
+        if not confirmation.done():
+            confirmation.set_result(confirmed)
+        if confirmed:
+            endpointing_lead.observe(time.perf_counter() - committed_at)
+            return True
+        endpointing_corrections.inc()
+        logger.info("Final transcript differs from the early turn; restarting it")
+        return False
+
+    def _decide(self):
+        if self._committed is not None or not self._partial.strip():
+            return
+        self._cancel_decision()
+        self._decision = asyncio.create_task(self._evaluate(self._partial))
+
+    def _cancel_decision(self):
+        if self._decision is not None:
+            self._decision.cancel()
+            self._decision = None
+
+    async def _evaluate(self, text: str):
+        probability = await self.model.predict(self.context(), text)
+        if probability < self.threshold or not self._speech_ended or text != self._partial or self._committed is not None:
+            return
+        self._committed = text
+        self._committed_at = time.perf_counter()
+        self._confirmation = asyncio.get_running_loop().create_future()
+        self._decision = None
+        endpointing_turns.inc(source="local")
+        logger.debug("Local end of turn (p=%.2f)", probability)
+        # Not part of the decision task, so a final transcript cannot cancel a turn that has started.
+        # The turn task copies this task's context, confirmation included.
+        current_turn_confirmation.set(self._confirmation)
+        self._turn_task = asyncio.create_task(self.on_turn(text))
+
+    async def aclose(self):
+        self._cancel_decision()
+        if self._confirmation is not None and not self._confirmation.done():
+            self._confirmation.set_result(False)  # no final transcript is coming
+        if self._turn_task is not None and not self._turn_task.done():
+            self._turn_task.cancel()
+            try:
+                await self._turn_task
+            except asyncio.CancelledError:
+                pass
+
+
+async def turn_confirmed() -> bool:
+    """For side-effecting tools: False when the current turn was started early and its final
+    transcript then corrected it. Waits for the final transcript while it is outstanding."""
+    confirmation = current_turn_confirmation.get()
+    if confirmation is None:
+        return True
+    # Shielded: a caller being cancelled must not resolve the turn for the other waiters
+    return await asyncio.shield(confirmation)
+
+
+def user_audio_frames(session):
+    """The user's microphone audio, for the local VAD."""
+    return rtc.AudioStream.from_participant(
+        participant=session.participant,
+        track_source=rtc.TrackSource.SOURCE_MICROPHONE,
+        sample_rate=VAD_SAMPLE_RATE,
+        num_channels=1,
+    )
+
+
+async def run_vad(vad, frames, endpointer: TurnEndpointer, buffer: AudioRingBuffer):
+    """Feed ``frames`` through ``buffer`` into a stream of the shared ``vad`` and report speech
+    start and end to ``endpointer``.
+
+    ``push_frame`` only queues a frame, so the VAD gets its own copy of each buffered frame
+    (the buffer reuses its slots) and no more than half the buffer's worth of audio is pushed
+    ahead of the samples the VAD has reported processing. When the VAD falls behind, the
+    buffer fills and its backpressure policy applies.
+    """
+    vad_stream = vad.stream()
+    max_ahead = buffer.capacity // 2 * buffer.samples_per_frame
+    pushed = 0
+    processed = None  # samples the VAD has processed, once it reports inference progress
+    progress = asyncio.Event()
+
+    async def receive():
+        try:
+            async for frame_event in frames:
+                await buffer.write(getattr(frame_event, "frame", frame_event))
+        finally:
+            buffer.close()
+
+    async def feed():
+        nonlocal pushed
+        async for frame in buffer:
+            vad_stream.push_frame(rtc.AudioFrame(
+                data=bytes(frame.data),
+                sample_rate=frame.sample_rate,
+                num_channels=frame.num_channels,
+                samples_per_channel=frame.samples_per_channel,
+            ))
+            pushed += frame.samples_per_channel
+            while processed is not None and pushed - processed > max_ahead:
+                progress.clear()
+                await progress.wait()
+        vad_stream.end_input()
+
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(feed())]
+    try:
+        async for event in vad_stream:
+            if event.type == lk_vad.VADEventType.INFERENCE_DONE:
+                processed = event.samples_index
+                progress.set()
+            elif event.type == lk_vad.VADEventType.START_OF_SPEECH:
+                endpointer.on_speech_start()
+            elif event.type == lk_vad.VADEventType.END_OF_SPEECH:
+                endpointer.on_speech_end()
+    finally:
+        for task in tasks:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        await vad_stream.aclose()
@@ -0,0 +1,200 @@
+import asyncio
+import os
+import logging
+import random
+import time
+from collections import deque
+from http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+AGENT_EVENT_WEBHOOK_URL = os.getenv("AGENT_EVENT_WEBHOOK_URL")
+AGENT_EVENT_QUEUE_SIZE = int(os.getenv("AGENT_EVENT_QUEUE_SIZE", "1000"))
+AGENT_EVENT_BATCH_MAX_SIZE = int(os.getenv("AGENT_EVENT_BATCH_MAX_SIZE", "50"))  # 1 sends the legacy single-event payload
+AGENT_EVENT_FLUSH_INTERVAL = float(os.getenv("AGENT_EVENT_FLUSH_INTERVAL", "1.0"))  # seconds
+AGENT_EVENT_MAX_IN_FLIGHT = int(os.getenv("AGENT_EVENT_MAX_IN_FLIGHT", "4"))  # batches being sent or retried at once
+AGENT_EVENT_MAX_RETRIES = int(os.getenv("AGENT_EVENT_MAX_RETRIES", "5"))
+AGENT_EVENT_RETRY_BASE_DELAY = float(os.getenv("AGENT_EVENT_RETRY_BASE_DELAY", "0.5"))  # seconds
+AGENT_EVENT_OVERFLOW_POLICY = os.getenv("AGENT_EVENT_OVERFLOW_POLICY", "drop_oldest")  # or "drop_newest"
+AGENT_EVENT_DRAIN_TIMEOUT = float(os.getenv("AGENT_EVENT_DRAIN_TIMEOUT", "5"))  # seconds
+
+# Version of the batch payload, {"version": 2, "events": [...]}; receivers dispatch on it
+EVENT_BATCH_VERSION = 2
+
+
+class AgentEventEmitter:
+    """Background pipeline for agent lifecycle events.
+
+    ``emit`` only appends to a bounded in-memory queue. A background task flushes the queue
+    to the webhook in batches, whenever ``batch_max_size`` events are waiting or
+    ``flush_interval`` seconds have passed. Each batch is sent, and retried with jittered
+    exponential backoff, in a task of its own, up to ``max_in_flight`` at a time, so a batch
+    that is being retried does not hold back the ones behind it. Batches may therefore arrive
+    out of order. When the queue is full, the overflow policy decides which event is dropped.
+    """
+
+    def __init__(
+        self,
+        url=AGENT_EVENT_WEBHOOK_URL,
+        queue_size=AGENT_EVENT_QUEUE_SIZE,
+        batch_max_size=AGENT_EVENT_BATCH_MAX_SIZE,
+        flush_interval=AGENT_EVENT_FLUSH_INTERVAL,
+        max_in_flight=AGENT_EVENT_MAX_IN_FLIGHT,
+        max_retries=AGENT_EVENT_MAX_RETRIES,
+        retry_base_delay=AGENT_EVENT_RETRY_BASE_DELAY,
+        overflow_policy=AGENT_EVENT_OVERFLOW_POLICY,
+    ):
+        self.url = url
+        self.queue_size = queue_size
+        self.batch_max_size = max(1, batch_max_size)
+        self.flush_interval = flush_interval
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.overflow_policy = overflow_policy
+        self._queue = deque()
+        self._has_events = None
+        self._batch_full = None
+        self._task = None
+        self._slots = None
+        self._in_flight = {}  # send task -> number of events in its batch
+        self._closing = False
+
+        self.emitted = 0
+        self.sent = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed = 0
+        self.dropped_overflow = 0
+
+    def emit(self, event: dict) -> bool:
+        """Queue an event without waiting for the network; returns False if it was dropped."""
+        if not self.url:
+            return False
+        self._ensure_started()
+        if len(self._queue) >= self.queue_size:
+            self.dropped_overflow += 1
+            # Log the first drop and then every 100th, so a reconnect storm doesn't flood the log
+            if self.dropped_overflow % 100 == 1:
+                logger.warning(
+                    f"Agent event queue full ({self.queue_size}), policy={self.overflow_policy}, "
+                    f"dropped so far: {self.dropped_overflow}"
+                )
+            if self.overflow_policy == "drop_newest":
+                return False
+            self._queue.popleft()
+        self._queue.append(event)
+        self.emitted += 1
+        self._has_events.set()
+        if len(self._queue) >= self.batch_max_size:
+            self._batch_full.set()
+        return True
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._has_events = asyncio.Event()
+            self._batch_full = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            if not self._queue:
+                self._has_events.clear()
+                await self._has_events.wait()
+            # Time trigger: give the batch up to flush_interval to fill, unless it already has
+            if len(self._queue) < self.batch_max_size and not self._closing:
+                self._batch_full.clear()
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            await self._slots.acquire()
+            batch = [self._queue.popleft() for _ in range(min(len(self._queue), self.batch_max_size))]
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._send(batch))
+            self._in_flight[task] = len(batch)
+            task.add_done_callback(self._sent)
+
+    def _sent(self, task):
+        self._in_flight.pop(task, None)
+        if self._slots is not None:
+            self._slots.release()
+
+    async def _send(self, batch: list):
+        payload = batch[0] if self.batch_max_size == 1 else {"version": EVENT_BATCH_VERSION, "events": batch}
+        for attempt in range(self.max_retries + 1):
+            try:
+                client = http_client.get_session()
+                async with client.post(
+                    self.url,
+                    json=payload,
+                    headers={"Content-Type": "application/json"}
+                ) as resp:
+                    if resp.status < 300:
+                        self.sent += len(batch)
+                        self.batches += 1
+                        return
+                    error = f"{resp.status} {await resp.text()}"
+                    # Client errors other than rate limiting will not succeed on retry
+                    if 400 <= resp.status < 500 and resp.status != 429:
+                        break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = str(e)
+            if attempt < self.max_retries:
+                self.retries += 1
+                delay = self.retry_base_delay * (2 ** attempt)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+        self.failed += len(batch)
+        logger.error(f"Failed to send {len(batch)} agent event(s) to webhook: {error}")
+
+    async def drain(self, timeout=AGENT_EVENT_DRAIN_TIMEOUT):
+        """Flush queued events within ``timeout`` seconds, then stop the background task."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._has_events.set()
+        self._batch_full.set()
+        deadline = time.monotonic() + timeout
+        while (self._queue or self._in_flight) and time.monotonic() < deadline and not self._task.done():
+            await asyncio.sleep(0.05)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._in_flight:
+            logger.warning(f"Dropping {sum(self._in_flight.values())} agent event(s) still being sent at shutdown")
+            self.failed += sum(self._in_flight.values())
+            in_flight = list(self._in_flight)
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+        self._slots = None
+        if self._queue:
+            logger.warning(f"Dropping {len(self._queue)} agent event(s) not delivered before shutdown")
+            self.failed += len(self._queue)
+            self._queue.clear()
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._queue),
+            "in_flight": len(self._in_flight),
+            "emitted": self.emitted,
+            "sent": self.sent,
+            "batches": self.batches,
+            "retries": self.retries,
+            "failed": self.failed,
+            "dropped_overflow": self.dropped_overflow,
+        }
+
+
+# Single instance per worker process
+event_emitter = AgentEventEmitter()
@@ -0,0 +1,131 @@
+import asyncio
+import os
+import logging
+import time
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "32"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))  # seconds
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))  # seconds
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))  # seconds
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", "30"))  # seconds
+
+
+class SharedHTTPClient:
+    """Worker-wide pooled aiohttp session shared by tools, presence polling and event webhooks."""
+
+    def __init__(
+        self,
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        dns_cache_ttl=HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        connect_timeout=HTTP_CONNECT_TIMEOUT,
+        total_timeout=HTTP_TOTAL_TIMEOUT,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+        self._session = None
+        self._connector = None
+        self._loop = None
+
+        # Pool metrics collected through aiohttp tracing
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.pool_waits = 0
+        self.pool_wait_time_total = 0.0
+        self.pool_wait_time_max = 0.0
+
+    def _build_trace_config(self):
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_queued_start(session, ctx, params):
+            ctx.queued_at = time.perf_counter()
+
+        async def on_queued_end(session, ctx, params):
+            waited = time.perf_counter() - getattr(ctx, "queued_at", time.perf_counter())
+            self.pool_waits += 1
+            self.pool_wait_time_total += waited
+            self.pool_wait_time_max = max(self.pool_wait_time_max, waited)
+
+        async def on_create_end(session, ctx, params):
+            self.connections_created += 1
+
+        async def on_reuse(session, ctx, params):
+            self.connections_reused += 1
+
+        trace_config.on_connection_queued_start.append(on_queued_start)
+        trace_config.on_connection_queued_end.append(on_queued_end)
+        trace_config.on_connection_create_end.append(on_create_end)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+        return trace_config
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use in the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self._connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=True,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=self._connector,
+                timeout=self.timeout,
+                trace_configs=[self._build_trace_config()],
+            )
+            self._loop = loop
+            logger.info(
+                f"Shared HTTP client created (limit={self.limit}, limit_per_host={self.limit_per_host}, "
+                f"dns_cache_ttl={self.dns_cache_ttl}s)"
+            )
+        return self._session
+
+    def metrics(self) -> dict:
+        """Snapshot of connection pool usage."""
+        in_use = 0
+        idle = 0
+        if self._connector is not None and not self._connector.closed:
+            in_use = len(getattr(self._connector, "_acquired", ()))
+            idle = sum(len(conns) for conns in getattr(self._connector, "_conns", {}).values())
+        return {
+            "in_use": in_use,
+            "idle": idle,
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "pool_waits": self.pool_waits,
+            "pool_wait_time_avg": self.pool_wait_time_total / self.pool_waits if self.pool_waits else 0.0,
+            "pool_wait_time_max": self.pool_wait_time_max,
+        }
+
+    async def close(self):
+        """Close the shared session and its connection pool."""
+        if self._session is not None and not self._session.closed:
+            logger.info(f"Closing shared HTTP client, pool metrics: {self.metrics()}")
+            await self._session.close()
+        self._session = None
+        self._connector = None
+        self._loop = None
+
+
+# Single instance per worker process
+http_client = SharedHTTPClient()
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    return http_client.get_session()
+
+
+async def close_http_client():
+    await http_client.close()
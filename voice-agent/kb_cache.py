@@ -0,0 +1,167 @@
+import asyncio
+import os
+import logging
+import re
+import sys
+import time
+import weakref
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+KB_CACHE_ENABLED = os.getenv("KB_CACHE_ENABLED", "true").lower() == "true"
+KB_CACHE_TTL = float(os.getenv("KB_CACHE_TTL", "300"))  # seconds
+KB_CACHE_MAX_ENTRIES = int(os.getenv("KB_CACHE_MAX_ENTRIES", "2000"))
+KB_CACHE_MAX_BYTES = int(os.getenv("KB_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query_text: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation so trivially different phrasings share a key."""
+    return _WHITESPACE_RE.sub(" ", query_text or "").strip().rstrip("?.!,;:").strip().lower()
+
+
+class KnowledgeBaseCache:
+    """In-process TTL + LRU cache for knowledge base results with single-flight request coalescing."""
+
+    def __init__(self, ttl=KB_CACHE_TTL, max_entries=KB_CACHE_MAX_ENTRIES, max_bytes=KB_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (expires_at, size, value), ordered from least to most recently used
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._awaited = weakref.WeakSet()  # in-flight requests someone is waiting on
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(query_text: str, kb_type: str = None, user_id: str = None) -> tuple:
+        return (user_id or "", kb_type or "", normalize_query(query_text))
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, size, value = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value: str):
+        size = sys.getsizeof(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    async def get_or_fetch(self, key, fetch):
+        """Return a cached value or await ``fetch()``, sharing one backend call between identical concurrent lookups.
+
+        Exceptions raised by ``fetch`` are propagated to every waiter and nothing is cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._on_fetch_done(key, t))
+        self._awaited.add(task)
+        # Shield so that a cancelled caller does not cancel the request for the other waiters
+        return await asyncio.shield(task)
+
+    def prefetch(self, key, fetch):
+        """Start ``fetch()`` in the background as the in-flight request for ``key``.
+
+        Returns the task, or None when the key is already cached or in flight. Lookups of the
+        same key coalesce with the prefetch; it can be cancelled with ``cancel_prefetch`` until
+        one does.
+        """
+        if self.get(key) is not None or key in self._inflight:
+            return None
+        task = asyncio.ensure_future(fetch())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t, key=key: self._on_fetch_done(key, t))
+        return task
+
+    def cancel_prefetch(self, key, task) -> bool:
+        """Cancel a prefetch that has not completed and that no lookup is waiting on."""
+        if task.done() or task in self._awaited:
+            return False
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        task.cancel()
+        return True
+
+    def _on_fetch_done(self, key, task):
+        # A concurrent invalidation may already have replaced or dropped this request
+        if self._inflight.get(key) is not task:
+            return
+        del self._inflight[key]
+        if not task.cancelled() and task.exception() is None:
+            self.put(key, task.result())
+
+    def invalidate(self, user_id: str = None, kb_type: str = None) -> int:
+        """Drop cached and in-flight results for a user and/or kb_type; with no arguments, clear everything.
+
+        Searches across all knowledge bases (cached under an empty kb_type) include ``kb_type``'s
+        documents too, so they are dropped along with it.
+        """
+        def matches(key):
+            key_user, key_kb_type, _ = key
+            if user_id is not None and key_user != user_id:
+                return False
+            if kb_type is not None and key_kb_type not in (kb_type, ""):
+                return False
+            return True
+
+        stale = [key for key in self._entries if matches(key)]
+        for key in stale:
+            self._remove(key)
+        for key in [key for key in self._inflight if matches(key)]:
+            del self._inflight[key]
+        logger.info(f"Knowledge base cache invalidated {len(stale)} entries (user_id={user_id}, kb_type={kb_type})")
+        return len(stale)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Single instance per worker process
+kb_cache = KnowledgeBaseCache()
@@ -0,0 +1,173 @@
+import asyncio
+import os
+import logging
+from kb_cache import kb_cache, normalize_query, KB_CACHE_ENABLED
+from kb_results import result_count
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+KB_PREFETCH_ENABLED = os.getenv("KB_PREFETCH_ENABLED", "false").lower() == "true"
+KB_PREFETCH_STABLE_MS = float(os.getenv("KB_PREFETCH_STABLE_MS", "300"))  # interim text unchanged this long counts as stable
+KB_PREFETCH_MIN_WORDS = int(os.getenv("KB_PREFETCH_MIN_WORDS", "4"))
+KB_PREFETCH_MIN_COVERAGE = float(os.getenv("KB_PREFETCH_MIN_COVERAGE", "0.8"))  # share of the final utterance the prefetched text must cover
+KB_PREFETCH_MAX_PER_TURN = int(os.getenv("KB_PREFETCH_MAX_PER_TURN", "2"))
+KB_PREFETCH_FINAL_WAIT = float(os.getenv("KB_PREFETCH_FINAL_WAIT", "0.15"))  # seconds to wait for a pending prefetch at end of turn
+
+
+class PrefetchStats:
+    """Worker-wide counters for speculative knowledge base prefetches."""
+
+    def __init__(self):
+        self.issued = 0
+        self.hits = 0  # result injected into the LLM context
+        self.late = 0  # matched the final transcript but was still in flight; left running for the tool call
+        self.wasted = 0  # cancelled, superseded, failed or empty
+        self.skipped_cached = 0
+
+    def stats(self) -> dict:
+        return {
+            "issued": self.issued,
+            "hits": self.hits,
+            "late": self.late,
+            "wasted": self.wasted,
+            "skipped_cached": self.skipped_cached,
+            "hit_rate": round(self.hits / self.issued, 3) if self.issued else 0.0,
+        }
+
+
+prefetch_stats = PrefetchStats()
+
+
+class KnowledgeBasePrefetcher:
+    """Speculatively searches the knowledge base while the user is still speaking.
+
+    Interim transcripts are debounced: once the partial text has not changed for
+    ``stable_ms`` and has at least ``min_words`` words, a search for it is started through
+    the shared knowledge base cache, so a later tool call with the same query coalesces with
+    it. A longer stable partial replaces the prefetch, up to ``max_per_turn`` requests per
+    turn, and a partial that no longer extends the prefetched text cancels it. At the end
+    of the turn, ``take`` returns the result when the prefetched text covers the final
+    utterance, for injection into the LLM context. With ``use_cache`` off (``KB_CACHE_ENABLED=false``)
+    the prefetch is a plain task of its own: nothing is written to the cache and tool calls do
+    not coalesce with it.
+    """
+
+    def __init__(
+        self,
+        search,
+        user_id: str = None,
+        stable_ms=KB_PREFETCH_STABLE_MS,
+        min_words=KB_PREFETCH_MIN_WORDS,
+        min_coverage=KB_PREFETCH_MIN_COVERAGE,
+        max_per_turn=KB_PREFETCH_MAX_PER_TURN,
+        final_wait=KB_PREFETCH_FINAL_WAIT,
+        stats=prefetch_stats,
+        use_cache=KB_CACHE_ENABLED,
+    ):
+        self.search = search  # async (query_text) -> result string
+        self.user_id = user_id
+        self.stable_ms = stable_ms
+        self.min_words = min_words
+        self.min_coverage = min_coverage
+        self.max_per_turn = max_per_turn
+        self.final_wait = final_wait
+        self.stats = stats
+        self.use_cache = use_cache
+        self._debounce_task = None
+        self._query = None  # normalized text of the current prefetch
+        self._key = None
+        self._task = None
+        self._turn_prefetches = 0
+
+    def on_interim(self, text: str):
+        query = normalize_query(text)
+        if self._query is not None and not query.startswith(self._query):
+            self._discard()
+        if self._debounce_task is not None:
+            self._debounce_task.cancel()
+            self._debounce_task = None
+        if (
+            query != self._query
+            and len(query.split()) >= self.min_words
+            and self._turn_prefetches < self.max_per_turn
+        ):
+            self._debounce_task = asyncio.create_task(self._start_when_stable(query))
+
+    async def _start_when_stable(self, query: str):
+        await asyncio.sleep(self.stable_ms / 1000)
+        self._debounce_task = None
+        # A longer stable partial supersedes the previous prefetch
+        self._discard()
+        if self.use_cache:
+            key = kb_cache.make_key(query, None, self.user_id)
+            task = kb_cache.prefetch(key, lambda: self.search(query))
+        else:
+            key, task = None, asyncio.ensure_future(self.search(query))
+        if task is None:
+            # Already cached or being fetched; take() will find it through the cache
+            self.stats.skipped_cached += 1
+        self._query, self._key, self._task = query, key, task
+        self._turn_prefetches += 1
+        if task is not None:
+            self.stats.issued += 1
+            logger.debug("Prefetching knowledge base results for interim transcript: %s", query)
+
+    def _discard(self):
+        """Drop the current prefetch, cancelling its request if nothing else is waiting on it."""
+        if self._task is not None:
+            self.stats.wasted += 1
+            if self._key is None:
+                self._task.cancel()
+            else:
+                kb_cache.cancel_prefetch(self._key, self._task)
+        self._query = self._key = self._task = None
+
+    def _covers(self, final_query: str) -> bool:
+        if not final_query.startswith(self._query):
+            return False
+        return len(self._query.split()) >= self.min_coverage * len(final_query.split())
+
+    async def take(self, final_text: str):
+        """Finish the turn: return the prefetched result if it matches ``final_text``, else None."""
+        if self._debounce_task is not None:
+            self._debounce_task.cancel()
+            self._debounce_task = None
+        self._turn_prefetches = 0
+        if self._query is None:
+            return None
+        if not self._covers(normalize_query(final_text)):
+            self._discard()
+            return None
+
+        key, task = self._key, self._task
+        self._query = self._key = self._task = None
+        result = kb_cache.get(key) if key is not None else None
+        if result is None and task is not None:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(task), timeout=self.final_wait)
+            except asyncio.TimeoutError:
+                if key is None:
+                    # Uncached, so no tool call could pick it up
+                    task.cancel()
+                    self.stats.wasted += 1
+                    return None
+                self.stats.late += 1
+                return None
+            except Exception as e:
+                logger.warning(f"Knowledge base prefetch failed: {e}")
+                self.stats.wasted += 1
+                return None
+        if not result or not result_count(result):
+            if task is not None:
+                self.stats.wasted += 1
+            return None
+        if task is not None:
+            self.stats.hits += 1
+        return result
+
+    async def aclose(self):
+        if self._debounce_task is not None:
+            self._debounce_task.cancel()
+            self._debounce_task = None
+        self._discard()
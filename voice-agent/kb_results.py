@@ -0,0 +1,190 @@
+import os
+import re
+import json
+import logging
+from metrics import registry
+from tokens import estimate_tokens, truncate_to_tokens
+
+# orjson is optional; it serializes result payloads several times faster than the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+KB_RESULT_TOKEN_BUDGET = int(os.getenv("KB_RESULT_TOKEN_BUDGET", "600"))  # tokens for all documents of one search
+KB_RESULT_MAX_DOCUMENTS = int(os.getenv("KB_RESULT_MAX_DOCUMENTS", "5"))
+KB_RESULT_MIN_SIMILARITY = float(os.getenv("KB_RESULT_MIN_SIMILARITY", "0"))
+KB_RESULT_DEDUPE_THRESHOLD = float(os.getenv("KB_RESULT_DEDUPE_THRESHOLD", "0.8"))  # shingle overlap counted as a duplicate
+KB_PASSAGE_MAX_TOKENS = int(os.getenv("KB_PASSAGE_MAX_TOKENS", "150"))  # per document
+KB_RESULT_MIN_DOCUMENT_TOKENS = 30  # don't add a document cut shorter than this to fit the budget
+
+kb_result_tokens = registry.histogram(
+    "voice_kb_result_tokens", "Knowledge base result tokens before and after compaction",
+    buckets=(50, 100, 200, 400, 600, 800, 1200, 1600, 2400, 3200, 4800, 6400, 9600),
+)
+kb_tokens_trimmed = registry.counter(
+    "voice_kb_tokens_trimmed_total", "Knowledge base result tokens kept out of the LLM context")
+kb_documents_removed = registry.counter(
+    "voice_kb_documents_removed_total", "Knowledge base documents removed by reason")
+
+_WORD = re.compile(r"\w+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i in is it my of on or our "
+    "that the their there this to was what when where which who why will with you your".split()
+)
+
+
+def dumps(obj) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def result_count(payload: str) -> int:
+    """Number of documents in a serialized search result; 0 for an empty, error or unparsable one."""
+    try:
+        data = orjson.loads(payload) if orjson is not None else json.loads(payload)
+    except (TypeError, ValueError):
+        return 0
+    results = data.get("results") if isinstance(data, dict) else None
+    return len(results) if isinstance(results, list) else 0
+
+
+def _shingles(text: str, size=3) -> set:
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _is_duplicate(shingles: set, kept: list, threshold: float) -> bool:
+    """Overlap is measured against the smaller chunk, so a chunk contained in another counts too."""
+    for other in kept:
+        smaller = min(len(shingles), len(other))
+        if smaller and len(shingles & other) / smaller >= threshold:
+            return True
+    return False
+
+
+def extract_passage(content: str, query_text: str, max_tokens=KB_PASSAGE_MAX_TOKENS) -> str:
+    """The sentences of ``content`` that share the most terms with the query, in document order.
+
+    Falls back to the leading sentences when no sentence mentions a query term.
+    """
+    if estimate_tokens(content) <= max_tokens:
+        return content
+    terms = {word for word in _WORD.findall(query_text.lower()) if word not in _STOPWORDS}
+    sentences = [s for s in _SENTENCE_END.split(content) if s.strip()]
+    scored = []
+    for index, sentence in enumerate(sentences):
+        words = set(_WORD.findall(sentence.lower()))
+        scored.append((len(terms & words), -index, sentence))
+    if any(score for score, _, _ in scored):
+        scored = [entry for entry in scored if entry[0]]
+    chosen = []
+    seen = set()
+    used = 0
+    for score, neg_index, sentence in sorted(scored, reverse=True):
+        normalized = " ".join(_WORD.findall(sentence.lower()))
+        if normalized in seen:
+            continue  # chunked documents often repeat boilerplate sentences
+        seen.add(normalized)
+        tokens = estimate_tokens(sentence)
+        if used + tokens > max_tokens:
+            if not chosen:
+                chosen.append((-neg_index, truncate_to_tokens(sentence, max_tokens, marker=" …")))
+            continue
+        chosen.append((-neg_index, sentence))
+        used += tokens
+    chosen.sort()
+    # Mark gaps so the LLM does not read unrelated sentences as one continuous passage
+    passage = []
+    previous = None
+    for index, sentence in chosen:
+        if previous is not None and index != previous + 1:
+            passage.append("…")
+        passage.append(sentence)
+        previous = index
+    return " ".join(passage)
+
+
+def compact_results(
+    query_text: str,
+    documents: list,
+    token_budget=KB_RESULT_TOKEN_BUDGET,
+    max_documents=KB_RESULT_MAX_DOCUMENTS,
+    min_similarity=KB_RESULT_MIN_SIMILARITY,
+    dedupe_threshold=KB_RESULT_DEDUPE_THRESHOLD,
+    passage_tokens=KB_PASSAGE_MAX_TOKENS,
+):
+    """Turn raw ``/api/knowledge/search`` documents into a compact result list for the LLM.
+
+    Documents are ranked by ``similarity``, near-duplicates of a higher-ranked document are
+    dropped, each remaining document is cut down to its most query-relevant passage, and
+    documents are added in rank order until ``token_budget`` is spent. Returns
+    ``(results, report)``; the report counts the tokens and documents that were removed.
+    """
+    formatted = [
+        {
+            "title": doc.get("title") or "Untitled Document",
+            "content": doc.get("content") or "",
+            "source": (doc.get("metadata") or {}).get("source", "Unknown Source"),
+            "score": doc.get("similarity") or 0,
+        }
+        for doc in documents
+    ]
+    tokens_before = estimate_tokens(dumps(formatted))
+    ranked = sorted(formatted, key=lambda result: result["score"], reverse=True)  # stable for ties
+
+    results = []
+    kept_shingles = []
+    removed = {"duplicate": 0, "low_similarity": 0, "max_documents": 0, "over_budget": 0}
+    used = 0
+    for result in ranked:
+        if result["score"] < min_similarity:
+            removed["low_similarity"] += 1
+            continue
+        shingles = _shingles(result["content"])
+        if _is_duplicate(shingles, kept_shingles, dedupe_threshold):
+            removed["duplicate"] += 1
+            continue
+        if len(results) >= max_documents:
+            removed["max_documents"] += 1
+            continue
+        result = dict(result, content=extract_passage(result["content"], query_text, passage_tokens))
+        tokens = estimate_tokens(dumps(result))
+        if used + tokens > token_budget:
+            room = token_budget - used - (tokens - estimate_tokens(result["content"]))
+            if room < KB_RESULT_MIN_DOCUMENT_TOKENS:
+                removed["over_budget"] += 1
+                continue
+            result["content"] = truncate_to_tokens(result["content"], room, marker=" …")
+            tokens = estimate_tokens(dumps(result))
+        results.append(result)
+        kept_shingles.append(shingles)
+        used += tokens
+
+    tokens_after = estimate_tokens(dumps(results))
+    report = {
+        "documents": len(formatted),
+        "documents_kept": len(results),
+        "duplicates_removed": removed["duplicate"],
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_trimmed": max(0, tokens_before - tokens_after),
+    }
+    kb_result_tokens.observe(tokens_before, stage="raw")
+    kb_result_tokens.observe(tokens_after, stage="compacted")
+    kb_tokens_trimmed.inc(report["tokens_trimmed"])
+    for reason, count in removed.items():
+        if count:
+            kb_documents_removed.inc(count, reason=reason)
+    logger.debug(
+        "Compacted %d knowledge base documents to %d (%d -> %d tokens)",
+        report["documents"], report["documents_kept"], tokens_before, tokens_after,
+    )
+    return results, report
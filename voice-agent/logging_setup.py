@@ -0,0 +1,178 @@
+import atexit
+import contextvars
+import os
+import logging
+import logging.handlers
+import json
+import queue
+import random
+import time
+
+# --- Configuration ---
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_MODE = os.getenv("LOG_MODE", "queue")  # "queue" writes from a background thread, "sync" on the caller's thread
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" or "json"
+LOG_FILE = os.getenv("LOG_FILE", "jarvis_agent.log")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(20 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_TRANSCRIPT_RATE = float(os.getenv("LOG_TRANSCRIPT_RATE", "20"))  # transcript lines per second, 0 disables the limit
+LOG_TRANSCRIPT_SAMPLE_RATE = float(os.getenv("LOG_TRANSCRIPT_SAMPLE_RATE", "1.0"))  # fraction of transcript lines kept
+LOG_TRANSCRIPT_MAX_CHARS = int(os.getenv("LOG_TRANSCRIPT_MAX_CHARS", "500"))
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Session/room/turn identifiers attached to every record logged from a session's task tree
+log_context = contextvars.ContextVar("log_context", default={})
+
+
+def set_log_context(**fields):
+    """Merge ``fields`` (e.g. session_id, room_id, turn_id) into the current task's log context."""
+    log_context.set({**log_context.get(), **fields})
+
+
+class ContextFilter(logging.Filter):
+    """Copies the log context onto the record on the calling thread, before it is queued."""
+
+    def filter(self, record):
+        record.context = log_context.get()
+        return True
+
+
+class TranscriptFilter(logging.Filter):
+    """Samples, rate-limits and truncates high-volume transcript records (``extra={"transcript": True}``)."""
+
+    def __init__(self, rate=LOG_TRANSCRIPT_RATE, sample_rate=LOG_TRANSCRIPT_SAMPLE_RATE, max_chars=LOG_TRANSCRIPT_MAX_CHARS):
+        super().__init__()
+        self.rate = rate
+        self.sample_rate = sample_rate
+        self.max_chars = max_chars
+        self._tokens = rate
+        self._last_refill = time.monotonic()
+        self.suppressed = 0
+
+    def filter(self, record):
+        if not getattr(record, "transcript", False):
+            return True
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.suppressed += 1
+            return False
+        if self.rate > 0:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            if self._tokens < 1:
+                self.suppressed += 1
+                return False
+            self._tokens -= 1
+        if self.max_chars and record.args:
+            record.args = tuple(
+                arg[:self.max_chars] + "…" if isinstance(arg, str) and len(arg) > self.max_chars else arg
+                for arg in record.args
+            )
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "context", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = super().format(record)
+        context = getattr(record, "context", None)
+        if context:
+            line += " [" + " ".join(f"{key}={value}" for key, value in context.items()) + "]"
+        return line
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never blocks the event loop and defers message formatting to the writer thread."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The stdlib version formats the message here, on the caller's thread. The record is
+        # consumed in-process, so it can cross to the writer thread unformatted.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener = None
+_entry_handlers = []
+
+
+def configure_logging(mode=LOG_MODE, log_format=LOG_FORMAT, log_file=LOG_FILE, console=True, transcript_rate=LOG_TRANSCRIPT_RATE):
+    """Install the worker's root logging handlers.
+
+    In ``queue`` mode the event-loop thread only filters and enqueues records; formatting and
+    disk/console I/O happen on a background ``QueueListener`` thread. Both modes use a
+    size-rotated log file.
+    """
+    global _listener, _entry_handlers
+    formatter = JsonFormatter() if log_format == "json" else TextFormatter(TEXT_FORMAT)
+    output_handlers = [logging.handlers.RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)]
+    if console:
+        output_handlers.append(logging.StreamHandler())
+    for handler in output_handlers:
+        handler.setFormatter(formatter)
+
+    stop_logging()
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+    if mode == "queue":
+        entry_handler = NonBlockingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+        _listener = logging.handlers.QueueListener(entry_handler.queue, *output_handlers, respect_handler_level=True)
+        _listener.start()
+        entry_handlers = [entry_handler]
+    else:
+        entry_handlers = output_handlers
+
+    for handler in entry_handlers:
+        handler.addFilter(ContextFilter())
+        handler.addFilter(TranscriptFilter(rate=transcript_rate))
+        root.addHandler(handler)
+    _entry_handlers = entry_handlers
+
+
+@atexit.register
+def stop_logging():
+    """Flush queued records and stop the background writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats() -> dict:
+    """Queue depth and records dropped or suppressed before reaching the writer."""
+    stats = {"queued": 0, "dropped": 0, "transcripts_suppressed": 0}
+    for handler in _entry_handlers:
+        if isinstance(handler, NonBlockingQueueHandler):
+            stats["queued"] += handler.queue.qsize()
+            stats["dropped"] += handler.dropped
+        for log_filter in handler.filters:
+            if isinstance(log_filter, TranscriptFilter):
+                stats["transcripts_suppressed"] += log_filter.suppressed
+    return stats
@@ -2,9 +2,11 @@ import asyncio
 import os
 import logging
 import json
+import inspect
+import signal
+import uuid
+import weakref
 from dotenv import load_dotenv
-import requests
-import aiohttp
 from livekit.agents import (
     JobContext,
     JobType,
@@ -24,15 +26,56 @@ import time
 
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("jarvis_agent.log"),
-        logging.StreamHandler()
-    ]
+# Worker-local modules read their configuration from the environment at import time
+from http_client import http_client, close_http_client
+from backend_client import (
+    BackendClient,
+    BackendError,
+    BackendHTTPError,
+    BackendUnavailableError,
+    backend_stats,
 )
+from kb_cache import kb_cache, KB_CACHE_ENABLED
+from action_cache import action_cache, current_action_turn, idempotency_key, is_read_only, PIPEDREAM_RESULT_CACHE_ENABLED
+from kb_results import compact_results, dumps
+from kb_prefetch import KnowledgeBasePrefetcher, prefetch_stats, KB_PREFETCH_ENABLED
+from presence import presence_service
+from event_emitter import event_emitter
+from conversation_memory import ConversationMemory, current_memory, remember_tool_result, CHAT_SUMMARY_MODEL
+from tts_chunker import SentenceChunker, PlaybackEstimate
+from phrase_cache import phrase_cache, PHRASE_CACHE_ENABLED
+from worker_load import worker_load, WORKER_LOAD_THRESHOLD
+from session_store import SessionCheckpoint, session_store, SESSION_CHECKPOINT_ENABLED
+from model_router import ModelRouter, Route, LLM_ROUTER_ENABLED, LLM_FAST_MODEL, LLM_CAPABLE_MODEL
+from endpointing import (
+    EndOfTurnModel,
+    TurnEndpointer,
+    load_vad,
+    load_turn_detector,
+    run_vad,
+    turn_confirmed,
+    user_audio_frames,
+    current_turn_confirmation,
+    ENDPOINTING_ENABLED,
+    ENDPOINTING_CONTEXT_MESSAGES,
+    VAD_SAMPLE_RATE,
+)
+from audio_buffer import AudioRingBuffer, audio_buffer_stats
+from tokens import estimate_tokens
+from logging_setup import configure_logging, set_log_context, logging_stats
+from metrics import (
+    registry,
+    metrics_exporter,
+    SessionMetrics,
+    TurnTrace,
+    job_setup,
+    current_session_metrics,
+    traced_tool,
+    record_barge_in,
+)
+
+# Configure logging; by default records are written by a background thread, off the event loop
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # --- Configuration ---
@@ -43,12 +86,62 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "EXAVITQu4vr4xnSDxMaL")  # Default: "Josh"
+ELEVENLABS_MODEL_ID = os.getenv("ELEVENLABS_MODEL_ID", "eleven_multilingual_v2")
 OPTIFLOW_BACKEND_URL = os.getenv("OPTIFLOW_BACKEND_URL")
 OPTIFLOW_BACKEND_API_KEY = os.getenv("OPTIFLOW_BACKEND_API_KEY")
 AGENT_EVENT_WEBHOOK_URL = os.getenv("AGENT_EVENT_WEBHOOK_URL")
 
+# Expose shared resource stats next to the latency histograms
+registry.register_gauges("voice_http_pool", http_client.metrics)
+registry.register_gauges("voice_backend", backend_stats)
+registry.register_gauges("voice_kb_cache", kb_cache.stats)
+registry.register_gauges("voice_pipedream_cache", action_cache.stats)
+registry.register_gauges("voice_kb_prefetch", prefetch_stats.stats)
+registry.register_gauges("voice_phrase_cache", phrase_cache.stats)
+registry.register_gauges("voice_worker", worker_load.stats)
+registry.register_gauges("voice_session_store", session_store.stats)
+registry.register_gauges("voice_audio_buffers", audio_buffer_stats)
+registry.register_gauges("voice_agent_events", event_emitter.stats)
+registry.register_gauges("voice_logging", logging_stats)
+
 # --- Pipedream Tool Definition ---
+PIPEDREAM_ACTION_TIMEOUT = float(os.getenv("PIPEDREAM_ACTION_TIMEOUT", "30"))  # seconds, per action
+PIPEDREAM_MAX_CONCURRENT_PER_USER = int(os.getenv("PIPEDREAM_MAX_CONCURRENT_PER_USER", "3"))
+PIPEDREAM_MAX_CONCURRENT_PER_WORKER = int(os.getenv("PIPEDREAM_MAX_CONCURRENT_PER_WORKER", "32"))
+
+# Returned to the LLM when the backend's circuit breaker is open, so the user hears why right away
+ACTIONS_UNAVAILABLE_MESSAGE = "I can't run that right now because the Optiflow service isn't responding. Please try again in a minute."
+KB_UNAVAILABLE_MESSAGE = "I can't reach the knowledge base right now. Please try again in a minute."
+
+def _parse_action_result(result: str):
+    try:
+        return json.loads(result)
+    except ValueError:
+        return {"result": result}
+
+def _mark_repeated(result: str) -> str:
+    """Tell the LLM that a repeated action was not run a second time."""
+    parsed = _parse_action_result(result)
+    if not isinstance(parsed, dict):
+        return result
+    parsed["already_executed"] = True
+    return json.dumps(parsed)
+
+def tool_user_id(ctx) -> str:
+    """The user a tool call acts for: the job's participant identity, the same id the session
+    uses for that user (presence, checkpoints, knowledge base prefetch). Falls back to
+    ``ctx.metadata["user_id"]`` when the job has no participant."""
+    participant = getattr(getattr(ctx, "job", None), "participant", None)
+    if participant is not None and participant.identity:
+        return participant.identity
+    metadata = getattr(ctx, "metadata", None) or {}
+    return metadata.get("user_id")
+
 class PipedreamActionTool(lk_tools.Tool):
+    # Concurrency limits are shared by every tool instance in the worker process
+    _worker_semaphore = asyncio.Semaphore(PIPEDREAM_MAX_CONCURRENT_PER_WORKER)
+    _user_semaphores = weakref.WeakValueDictionary()
+
     def __init__(self):
         super().__init__(
             name="execute_pipedream_action",
@@ -57,13 +150,24 @@ class PipedreamActionTool(lk_tools.Tool):
                 "Use this for tasks like sending emails, creating calendar events, "
                 "managing tasks in Asana/Jira, or interacting with CRMs. "
                 "Specify the 'action_type' (e.g., 'send_email', 'create_asana_task') and "
-                "necessary 'parameters'."
+                "necessary 'parameters'. To run several independent actions at once, pass "
+                "'actions' as a list of objects with 'action_type' and 'parameters' instead."
             ),
         )
+        self.backend = BackendClient(OPTIFLOW_BACKEND_URL, OPTIFLOW_BACKEND_API_KEY)
         logger.info("PipedreamActionTool initialized.")
 
-    async def arun(self, ctx: lk_tools.ToolContext, action_type: str, parameters: dict) -> str:
-        logger.info(f"PipedreamTool called: action_type={action_type}, params={parameters}")
+    @classmethod
+    def _user_semaphore(cls, user_identity: str) -> asyncio.Semaphore:
+        semaphore = cls._user_semaphores.get(user_identity)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(PIPEDREAM_MAX_CONCURRENT_PER_USER)
+            cls._user_semaphores[user_identity] = semaphore
+        return semaphore
+
+    @traced_tool("execute_pipedream_action")
+    async def arun(self, ctx: lk_tools.ToolContext, action_type: str = None, parameters: dict = None, actions: list = None) -> str:
+        logger.info("PipedreamTool called: action_type=%s, params=%s, actions=%s", action_type, parameters, actions)
         
         if not OPTIFLOW_BACKEND_URL or not OPTIFLOW_BACKEND_API_KEY:
             error_msg = "Optiflow backend not configured for Pipedream actions."
@@ -77,34 +181,86 @@ class PipedreamActionTool(lk_tools.Tool):
             logger.error(error_msg)
             return json.dumps({"error": error_msg})
         
+        if actions:
+            # Dispatch all requested actions in parallel and gather their results in order
+            results = await asyncio.gather(*[
+                self._execute(user_identity, action.get("action_type"), action.get("parameters") or {})
+                for action in actions
+            ])
+            return remember_tool_result(
+                self.name, json.dumps({"results": [_parse_action_result(result) for result in results]})
+            )
+        
+        if not action_type:
+            return json.dumps({"error": "Missing 'action_type' for Pipedream action."})
+        
+        return remember_tool_result(self.name, await self._execute(user_identity, action_type, parameters or {}))
+
+    async def _execute(self, user_identity: str, action_type: str, parameters: dict) -> str:
+        """Run one action against the backend, bounded by the per-user and per-worker limits.
+
+        Identical calls (same user, action type and canonical parameters) share one idempotency
+        key: a call already in flight is joined and a result from the same turn is returned
+        again, so the action runs once. In a turn started before its final transcript, side-effecting actions
+        wait for that transcript and are not run when it corrects the turn.
+        """
         payload = {
             "action_type": action_type,
             "parameters": parameters,
             "user_identity": user_identity
         }
+        key = idempotency_key(user_identity, action_type, parameters)
+        read_only = is_read_only(action_type)
+        # Side-effecting actions send a per-turn key (unless results are reused across turns), so a
+        # backend deduplicating on it drops retries and in-turn repeats, not a later "send it again"
+        request_key = key
+        if not read_only and action_cache.ttl <= 0:
+            request_key = idempotency_key(user_identity, action_type, parameters, turn=current_action_turn.get())
         
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {OPTIFLOW_BACKEND_API_KEY}"
-        }
+        # A turn started before its final transcript may still be corrected; its side effects wait for the final
+        if not read_only and not await turn_confirmed():
+            logger.info(f"Pipedream action {action_type} not run: the user's turn was corrected")
+            return json.dumps({"error": "The request changed before the action ran; it was not executed."})
         
         try:
-            logger.info(f"Calling Optiflow backend for Pipedream action: {action_type}")
-            response = requests.post(
-                f"{OPTIFLOW_BACKEND_URL}/api/pipedream/execute", 
-                json=payload, 
-                headers=headers, 
-                timeout=30
+            # The timeout covers waiting for a concurrency slot as well as the request itself
+            if not PIPEDREAM_RESULT_CACHE_ENABLED:
+                return await asyncio.wait_for(
+                    self._post_action(user_identity, action_type, payload, request_key),
+                    timeout=PIPEDREAM_ACTION_TIMEOUT
+                )
+            result, repeated = await asyncio.wait_for(
+                action_cache.get_or_run(
+                    key, lambda: self._post_action(user_identity, action_type, payload, request_key), read_only=read_only
+                ),
+                timeout=PIPEDREAM_ACTION_TIMEOUT
             )
-            response.raise_for_status()
-            result = response.text
-            logger.info(f"Pipedream action {action_type} executed successfully")
+            if repeated and not read_only:
+                logger.info(f"Pipedream action {action_type} repeated with identical parameters; not running it again")
+                return _mark_repeated(result)
             return result
-        except requests.RequestException as e:
+        except BackendUnavailableError as e:
+            logger.warning(f"Pipedream action {action_type} failed fast: {e}")
+            return json.dumps({"error": str(e), "fallback_response": ACTIONS_UNAVAILABLE_MESSAGE})
+        except asyncio.TimeoutError:
+            error_msg = f"Pipedream action {action_type} timed out after {PIPEDREAM_ACTION_TIMEOUT} seconds"
+            logger.error(error_msg)
+            return json.dumps({"error": error_msg})
+        except BackendError as e:
             error_msg = f"Failed to execute Pipedream action: {str(e)}"
             logger.error(error_msg)
             return json.dumps({"error": error_msg})
 
+    async def _post_action(self, user_identity: str, action_type: str, payload: dict, key: str) -> str:
+        async with self._user_semaphore(user_identity), self._worker_semaphore:
+            logger.info(f"Calling Optiflow backend for Pipedream action: {action_type}")
+            # The backend runs each key once, which makes retrying the request safe
+            result = await self.backend.post(
+                "pipedream", payload, response_format="text", headers={"Idempotency-Key": key}
+            )
+        logger.info(f"Pipedream action {action_type} executed successfully")
+        return result
+
 # --- Knowledge Base Tool (Enhanced) ---
 class KnowledgeBaseQueryTool(lk_tools.Tool):
     def __init__(self, backend_url=None, backend_api_key=None):
@@ -119,10 +275,12 @@ class KnowledgeBaseQueryTool(lk_tools.Tool):
         )
         self.backend_url = backend_url or os.getenv("OPTIFLOW_BACKEND_URL")
         self.backend_api_key = backend_api_key or os.getenv("OPTIFLOW_BACKEND_API_KEY")
+        self.backend = BackendClient(self.backend_url, self.backend_api_key)
         logger.info("KnowledgeBaseQueryTool initialized with backend URL")
     
+    @traced_tool("query_knowledge_base")
     async def arun(self, ctx: lk_tools.ToolContext, query_text: str, kb_type: str = None) -> str:
-        logger.info(f"KnowledgeBaseTool called: query='{query_text}', kb_type='{kb_type}'")
+        logger.info("KnowledgeBaseTool called: query='%s', kb_type='%s'", query_text, kb_type, extra={"transcript": True})
         
         if not self.backend_url or not self.backend_api_key:
             logger.warning("Backend URL or API key not configured, returning simulated response")
@@ -132,69 +290,28 @@ class KnowledgeBaseQueryTool(lk_tools.Tool):
                 ]
             })
         
-        # Extract user ID from context if available
-        user_id = None
-        try:
-            if hasattr(ctx, "metadata") and "user_id" in ctx.metadata:
-                user_id = ctx.metadata["user_id"]
-        except Exception as e:
-            logger.error(f"Error extracting user ID from context: {e}")
+        user_id = tool_user_id(ctx)
         
         try:
-            # Prepare search parameters
-            params = {
-                "query": query_text,
-                "userId": user_id,
-            }
-            
-            # Add knowledge base type if specified
-            if kb_type:
-                params["knowledgeBaseType"] = kb_type
-            
-            # Make API request to backend
-            headers = {
-                "Authorization": f"Bearer {self.backend_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.backend_url}/api/knowledge/search",
-                    json=params,
-                    headers=headers
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"Error querying knowledge base: {response.status}, {error_text}")
-                        return json.dumps({
-                            "error": f"Failed to query knowledge base: {response.status}",
-                            "results": []
-                        })
-                    
-                    data = await response.json()
-                    
-                    # Format the results nicely for the agent
-                    formatted_results = []
-                    for doc in data.get("documents", []):
-                        formatted_result = {
-                            "title": doc.get("title", "Untitled Document"),
-                            "content": doc.get("content", ""),
-                            "source": doc.get("metadata", {}).get("source", "Unknown Source"),
-                            "score": doc.get("similarity", 0)
-                        }
-                        formatted_results.append(formatted_result)
-                    
-                    if not formatted_results:
-                        return json.dumps({
-                            "message": f"No results found for query: '{query_text}'",
-                            "results": []
-                        })
-                    
-                    return json.dumps({
-                        "message": f"Found {len(formatted_results)} relevant documents.",
-                        "results": formatted_results
-                    })
-                    
+            if KB_CACHE_ENABLED:
+                cache_key = kb_cache.make_key(query_text, kb_type, user_id)
+                result = await kb_cache.get_or_fetch(cache_key, lambda: self._search(query_text, kb_type, user_id))
+            else:
+                result = await self._search(query_text, kb_type, user_id)
+            return remember_tool_result(self.name, result)
+        except BackendUnavailableError as e:
+            logger.warning(f"Knowledge base query failed fast: {e}")
+            return json.dumps({
+                "error": str(e),
+                "fallback_response": KB_UNAVAILABLE_MESSAGE,
+                "results": []
+            })
+        except BackendHTTPError as e:
+            logger.error(f"Error querying knowledge base: {e.status}, {e.error_text}")
+            return json.dumps({
+                "error": f"Failed to query knowledge base: {e.status}",
+                "results": []
+            })
         except Exception as e:
             logger.error(f"Error in KnowledgeBaseQueryTool: {e}")
             return json.dumps({
@@ -202,7 +319,38 @@ class KnowledgeBaseQueryTool(lk_tools.Tool):
                 "results": []
             })
 
-async def send_agent_event(event_type, user_id, room_id):
+    async def _search(self, query_text: str, kb_type: str, user_id: str) -> str:
+        """Query the backend search endpoint; raises BackendError so failures are never cached."""
+        # Prepare search parameters
+        params = {
+            "query": query_text,
+            "userId": user_id,
+        }
+        
+        # Add knowledge base type if specified
+        if kb_type:
+            params["knowledgeBaseType"] = kb_type
+        
+        # Make API request to backend (deadline, retries, hedging and circuit breaking per endpoint)
+        data = await self.backend.post("search", params)
+        
+        # Rank, dedupe and trim the documents to the token budget before they reach the LLM
+        results, report = compact_results(query_text, data.get("documents", []))
+        
+        if not results:
+            return dumps({
+                "message": f"No results found for query: '{query_text}'",
+                "results": []
+            })
+        
+        return dumps({
+            "message": f"Found {len(results)} relevant documents.",
+            "results": results,
+            "tokens_trimmed": report["tokens_trimmed"]
+        })
+
+def send_agent_event(event_type, user_id, room_id, details: dict = None):
+    """Queue an agent lifecycle event; delivery happens in the background emitter."""
     if not AGENT_EVENT_WEBHOOK_URL:
         return
     payload = {
@@ -211,89 +359,189 @@ async def send_agent_event(event_type, user_id, room_id):
         "room_id": room_id,
         "timestamp": int(time.time()),
     }
-    try:
-        async with aiohttp.ClientSession() as client:
-            async with client.post(
-                AGENT_EVENT_WEBHOOK_URL,
-                json=payload,
-                headers={"Content-Type": "application/json"}
-            ) as resp:
-                if resp.status != 200:
-                    logger.error(f"Failed to send agent event webhook: {resp.status} {await resp.text()}")
-    except Exception as e:
-        logger.error(f"Error sending agent event webhook: {e}")
+    if details:
+        payload.update(details)
+    event_emitter.emit(payload)
 
-class JarvisAgent(Agent):
-    def __init__(self):
-        super().__init__()
+# --- Fixed Utterances ---
+# Spoken identically in every session, so their audio is served from the phrase cache
+WELCOME_MESSAGE = "Hello, I'm Jarvis, your voice assistant for Optiflow. How can I help you today?"
+GOODBYE_MESSAGE = "I'll be here when you return. Goodbye!"
+STT_ERROR_MESSAGE = "I'm having trouble understanding you. Could you try again?"
+INTERNAL_ERROR_MESSAGE = "I'm sorry, but I've encountered an internal error. Please try reconnecting."
+FIXED_PHRASES = (WELCOME_MESSAGE, GOODBYE_MESSAGE, STT_ERROR_MESSAGE, INTERNAL_ERROR_MESSAGE)
+
+def phrase_key(text: str) -> tuple:
+    return phrase_cache.make_key(text, ELEVENLABS_VOICE_ID, ELEVENLABS_MODEL_ID, AudioEncoding.PCM_S16LE)
+
+# --- Worker Resources ---
+PROVIDER_KEEPALIVE_INTERVAL = float(os.getenv("PROVIDER_KEEPALIVE_INTERVAL", "0"))  # seconds, 0 disables
+
+class WorkerResources:
+    """Plugin clients and tools built once per worker process and shared by every session.
+
+    The STT, LLM and TTS plugins only hold provider credentials and connection pools, and the
+    tools keep no per-session state, so one instance of each safely serves all sessions.
+    Everything that is per-session lives in ``JarvisAgent._main_agent_loop``.
+    """
+
+    def __init__(self, stt_plugin, llm_plugin, tts_plugin, pipedream_tool, kb_tool, fast_llm_plugin=None,
+                 vad=None, turn_model=None, summary_llm_plugin=None):
+        self.stt_plugin = stt_plugin
+        self.llm_plugin = llm_plugin
+        self.fast_llm_plugin = fast_llm_plugin
+        # Separate client for history summaries; it never gets tools registered
+        self.summary_llm_plugin = summary_llm_plugin
+        self.tts_plugin = tts_plugin
+        self.pipedream_tool = pipedream_tool
+        self.kb_tool = kb_tool
+        # Local endpointing models; without a VAD, turns end on the STT's final transcript
+        self.vad = vad
+        self.turn_model = turn_model
+        if turn_model is not None:
+            registry.register_gauges("voice_turn_model", turn_model.stats)
         
+        # Register tools with the LLMs once, instead of on every job
+        self.model_router = ModelRouter(fast_llm_plugin, llm_plugin, tools=[self.pipedream_tool, self.kb_tool])
+        self._keepalive_task = None
+        self._phrase_warmup_task = None
+
+    @classmethod
+    def build(cls):
         # Initialize STT (Speech-to-Text)
-        self.stt_plugin = deepgram_plugin.STT(api_key=DEEPGRAM_API_KEY) if DEEPGRAM_API_KEY else lk_stt.NoOpSTT()
-        logger.info(f"STT initialized: {type(self.stt_plugin).__name__}")
+        stt_plugin = deepgram_plugin.STT(api_key=DEEPGRAM_API_KEY) if DEEPGRAM_API_KEY else lk_stt.NoOpSTT()
+        logger.info(f"STT initialized: {type(stt_plugin).__name__}")
         
         # Initialize LLM (Language Model)
-        self.llm_plugin = openai_plugin.LLM(
-            model="gpt-4-turbo-preview", 
+        llm_plugin = openai_plugin.LLM(
+            model=LLM_CAPABLE_MODEL, 
             api_key=OPENAI_API_KEY
         ) if OPENAI_API_KEY else lk_llm.NoOpLLM()
-        logger.info(f"LLM initialized: {type(self.llm_plugin).__name__}")
+        logger.info(f"LLM initialized: {type(llm_plugin).__name__}")
+        
+        # Fast tier for turns that need no tools; see model_router.py
+        fast_llm_plugin = None
+        if LLM_ROUTER_ENABLED and OPENAI_API_KEY:
+            fast_llm_plugin = openai_plugin.LLM(model=LLM_FAST_MODEL, api_key=OPENAI_API_KEY)
+            logger.info(f"Fast-tier LLM initialized: {LLM_FAST_MODEL}")
+        
+        # Tool-less client for conversation summaries; see conversation_memory.py
+        summary_llm_plugin = openai_plugin.LLM(model=CHAT_SUMMARY_MODEL, api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
         
         # Initialize TTS (Text-to-Speech)
-        self.tts_plugin = elevenlabs_plugin.TTS(
+        tts_plugin = elevenlabs_plugin.TTS(
             api_key=ELEVENLABS_API_KEY,
             voice_id=ELEVENLABS_VOICE_ID,
-            model_id="eleven_multilingual_v2"
+            model_id=ELEVENLABS_MODEL_ID
         ) if ELEVENLABS_API_KEY else lk_tts.NoOpTTS()
-        logger.info(f"TTS initialized: {type(self.tts_plugin).__name__}")
+        logger.info(f"TTS initialized: {type(tts_plugin).__name__}")
         
-        # Initialize tools
-        self.pipedream_tool = PipedreamActionTool()
-        self.kb_tool = KnowledgeBaseQueryTool(backend_url=OPTIFLOW_BACKEND_URL, backend_api_key=OPTIFLOW_BACKEND_API_KEY)
+        # Local VAD and end-of-turn model (CPU only), loaded once and shared by every session
+        vad = turn_model = None
+        if ENDPOINTING_ENABLED:
+            vad = load_vad()
+            turn_model = EndOfTurnModel(load_turn_detector())
+            logger.info(f"Local endpointing initialized: VAD={type(vad).__name__}, turn model={type(turn_model.detector).__name__}")
         
-        # Register tools with the LLM
-        self.llm_plugin.tools = [self.pipedream_tool, self.kb_tool]
+        # Initialize tools
+        pipedream_tool = PipedreamActionTool()
+        kb_tool = KnowledgeBaseQueryTool(backend_url=OPTIFLOW_BACKEND_URL, backend_api_key=OPTIFLOW_BACKEND_API_KEY)
         
-        logger.info("JarvisAgent fully initialized.")
+        return cls(stt_plugin, llm_plugin, tts_plugin, pipedream_tool, kb_tool, fast_llm_plugin, vad, turn_model, summary_llm_plugin)
 
-    async def poll_user_presence(self, user_id, room_id, session: AgentSession):
-        """Poll the Optiflow backend for user presence. If inactive, end the session."""
-        poll_interval = 30  # seconds
-        inactivity_limit = 10 * 60  # 10 minutes in seconds
-        last_active = time.time()
+    def start_keepalive(self, interval=PROVIDER_KEEPALIVE_INTERVAL):
+        """Periodically call the plugins' ``prewarm`` hooks (where available) to keep provider connections warm."""
+        if interval > 0 and self._keepalive_task is None:
+            self._keepalive_task = asyncio.create_task(self._keepalive(interval))
+
+    async def _keepalive(self, interval):
         while True:
-            try:
-                async with aiohttp.ClientSession() as client:
-                    async with client.post(
-                        f"{OPTIFLOW_BACKEND_URL}/api/presence/check",
-                        json={"userId": user_id},
-                        headers={"Content-Type": "application/json"}
-                    ) as resp:
-                        data = await resp.json()
-                        if not data.get("inactive", False):
-                            last_active = time.time()
-                        else:
-                            # If inactive for more than inactivity_limit, end session
-                            if time.time() - last_active > inactivity_limit:
-                                logger.info(f"[AGENT LEAVE] User {user_id} inactive for over 10 minutes. Jarvis agent leaving room: {room_id}")
-                                await send_agent_event("agent_leave", user_id, room_id)
-                                # TODO: Send agent leave event to monitoring/analytics service
-                                await session.send_data(json.dumps({
-                                    "type": "agent_status",
-                                    "status": "leaving_room",
-                                    "reason": "user_inactive"
-                                }))
-                                await session.tts.synthesize("I'll be here when you return. Goodbye!")
-                                await session.close()
-                                return
-            except Exception as e:
-                logger.error(f"Error polling user presence: {e}")
-            await asyncio.sleep(poll_interval)
+            for plugin in (self.stt_plugin, self.llm_plugin, self.fast_llm_plugin, self.summary_llm_plugin, self.tts_plugin):
+                prewarm = getattr(plugin, "prewarm", None)
+                if not callable(prewarm):
+                    continue
+                try:
+                    result = prewarm()
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    logger.warning(f"Keepalive for {type(plugin).__name__} failed: {e}")
+            await asyncio.sleep(interval)
+
+    def start_phrase_warmup(self):
+        """Load or synthesize the fixed utterances in the background; sessions use live TTS until it is done."""
+        if PHRASE_CACHE_ENABLED and self._phrase_warmup_task is None:
+            self._phrase_warmup_task = asyncio.create_task(
+                phrase_cache.warm(self.tts_plugin, [phrase_key(text) for text in FIXED_PHRASES])
+            )
+        return self._phrase_warmup_task
+
+    async def aclose(self):
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+        if self._phrase_warmup_task is not None:
+            self._phrase_warmup_task.cancel()
+            self._phrase_warmup_task = None
+        if self.turn_model is not None:
+            await self.turn_model.aclose()
+
+_worker_resources = None
+
+async def prewarm_worker() -> WorkerResources:
+    """Build the shared plugins and tools and open the HTTP pool, once per worker process."""
+    global _worker_resources
+    if _worker_resources is None:
+        started = time.perf_counter()
+        _worker_resources = WorkerResources.build()
+        http_client.get_session()
+        await metrics_exporter.start()
+        _worker_resources.start_keepalive()
+        _worker_resources.start_phrase_warmup()
+        worker_load.start()
+        _install_drain_handler()
+        logger.info(f"Worker prewarmed in {time.perf_counter() - started:.3f}s")
+    return _worker_resources
+
+# --- Barge-in ---
+BARGE_IN_ENABLED = os.getenv("BARGE_IN_ENABLED", "true").lower() == "true"
+BARGE_IN_MIN_WORDS = int(os.getenv("BARGE_IN_MIN_WORDS", "2"))  # interim words needed to interrupt; filters out "mm-hmm"
+
+class JarvisAgent(Agent):
+    def __init__(self, resources: WorkerResources):
+        super().__init__()
+        
+        # Shared, prewarmed plugins and tools; nothing provider-related is built per job
+        self.resources = resources
+        self.stt_plugin = resources.stt_plugin
+        self.llm_plugin = resources.llm_plugin
+        self.model_router = resources.model_router
+        self.tts_plugin = resources.tts_plugin
+        self.pipedream_tool = resources.pipedream_tool
+        self.kb_tool = resources.kb_tool
+        self._interrupt_requested_at = None  # set while a barge-in is cancelling the current response
+
+    async def handle_user_inactive(self, user_id, room_id, session: AgentSession):
+        """Called by the worker-wide presence service once the user has been inactive too long."""
+        try:
+            logger.info(f"[AGENT LEAVE] User {user_id} inactive for over 10 minutes. Jarvis agent leaving room: {room_id}")
+            send_agent_event("agent_leave", user_id, room_id)
+            # TODO: Send agent leave event to monitoring/analytics service
+            await session.send_data(json.dumps({
+                "type": "agent_status",
+                "status": "leaving_room",
+                "reason": "user_inactive"
+            }))
+            await self._say(session, GOODBYE_MESSAGE)
+            await session.close()
+        except Exception as e:
+            logger.error(f"Error ending inactive session: {e}")
 
     async def _main_agent_loop(self, session: AgentSession):
         user_id = session.participant.identity if session.participant else None
         room_id = session.room.name if session.room else None
         logger.info(f"[AGENT JOIN] Jarvis agent joining room: {room_id} for user: {user_id}")
-        await send_agent_event("agent_join", user_id, room_id)
+        send_agent_event("agent_join", user_id, room_id)
         initial_prompt = (
             "You are Jarvis, a highly capable AI assistant for Optiflow. "
             "Your primary user is an Optiflow user who is using your voice interface. "
@@ -301,91 +549,280 @@ class JarvisAgent(Agent):
             "(like Pipedream for external actions and a knowledge base for information retrieval), "
             "and respond in a helpful, concise, and professional manner. "
             "When a tool is used, summarize the outcome for the user. "
+            "If a tool result includes a fallback_response, say it to the user instead of retrying. "
             "If you need clarification, ask the user. "
             "Always confirm actions before execution if they are irreversible or sensitive. "
             "Keep your responses conversational but efficient."
         )
         
-        # Initialize chat history
-        chat_history = [lk_llm.ChatMessage(role=lk_llm.ChatRole.SYSTEM, content=initial_prompt)]
+        # Initialize token-budgeted chat history
+        # Summaries go to the tool-less summary client, never to the tool-calling tiers
+        memory = ConversationMemory(initial_prompt, summarizer_llm=self.resources.summary_llm_plugin)
+        current_memory.set(memory)  # tool outputs are recorded in it, trimmed
+        classifier = self.model_router.classifier()
         
-        # Send welcome message
-        welcome_message = "Hello, I'm Jarvis, your voice assistant for Optiflow. How can I help you today?"
-        await session.tts.synthesize(welcome_message)
-        await session.send_data(json.dumps({
-            "type": "agent_transcript", 
-            "transcript": welcome_message
-        }))
+        # Per-session latency samples; tool calls made inside this task pick them up too
+        session_metrics = SessionMetrics(room_id=room_id, user_id=user_id)
+        current_session_metrics.set(session_metrics)
+        
+        # Resume the conversation when this user was in this room recently (reconnect or worker restart)
+        checkpoint = None
+        if SESSION_CHECKPOINT_ENABLED and user_id and room_id:
+            checkpoint = SessionCheckpoint(session_store, f"{room_id}:{user_id}", memory)
+        if checkpoint and await checkpoint.restore():
+            await session.send_data(json.dumps({
+                "type": "session_resumed",
+                "turns": checkpoint.turns
+            }))
+        else:
+            # Send welcome message
+            await self._say(session, WELCOME_MESSAGE)
+            await session.send_data(json.dumps({
+                "type": "agent_transcript", 
+                "transcript": WELCOME_MESSAGE
+            }))
+        turn_base = checkpoint.turns if checkpoint else 0
         
-        # Start polling for user presence in the background
-        presence_task = None
+        # Let the worker-wide presence service watch this user
+        on_inactive = None
         if user_id and room_id:
-            presence_task = asyncio.create_task(self.poll_user_presence(user_id, room_id, session))
-        
-        # Main conversation loop
-        user_input_audio_stream = await session.stt.stream()
-        async for event in user_input_audio_stream:
-            if event.type == lk_stt.SpeechDataEvent.FINAL_TRANSCRIPT:
-                user_query = event.alternatives[0].text
-                if not user_query.strip():
-                    continue  # Skip empty transcripts
-                
-                logger.info(f"User said: {user_query}")
-                
+            on_inactive = lambda: self.handle_user_inactive(user_id, room_id, session)
+            presence_service.register(user_id, on_inactive)
+        
+        # Opt-in: start knowledge base searches from interim transcripts, before the user finishes speaking
+        prefetcher = None
+        if KB_PREFETCH_ENABLED and self.kb_tool.backend_url and self.kb_tool.backend_api_key:
+            # Same user id as tool_user_id(), so prefetched results share the tool's cache entries
+            prefetcher = KnowledgeBasePrefetcher(
+                lambda query: self.kb_tool._search(query, None, user_id),
+                user_id=user_id,
+            )
+        
+        response_task = None
+        turn_lock = asyncio.Lock()  # a turn started early and its final transcript never start responses concurrently
+        early_turn = None  # (first message seq, confirmation) of the last turn started before its final transcript
+        
+        async def start_turn(user_query: str):
+            nonlocal response_task, early_turn
+            confirmation = current_turn_confirmation.get()
+            async with turn_lock:
+                if confirmation is not None and confirmation.done() and not confirmation.result():
+                    return  # corrected before this early turn got to start
+                if response_task and not response_task.done():
+                    if BARGE_IN_ENABLED:
+                        await self._interrupt(response_task)
+                    else:
+                        await response_task
+                if early_turn is not None:
+                    seq, early_confirmation = early_turn
+                    early_turn = None
+                    if early_confirmation.done() and not early_confirmation.result():
+                        # The final transcript corrected the early turn: it is replaced, not followed
+                        memory.rollback(seq)
+                        if checkpoint:
+                            checkpoint.rewind(seq)
+                if confirmation is not None:
+                    early_turn = (memory.appended, confirmation)
+                trace = TurnTrace(session_metrics)
+                current_action_turn.set(uuid.uuid4().hex)  # repeated actions are deduplicated within this turn only
+                set_log_context(turn_id=turn_base + session_metrics.turns + 1)
+            
+                logger.info("User said: %s", user_query, extra={"transcript": True})
+            
                 # Send user transcript to frontend
                 await session.send_data(json.dumps({
                     "type": "user_transcript", 
                     "transcript": user_query
                 }))
-                
+            
                 # Add user message to chat history
-                chat_history.append(lk_llm.ChatMessage(role=lk_llm.ChatRole.USER, content=user_query))
-                
-                # Stream response from LLM to TTS
-                llm_stream = await self.llm_plugin.chat(history=chat_history)
-                tts_input_stream = lk_tts.SynthesizeStream()
-                await session.tts.play(tts_input_stream)
-                
-                full_response_text = ""
-                async for llm_event in llm_stream:
-                    if llm_event.type == lk_llm.LLMChunkEvent.CHUNK:
-                        full_response_text += llm_event.text
-                        tts_input_stream.push_text(llm_event.text)
-                
-                tts_input_stream.mark_segment_end()
-                
-                # Add assistant message to chat history
-                chat_history.append(lk_llm.ChatMessage(
-                    role=lk_llm.ChatRole.ASSISTANT, 
-                    content=full_response_text
-                ))
-                
-                # Send agent transcript to frontend
-                await session.send_data(json.dumps({
-                    "type": "agent_transcript", 
-                    "transcript": full_response_text
-                }))
+                memory.add_user(user_query)
+                retrieved_context = await prefetcher.take(user_query) if prefetcher else None
+                route = classifier.route(user_query, retrieved_context)
+                logger.info("Routing turn to the %s model (%s)", route.tier, route.reason)
+            
+                response_task = asyncio.create_task(
+                    self._respond(session, memory, trace, session_metrics, route, retrieved_context)
+                )
+                if checkpoint:
+                    # Once with the user's message, and again when the (possibly interrupted) response is recorded
+                    checkpoint.save(turn_base + session_metrics.turns)
+                    response_task.add_done_callback(
+                        lambda _: checkpoint.save(turn_base + session_metrics.turns)
+                    )
+        
+        # Local endpointing: start the response as soon as the shared turn model is confident
+        # the user has finished, instead of waiting for the STT provider's final transcript
+        endpointer = None
+        vad_task = None
+        audio_buffer = None
+        if self.resources.vad is not None and self.resources.turn_model is not None and session.participant:
+            endpointer = TurnEndpointer(
+                self.resources.turn_model,
+                start_turn,
+                context=lambda: memory.messages()[1:][-ENDPOINTING_CONTEXT_MESSAGES:],
+            )
+            # Preallocated once per session; microphone frames pass through it without per-frame allocation
+            audio_buffer = AudioRingBuffer(sample_rate=VAD_SAMPLE_RATE, name="input")
+            vad_task = asyncio.create_task(
+                run_vad(self.resources.vad, user_audio_frames(session), endpointer, audio_buffer)
+            )
+        
+        try:
+            # Main conversation loop. STT events keep being read while a response is playing,
+            # so the user can interrupt it.
+            user_input_audio_stream = await session.stt.stream()
+            async for event in user_input_audio_stream:
+                if event.type == lk_stt.SpeechDataEvent.INTERIM_TRANSCRIPT:
+                    partial = event.alternatives[0].text
+                    if prefetcher:
+                        prefetcher.on_interim(partial)
+                    if endpointer:
+                        if endpointer.covers(partial):
+                            continue  # a late transcript of the turn that already started, not the user talking over it
+                        endpointer.on_interim(partial)
+                    if (
+                        BARGE_IN_ENABLED
+                        and response_task and not response_task.done()
+                        and len(partial.split()) >= BARGE_IN_MIN_WORDS
+                    ):
+                        await self._interrupt(response_task)
                 
-                logger.info(f"Jarvis responded: {full_response_text}")
+                elif event.type == lk_stt.SpeechDataEvent.FINAL_TRANSCRIPT:
+                    user_query = event.alternatives[0].text
+                    if not user_query.strip():
+                        continue  # Skip empty transcripts
+                    if endpointer and endpointer.on_final(user_query):
+                        continue  # already answering it
+                    await start_turn(user_query)
                 
-            elif event.type == lk_stt.SpeechDataEvent.ERROR:
-                error_msg = f"Speech recognition error: {event.error}"
-                logger.error(error_msg)
-                await session.send_data(json.dumps({
-                    "type": "error", 
-                    "message": error_msg
-                }))
+                elif event.type == lk_stt.SpeechDataEvent.ERROR:
+                    if response_task and not response_task.done():
+                        await self._interrupt(response_task)
+                    error_msg = f"Speech recognition error: {event.error}"
+                    logger.error(error_msg)
+                    await session.send_data(json.dumps({
+                        "type": "error", 
+                        "message": error_msg
+                    }))
                 
-                # Also synthesize the error message
-                await session.tts.synthesize("I'm having trouble understanding you. Could you try again?")
-                break
-            finally:
-                if presence_task:
-                    presence_task.cancel()
-                logger.info(f"[AGENT LEAVE] Jarvis agent leaving room: {room_id} for user: {user_id}")
-                await send_agent_event("agent_leave", user_id, room_id)
-
-    async def process_job(self, job: JobContext):
+                    # Also synthesize the error message
+                    await self._say(session, STT_ERROR_MESSAGE)
+                    break
+            
+            # Let the last response finish once the user has stopped talking
+            if response_task:
+                await response_task
+                response_task = None
+        finally:
+            if response_task and not response_task.done():
+                response_task.cancel()
+                try:
+                    await response_task
+                except asyncio.CancelledError:
+                    pass
+            if vad_task:
+                vad_task.cancel()
+                try:
+                    await vad_task
+                except (asyncio.CancelledError, Exception):
+                    pass
+            if endpointer:
+                await endpointer.aclose()
+            if on_inactive:
+                presence_service.unregister(user_id, on_inactive)
+            if prefetcher:
+                await prefetcher.aclose()
+            await memory.aclose()
+            session_summary = session_metrics.summary()
+            if audio_buffer:
+                session_summary["audio"] = audio_buffer.stats()
+            logger.info("[AGENT LEAVE] Jarvis agent leaving room: %s for user: %s, session summary: %s", room_id, user_id, session_summary)
+            send_agent_event("agent_leave", user_id, room_id, details={"session_summary": session_summary})
+
+    async def _respond(self, session: AgentSession, memory: ConversationMemory, trace: TurnTrace,
+                       session_metrics: SessionMetrics, route: Route, retrieved_context: str = None):
+        """Stream one LLM response to TTS. On cancellation (barge-in), only the part the user has
+        heard is kept in the chat history."""
+        trace.llm_request_sent()
+        llm_stream = await self.model_router.chat(route, history=memory.messages(retrieved_context))
+        tts_input_stream = lk_tts.SynthesizeStream()
+        await session.tts.play(tts_input_stream)
+        
+        # Segment the token stream into speakable chunks before handing it to TTS
+        chunker = SentenceChunker()
+        playback = PlaybackEstimate()
+        try:
+            async for llm_event in llm_stream:
+                if llm_event.type == lk_llm.LLMChunkEvent.CHUNK:
+                    trace.llm_token()
+                    for chunk in chunker.push(llm_event.text):
+                        tts_input_stream.push_text(chunk + " ")
+                        playback.queued(chunk + " ")
+                        trace.tts_chunk_queued()
+            
+            for chunk in chunker.flush():
+                tts_input_stream.push_text(chunk)
+                playback.queued(chunk)
+                trace.tts_chunk_queued()
+            tts_input_stream.mark_segment_end()
+        except asyncio.CancelledError:
+            await llm_stream.aclose()
+            await tts_input_stream.aclose()
+            if self._interrupt_requested_at is None:
+                raise  # session teardown, not a barge-in
+            generated_text = chunker.text()
+            spoken_text = playback.spoken_text()
+            record_barge_in(
+                session_metrics,
+                stop_seconds=time.perf_counter() - self._interrupt_requested_at,
+                chars_saved=len(generated_text) - len(spoken_text),
+                tokens_saved=estimate_tokens(generated_text) - estimate_tokens(spoken_text),
+            )
+            if spoken_text:
+                memory.add_assistant(spoken_text + " …")
+            logger.info("Jarvis interrupted after: %s", spoken_text, extra={"transcript": True})
+            await session.send_data(json.dumps({
+                "type": "agent_transcript",
+                "transcript": spoken_text,
+                "interrupted": True
+            }))
+            raise
+        trace.finish()
+        full_response_text = chunker.text()
+        
+        # Add assistant message to chat history
+        memory.add_assistant(full_response_text)
+        
+        # Send agent transcript to frontend
+        await session.send_data(json.dumps({
+            "type": "agent_transcript", 
+            "transcript": full_response_text
+        }))
+        
+        logger.info("Jarvis responded: %s", full_response_text, extra={"transcript": True})
+
+    async def _say(self, session: AgentSession, text: str):
+        """Speak a fixed utterance from the phrase audio cache, falling back to live synthesis."""
+        audio = phrase_cache.get(phrase_key(text)) if PHRASE_CACHE_ENABLED else None
+        if audio is None:
+            await session.tts.synthesize(text)
+        else:
+            await session.say(text, audio=audio.frames())
+
+    async def _interrupt(self, response_task: asyncio.Task):
+        """Barge-in: cancel the in-flight response and wait until its streams are closed."""
+        self._interrupt_requested_at = time.perf_counter()
+        response_task.cancel()
+        try:
+            await response_task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._interrupt_requested_at = None
+
+    async def process_job(self, job: JobContext, received_at: float = None):
+        set_log_context(session_id=job.id, room_id=job.room.name if job.room else None)
         logger.info(f"JarvisAgent processing job: {job.id} for participant: {job.participant.identity if job.participant else 'N/A'}")
         
         session = AgentSession(
@@ -399,6 +836,11 @@ class JarvisAgent(Agent):
             audio_publish_options=None,  # Agent typically doesn't publish its own mic
         )
         
+        if received_at is not None:
+            setup_seconds = time.perf_counter() - received_at
+            job_setup.observe(setup_seconds)
+            logger.info(f"Job {job.id} set up in {setup_seconds * 1000:.1f}ms")
+        
         try:
             await self._main_agent_loop(session)
         except Exception as e:
@@ -413,7 +855,7 @@ class JarvisAgent(Agent):
                 }))
                 
                 # Also try to speak the error if TTS is available
-                await session.tts.synthesize("I'm sorry, but I've encountered an internal error. Please try reconnecting.")
+                await self._say(session, INTERNAL_ERROR_MESSAGE)
             except Exception as send_e:
                 logger.error(f"Failed to send error to client: {send_e}")
         finally:
@@ -423,27 +865,84 @@ async def request_fnc(job_request: JobContext):
     logger.info(f"Received job request: {job_request.id}, type: {job_request.type}")
     
     if job_request.type == JobType.JT_AGENT:
-        agent = JarvisAgent()
-        await agent.process_job(job_request)
+        received_at = time.perf_counter()
+        resources = await prewarm_worker()
+        # An overloaded or draining process declines the job so the dispatcher can place it elsewhere
+        if not await worker_load.admit():
+            logger.warning(f"Declining job {job_request.id}: worker load {worker_load.load():.2f}, draining={worker_load.draining}")
+            await job_request.reject()
+            return
+        worker_load.session_started()
+        try:
+            agent = JarvisAgent(resources)
+            await agent.process_job(job_request, received_at=received_at)
+        finally:
+            worker_load.session_finished()
     else:
         logger.warning(f"Unhandled job type: {job_request.type}")
 
+async def shutdown_worker():
+    """Release worker-wide resources; queued agent events are flushed before the HTTP pool closes."""
+    logger.info("Shutting down Jarvis Agent Worker resources.")
+    if _worker_resources is not None:
+        await _worker_resources.aclose()
+    phrase_cache.close()
+    await session_store.close()
+    await presence_service.stop()
+    await event_emitter.drain()
+    await metrics_exporter.stop()
+    await worker_load.stop()
+    await close_http_client()
+
+async def drain_worker():
+    """Stop accepting jobs, let active conversations finish, then release worker resources."""
+    await worker_load.drain()
+    await shutdown_worker()
+
+def _install_drain_handler():
+    """On SIGTERM, drain instead of dying mid-conversation, then exit with the default SIGTERM behaviour."""
+    loop = asyncio.get_running_loop()
+
+    async def drain_and_exit():
+        try:
+            await drain_worker()
+        finally:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+    def on_sigterm():
+        loop.remove_signal_handler(signal.SIGTERM)
+        logger.info("SIGTERM received, draining worker")
+        asyncio.ensure_future(drain_and_exit())
+
+    try:
+        loop.add_signal_handler(signal.SIGTERM, on_sigterm)
+    except (NotImplementedError, RuntimeError, ValueError):
+        logger.warning("Cannot install SIGTERM drain handler in this process")
+
 async def run_agent_worker():
     if not LIVEKIT_WS_URL:
         raise ValueError("LIVEKIT_WS_URL is not set in environment variables.")
     
     worker_opts = WorkerOptions(
         request_handler=request_fnc,
+        load_fnc=worker_load.load,
+        load_threshold=WORKER_LOAD_THRESHOLD,
     )
     
     logger.info(f"Starting Jarvis Agent Worker, connecting to LiveKit: {LIVEKIT_WS_URL}")
     
-    # This is placeholder code - you would use the livekit-server agent CLI in production
-    # For example: livekit-server agent run main_agent:request_fnc --url $LIVEKIT_WS_URL --api-key $LIVEKIT_API_KEY --api-secret $LIVEKIT_API_SECRET
-    
-    print("Jarvis Agent Worker defined. To run:")
-    print("1. Ensure all .env variables are set (LIVEKIT_WS_URL, API keys, etc.).")
-    print("2. Use LiveKit CLI: `livekit-server agent run main_agent:request_fnc --url $LIVEKIT_WS_URL --api-key $LIVEKIT_API_KEY --api-secret $LIVEKIT_API_SECRET`")
+    try:
+        await prewarm_worker()
+        
+        # This is placeholder code - you would use the livekit-server agent CLI in production
+        # For example: livekit-server agent run main_agent:request_fnc --url $LIVEKIT_WS_URL --api-key $LIVEKIT_API_KEY --api-secret $LIVEKIT_API_SECRET
+        
+        print("Jarvis Agent Worker defined. To run:")
+        print("1. Ensure all .env variables are set (LIVEKIT_WS_URL, API keys, etc.).")
+        print("2. Use LiveKit CLI: `livekit-server agent run main_agent:request_fnc --url $LIVEKIT_WS_URL --api-key $LIVEKIT_API_KEY --api-secret $LIVEKIT_API_SECRET`")
+    finally:
+        await shutdown_worker()
 
 if __name__ == "__main__":
     print("Jarvis Voice Agent Script")
@@ -0,0 +1,346 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
+import math
+import os
+import logging
+import json
+import time
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 disables the scrape endpoint
+METRICS_JSON_PATH = os.getenv("METRICS_JSON_PATH")  # unset disables the periodic JSON dump
+METRICS_DUMP_INTERVAL = float(os.getenv("METRICS_DUMP_INTERVAL", "60"))  # seconds
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0)
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style, optionally split by labels."""
+
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}  # label tuple -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, series in self._series.items():
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+    def snapshot(self) -> dict:
+        return {
+            _format_labels(key) or "all": {
+                "count": series[-1],
+                "sum": series[-2],
+                "buckets": dict(zip(self.buckets, series)),
+            }
+            for key, series in self._series.items()
+        }
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+    def snapshot(self) -> dict:
+        return {_format_labels(key) or "all": value for key, value in self._values.items()}
+
+
+class MetricsRegistry:
+    """Process-wide registry of histograms, counters and gauge callbacks."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._gauges = {}  # prefix -> callable returning a flat dict of numbers
+
+    def histogram(self, name: str, help_text: str, buckets=LATENCY_BUCKETS) -> Histogram:
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, help_text, buckets)
+        return self._metrics[name]
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        if name not in self._metrics:
+            self._metrics[name] = Counter(name, help_text)
+        return self._metrics[name]
+
+    def register_gauges(self, prefix: str, collect):
+        """Expose every numeric value returned by ``collect()`` as a gauge named ``<prefix>_<key>``."""
+        self._gauges[prefix] = collect
+
+    def _collect_gauges(self) -> dict:
+        values = {}
+        for prefix, collect in self._gauges.items():
+            try:
+                for key, value in collect().items():
+                    if isinstance(value, (int, float)):
+                        values[f"{prefix}_{key}"] = value
+            except Exception as e:
+                logger.error(f"Error collecting gauges '{prefix}': {e}")
+        return values
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for name, value in self._collect_gauges().items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        data = {name: metric.snapshot() for name, metric in self._metrics.items()}
+        data["gauges"] = self._collect_gauges()
+        data["timestamp"] = int(time.time())
+        return data
+
+
+registry = MetricsRegistry()
+
+turn_first_audio = registry.histogram(
+    "voice_turn_first_audio_seconds", "Final transcript to first TTS chunk queued")
+turn_duration = registry.histogram(
+    "voice_turn_duration_seconds", "Final transcript to last LLM token")
+llm_first_token = registry.histogram(
+    "voice_llm_first_token_seconds", "LLM request sent to first token")
+llm_duration = registry.histogram(
+    "voice_llm_duration_seconds", "LLM request sent to last token")
+tool_duration = registry.histogram(
+    "voice_tool_duration_seconds", "Tool call duration")
+job_setup = registry.histogram(
+    "voice_job_setup_seconds", "Job request received to agent session ready")
+tool_errors = registry.counter(
+    "voice_tool_errors_total", "Tool calls that raised")
+tool_cancellations = registry.counter(
+    "voice_tool_cancellations_total", "Tool calls cancelled, e.g. by a barge-in")
+barge_in_stop = registry.histogram(
+    "voice_barge_in_stop_seconds", "User speech detected to LLM and TTS streams cancelled")
+interrupted_turns = registry.counter(
+    "voice_interrupted_turns_total", "Agent responses cut off by the user speaking")
+barge_in_chars_saved = registry.counter(
+    "voice_barge_in_tts_chars_saved_total", "Generated response characters never spoken because of barge-in")
+barge_in_tokens_saved = registry.counter(
+    "voice_barge_in_history_tokens_saved_total", "Unspoken response tokens kept out of the chat history")
+
+
+class SessionMetrics:
+    """Per-session latency samples, summarized when the agent leaves the room."""
+
+    def __init__(self, room_id: str = None, user_id: str = None):
+        self.room_id = room_id
+        self.user_id = user_id
+        self.started_at = time.time()
+        self.turns = 0
+        self.interrupted = 0
+        self.samples = {}  # metric name -> list of seconds
+
+    def record(self, name: str, seconds: float):
+        self.samples.setdefault(name, []).append(seconds)
+
+    def summary(self) -> dict:
+        return {
+            "room_id": self.room_id,
+            "user_id": self.user_id,
+            "duration_seconds": round(time.time() - self.started_at, 3),
+            "turns": self.turns,
+            "interrupted": self.interrupted,
+            "latency": {
+                name: {
+                    "count": len(values),
+                    "p50": round(percentile(values, 50), 4),
+                    "p95": round(percentile(values, 95), 4),
+                    "max": round(max(values), 4),
+                }
+                for name, values in self.samples.items()
+            },
+        }
+
+
+# Lets tools running inside a session's task tree attribute their spans to that session
+current_session_metrics = contextvars.ContextVar("current_session_metrics", default=None)
+
+
+class TurnTrace:
+    """Timing marks for one conversational turn, from final transcript to last LLM token."""
+
+    def __init__(self, session_metrics: SessionMetrics = None):
+        self.session_metrics = session_metrics
+        self.transcript_at = time.perf_counter()
+        self.llm_request_at = None
+        self.llm_first_token_at = None
+        self.llm_last_token_at = None
+        self.tts_first_chunk_at = None
+
+    def llm_request_sent(self):
+        self.llm_request_at = time.perf_counter()
+
+    def llm_token(self):
+        now = time.perf_counter()
+        if self.llm_first_token_at is None:
+            self.llm_first_token_at = now
+        self.llm_last_token_at = now
+
+    def tts_chunk_queued(self):
+        if self.tts_first_chunk_at is None:
+            self.tts_first_chunk_at = time.perf_counter()
+
+    def finish(self):
+        spans = []
+        if self.tts_first_chunk_at is not None:
+            spans.append((turn_first_audio, "first_audio", self.tts_first_chunk_at - self.transcript_at))
+        if self.llm_last_token_at is not None:
+            spans.append((turn_duration, "turn", self.llm_last_token_at - self.transcript_at))
+            spans.append((llm_first_token, "llm_first_token", self.llm_first_token_at - self.llm_request_at))
+            spans.append((llm_duration, "llm", self.llm_last_token_at - self.llm_request_at))
+        for histogram, name, seconds in spans:
+            histogram.observe(seconds)
+            if self.session_metrics is not None:
+                self.session_metrics.record(name, seconds)
+        if self.session_metrics is not None:
+            self.session_metrics.turns += 1
+
+
+def record_barge_in(session_metrics: SessionMetrics, stop_seconds: float, chars_saved: int, tokens_saved: int):
+    """Record one interrupted response."""
+    interrupted_turns.inc()
+    barge_in_stop.observe(stop_seconds)
+    barge_in_chars_saved.inc(chars_saved)
+    barge_in_tokens_saved.inc(tokens_saved)
+    if session_metrics is not None:
+        session_metrics.interrupted += 1
+        session_metrics.record("barge_in_stop", stop_seconds)
+
+
+@contextlib.asynccontextmanager
+async def tool_span(tool_name: str):
+    """Time a tool call into the worker histogram and the current session's samples.
+
+    Cancellation (a barge-in or session teardown) is counted separately from errors.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except asyncio.CancelledError:
+        tool_cancellations.inc(tool=tool_name)
+        raise
+    except BaseException:
+        tool_errors.inc(tool=tool_name)
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        tool_duration.observe(seconds, tool=tool_name)
+        session_metrics = current_session_metrics.get()
+        if session_metrics is not None:
+            session_metrics.record(f"tool:{tool_name}", seconds)
+
+
+def traced_tool(tool_name: str):
+    """Decorator wrapping a tool's ``arun`` in a :func:`tool_span`."""
+    def decorator(arun):
+        @functools.wraps(arun)
+        async def wrapper(*args, **kwargs):
+            async with tool_span(tool_name):
+                return await arun(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class MetricsExporter:
+    """Serves ``/metrics`` (Prometheus text) and ``/metrics.json``, and optionally dumps JSON periodically."""
+
+    def __init__(self, port=METRICS_PORT, json_path=METRICS_JSON_PATH, dump_interval=METRICS_DUMP_INTERVAL):
+        self.port = port
+        self.json_path = json_path
+        self.dump_interval = dump_interval
+        self._runner = None
+        self._dump_task = None
+
+    async def start(self):
+        if self.port and self._runner is None:
+            app = web.Application()
+            app.router.add_get("/metrics", self._handle_prometheus)
+            app.router.add_get("/metrics.json", self._handle_json)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, "0.0.0.0", self.port).start()
+            logger.info(f"Metrics endpoint listening on :{self.port}/metrics")
+        if self.json_path and self._dump_task is None:
+            self._dump_task = asyncio.create_task(self._dump_loop())
+
+    async def _handle_prometheus(self, request):
+        return web.Response(text=registry.render_prometheus(), content_type="text/plain")
+
+    async def _handle_json(self, request):
+        return web.json_response(registry.snapshot())
+
+    async def _dump_loop(self):
+        while True:
+            await asyncio.sleep(self.dump_interval)
+            self.dump()
+
+    def dump(self):
+        try:
+            with open(self.json_path, "w") as f:
+                json.dump(registry.snapshot(), f)
+        except Exception as e:
+            logger.error(f"Error writing metrics dump: {e}")
+
+    async def stop(self):
+        if self._dump_task is not None:
+            self._dump_task.cancel()
+            self._dump_task = None
+            self.dump()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+metrics_exporter = MetricsExporter()
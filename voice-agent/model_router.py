@@ -0,0 +1,190 @@
+import contextvars
+import json
+import os
+import logging
+import re
+import time
+from livekit.agents import llm as lk_llm, tools as lk_tools
+from metrics import registry
+from tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+LLM_ROUTER_ENABLED = os.getenv("LLM_ROUTER_ENABLED", "true").lower() == "true"
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-4o-mini")
+LLM_CAPABLE_MODEL = os.getenv("LLM_CAPABLE_MODEL", "gpt-4-turbo-preview")
+LLM_ROUTER_FAST_MAX_WORDS = int(os.getenv("LLM_ROUTER_FAST_MAX_WORDS", "12"))  # longer utterances go to the capable model
+LLM_ROUTER_TOOL_TERMS = os.getenv(
+    "LLM_ROUTER_TOOL_TERMS",
+    "send,email,mail,create,add,schedule,book,remind,reminder,calendar,meeting,task,ticket,"
+    "asana,jira,slack,notion,hubspot,salesforce,crm,workflow,automation,update,delete,cancel,"
+    "search,find,look up,document,docs,policy,guide,knowledge,report,file",
+)
+
+FAST, CAPABLE = "fast", "capable"
+
+_TOOL_TERMS = re.compile(
+    r"\b(?:" + "|".join(re.escape(term.strip()) for term in LLM_ROUTER_TOOL_TERMS.split(",") if term.strip()) + r")s?\b",
+    re.IGNORECASE,
+)
+# Short replies that confirm or continue what the capable model just proposed ("yes, do it")
+_FOLLOW_UP = re.compile(
+    r"^(?:yes|yeah|yep|sure|ok(?:ay)?|please|do it|go ahead|confirm(?:ed)?|that one|the (?:first|second|third|last) one)\b",
+    re.IGNORECASE,
+)
+
+llm_tier_turns = registry.counter(
+    "voice_llm_tier_turns_total", "LLM turns by model tier and routing reason")
+llm_tier_escalations = registry.counter(
+    "voice_llm_tier_escalations_total", "Fast-tier turns handed to the capable model because a tool was needed")
+llm_tier_tokens = registry.counter(
+    "voice_llm_tier_tokens_total", "Estimated prompt and completion tokens by model tier")
+llm_tier_first_token = registry.histogram(
+    "voice_llm_tier_first_token_seconds", "LLM request to first token, by model tier")
+llm_tier_duration = registry.histogram(
+    "voice_llm_tier_duration_seconds", "LLM request to last token, by model tier")
+
+
+class Route:
+    """The tier chosen for one turn and why."""
+
+    __slots__ = ("tier", "reason", "escalated")
+
+    def __init__(self, tier: str, reason: str):
+        self.tier = tier
+        self.reason = reason
+        self.escalated = False
+
+
+class TurnClassifier:
+    """Per-session routing heuristics; local and allocation-light, so routing adds no latency.
+
+    A turn goes to the capable model when it likely needs a tool (action or knowledge
+    terms), when it is long, when prefetched knowledge base results come with it, or when
+    it is a short follow-up ("yes, go ahead") to a turn the capable model handled, since
+    confirming an action needs the tool-calling model. Everything else goes to the fast model.
+    """
+
+    def __init__(self, fast_max_words=LLM_ROUTER_FAST_MAX_WORDS):
+        self.fast_max_words = fast_max_words
+        self._last_route = None
+
+    def route(self, text: str, retrieved_context: str = None) -> Route:
+        words = len(text.split())
+        if retrieved_context:
+            route = Route(CAPABLE, "knowledge")
+        elif _TOOL_TERMS.search(text):
+            route = Route(CAPABLE, "tool_terms")
+        elif words > self.fast_max_words:
+            route = Route(CAPABLE, "long")
+        elif self._capable_last_turn() and _FOLLOW_UP.match(text.strip()):
+            route = Route(CAPABLE, "follow_up")
+        else:
+            route = Route(FAST, "simple")
+        self._last_route = route
+        return route
+
+    def _capable_last_turn(self) -> bool:
+        last = self._last_route
+        return last is not None and (last.tier == CAPABLE or last.escalated)
+
+
+# Set for the duration of a fast-tier request, so escalation tools can flag the turn
+_current_route = contextvars.ContextVar("current_route", default=None)
+
+
+class EscalationTool(lk_tools.Tool):
+    """Stands in for a real tool on the fast model: calling it hands the turn to the capable model."""
+
+    def __init__(self, tool):
+        super().__init__(name=tool.name, description=tool.description)
+
+    async def arun(self, ctx, **kwargs) -> str:
+        route = _current_route.get()
+        if route is not None:
+            route.escalated = True
+        return json.dumps({"status": "escalated", "message": "Handing this request to the main model."})
+
+
+class ModelRouter:
+    """Sends each turn to the fast or the capable LLM and escalates when the fast one wants a tool.
+
+    Both tiers get the same chat history, so the conversation stays consistent whichever
+    model answered a given turn. The fast model sees ``EscalationTool`` stand-ins instead
+    of the real tools; if it calls one, its stream is closed and the same request is sent
+    to the capable model, which runs the real tool. Per-tier latency and token estimates are
+    recorded for every request.
+    """
+
+    def __init__(self, fast_llm, capable_llm, tools=()):
+        self.fast_llm = fast_llm
+        self.capable_llm = capable_llm
+        self.capable_llm.tools = list(tools)
+        if fast_llm is not None:
+            fast_llm.tools = [EscalationTool(tool) for tool in tools]
+
+    @property
+    def enabled(self) -> bool:
+        return self.fast_llm is not None
+
+    def classifier(self) -> TurnClassifier:
+        return TurnClassifier()
+
+    async def chat(self, route: Route, history: list):
+        """Start the request for ``route`` and return an async iterator of LLM events."""
+        if not self.enabled:
+            route = Route(CAPABLE, "router_disabled")
+        llm_tier_turns.inc(tier=route.tier, reason=route.reason)
+        prompt_tokens = sum(estimate_tokens(message.content) for message in history)
+        return self._stream(route, history, prompt_tokens)
+
+    async def _stream(self, route: Route, history: list, prompt_tokens: int):
+        if route.tier == FAST:
+            _current_route.set(route)
+            fast_stream = self._timed(FAST, self.fast_llm, history, prompt_tokens)
+            chunks = 0
+            try:
+                async for llm_event in fast_stream:
+                    if route.escalated:
+                        break
+                    chunks += 1
+                    yield llm_event
+            finally:
+                # Close (and so record) the fast request now, also when escalating or cancelled
+                await fast_stream.aclose()
+                _current_route.set(None)
+            if not route.escalated:
+                return
+            llm_tier_escalations.inc(after_chunks=str(chunks > 0).lower())
+            logger.info("Fast model asked for a tool; escalating turn to the capable model")
+        capable_stream = self._timed(CAPABLE, self.capable_llm, history, prompt_tokens)
+        try:
+            async for llm_event in capable_stream:
+                yield llm_event
+        finally:
+            await capable_stream.aclose()
+
+    async def _timed(self, tier: str, plugin, history: list, prompt_tokens: int):
+        started = time.perf_counter()
+        first_token_at = None
+        completion_tokens = 0
+        llm_stream = await plugin.chat(history=history)
+        try:
+            async for llm_event in llm_stream:
+                if llm_event.type == lk_llm.LLMChunkEvent.CHUNK:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        llm_tier_first_token.observe(first_token_at - started, tier=tier)
+                    completion_tokens += estimate_tokens(llm_event.text)
+                yield llm_event
+        finally:
+            aclose = getattr(llm_stream, "aclose", None)
+            if aclose is not None:
+                try:
+                    await aclose()
+                except Exception:
+                    pass
+            llm_tier_duration.observe(time.perf_counter() - started, tier=tier)
+            llm_tier_tokens.inc(prompt_tokens, tier=tier, kind="prompt")
+            llm_tier_tokens.inc(completion_tokens, tier=tier, kind="completion")
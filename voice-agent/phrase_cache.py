@@ -0,0 +1,188 @@
+import hashlib
+import inspect
+import mmap
+import os
+import logging
+import struct
+from livekit import rtc
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+PHRASE_CACHE_ENABLED = os.getenv("PHRASE_CACHE_ENABLED", "true").lower() == "true"
+PHRASE_CACHE_DIR = os.getenv("PHRASE_CACHE_DIR", ".phrase_cache")
+PHRASE_FRAME_MS = int(os.getenv("PHRASE_FRAME_MS", "20"))  # duration of each frame streamed to the session
+
+# File layout: header, then raw interleaved 16-bit little-endian PCM, so the samples can be
+# memory-mapped and sliced into frames without decoding or copying the whole file.
+_MAGIC = b"JPA1"
+_HEADER = struct.Struct("<4sIHH")  # magic, sample_rate, num_channels, reserved
+_SAMPLE_WIDTH = 2
+
+
+class PhraseAudio:
+    """Memory-mapped PCM for one cached phrase."""
+
+    def __init__(self, path: str):
+        """Map ``path``; raises ValueError when it is empty, truncated or not a phrase audio file."""
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)  # ValueError when empty
+        if len(self._mmap) < _HEADER.size:
+            self._mmap.close()
+            raise ValueError(f"{path} is truncated")
+        magic, self.sample_rate, self.num_channels, _ = _HEADER.unpack_from(self._mmap, 0)
+        frame_width = self.num_channels * _SAMPLE_WIDTH
+        if magic != _MAGIC or not self.sample_rate or not frame_width or (len(self._mmap) - _HEADER.size) % frame_width:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a valid phrase audio file")
+        self.pcm = memoryview(self._mmap)[_HEADER.size:]
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / (self.sample_rate * self.num_channels * _SAMPLE_WIDTH)
+
+    async def frames(self, frame_ms=PHRASE_FRAME_MS):
+        """Yield the audio as ``rtc.AudioFrame`` objects of ``frame_ms`` each."""
+        samples_per_frame = self.sample_rate * frame_ms // 1000
+        frame_bytes = samples_per_frame * self.num_channels * _SAMPLE_WIDTH
+        for offset in range(0, len(self.pcm), frame_bytes):
+            data = self.pcm[offset:offset + frame_bytes]
+            yield rtc.AudioFrame(
+                data=data,
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+                samples_per_channel=len(data) // (self.num_channels * _SAMPLE_WIDTH),
+            )
+
+    def close(self):
+        try:
+            self.pcm.release()
+            self._mmap.close()
+        except BufferError:
+            # A frame still references the mapping; it is unmapped once that frame is collected
+            pass
+
+
+class PhraseAudioCache:
+    """Synthesized audio for fixed agent utterances, persisted across restarts.
+
+    Phrases are keyed by (text, voice_id, model_id, encoding), so changing the voice or model
+    never plays stale audio. ``warm`` loads phrases from ``cache_dir`` and synthesizes only
+    the missing ones; a file that cannot be loaded is deleted and synthesized again. Sessions
+    then stream the memory-mapped audio without a TTS round trip.
+    """
+
+    def __init__(self, cache_dir=PHRASE_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._entries = {}  # key -> PhraseAudio
+
+        self.hits = 0
+        self.misses = 0
+        self.loaded = 0
+        self.synthesized = 0
+        self.corrupt = 0
+        self.failed = 0
+
+    @staticmethod
+    def make_key(text: str, voice_id: str, model_id: str, encoding: str) -> tuple:
+        return (text, voice_id or "", model_id or "", str(encoding))
+
+    def _path(self, key) -> str:
+        digest = hashlib.sha256("\x1f".join(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.pcm")
+
+    def get(self, key):
+        audio = self._entries.get(key)
+        if audio is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return audio
+
+    async def warm(self, tts_plugin, keys):
+        """Load each phrase from disk, or synthesize it with ``tts_plugin`` and persist it."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for key in keys:
+            if key in self._entries:
+                continue
+            path = self._path(key)
+            try:
+                audio = self._load(path) if os.path.exists(path) else None
+                if audio is None:
+                    pcm = await self._synthesize(tts_plugin, key[0])
+                    if pcm is None:
+                        continue
+                    self._write(path, *pcm)
+                    self.synthesized += 1
+                    audio = PhraseAudio(path)
+                else:
+                    self.loaded += 1
+                self._entries[key] = audio
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"Could not cache phrase audio for '{key[0]}': {e}")
+        logger.info(
+            f"Phrase audio cache warm: {len(self._entries)} phrases "
+            f"({self.loaded} from disk, {self.synthesized} synthesized)"
+        )
+
+    def _load(self, path: str):
+        """The phrase audio at ``path``, or None after deleting a file that cannot be loaded."""
+        try:
+            return PhraseAudio(path)
+        except (OSError, ValueError) as e:
+            self.corrupt += 1
+            logger.warning(f"Discarding unreadable phrase audio file {path}: {e}")
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return None
+
+    @staticmethod
+    async def _synthesize(tts_plugin, text: str):
+        """Collect the PCM of ``text``; returns (pcm, sample_rate, num_channels) or None if the plugin produced no audio."""
+        stream = tts_plugin.synthesize(text)
+        if inspect.isawaitable(stream):
+            stream = await stream
+        if stream is None:
+            return None
+        pcm = bytearray()
+        sample_rate = num_channels = None
+        async for audio in stream:
+            frame = audio.frame
+            pcm += frame.data
+            sample_rate, num_channels = frame.sample_rate, frame.num_channels
+        if not pcm:
+            return None
+        return bytes(pcm), sample_rate, num_channels
+
+    @staticmethod
+    def _write(path: str, pcm: bytes, sample_rate: int, num_channels: int):
+        # Write then rename, so a crash never leaves a truncated file behind
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, sample_rate, num_channels, 0))
+            f.write(pcm)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        for audio in self._entries.values():
+            audio.close()
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "phrases": len(self._entries),
+            "bytes": sum(len(audio.pcm) for audio in self._entries.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "loaded": self.loaded,
+            "synthesized": self.synthesized,
+            "corrupt": self.corrupt,
+            "failed": self.failed,
+        }
+
+
+# Single instance per worker process
+phrase_cache = PhraseAudioCache()
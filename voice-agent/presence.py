@@ -0,0 +1,176 @@
+import asyncio
+import os
+import logging
+import time
+from http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+OPTIFLOW_BACKEND_URL = os.getenv("OPTIFLOW_BACKEND_URL")
+OPTIFLOW_BACKEND_API_KEY = os.getenv("OPTIFLOW_BACKEND_API_KEY")
+PRESENCE_MODE = os.getenv("PRESENCE_MODE", "poll")  # "poll" or "longpoll"
+PRESENCE_POLL_INTERVAL = float(os.getenv("PRESENCE_POLL_INTERVAL", "30"))  # seconds
+PRESENCE_LONGPOLL_WAIT = float(os.getenv("PRESENCE_LONGPOLL_WAIT", "25"))  # seconds
+PRESENCE_INACTIVITY_LIMIT = float(os.getenv("PRESENCE_INACTIVITY_LIMIT", str(10 * 60)))  # seconds
+
+
+class PresenceService:
+    """Worker-wide presence checker.
+
+    Sessions register the user they serve together with an ``on_inactive`` coroutine function.
+    Every tick, all registered user IDs are checked in one batched request to
+    ``/api/presence/check``; users that stay inactive past the inactivity limit have their
+    callbacks invoked and are unregistered. In ``longpoll`` mode the backend holds the request
+    until a user's state changes, so decisions arrive as soon as they happen instead of on the
+    next tick.
+    """
+
+    def __init__(
+        self,
+        backend_url=OPTIFLOW_BACKEND_URL,
+        backend_api_key=OPTIFLOW_BACKEND_API_KEY,
+        mode=PRESENCE_MODE,
+        poll_interval=PRESENCE_POLL_INTERVAL,
+        longpoll_wait=PRESENCE_LONGPOLL_WAIT,
+        inactivity_limit=PRESENCE_INACTIVITY_LIMIT,
+    ):
+        self.backend_url = backend_url
+        self.backend_api_key = backend_api_key
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.longpoll_wait = longpoll_wait
+        self.inactivity_limit = inactivity_limit
+        self._callbacks = {}  # user_id -> list of on_inactive coroutine functions
+        self._last_active = {}  # user_id -> wall-clock time the user was last seen active
+        self._inactive = {}  # user_id -> last known inactive flag
+        self._registered = None
+        self._task = None
+        self._callback_tasks = set()
+
+    def register(self, user_id: str, on_inactive):
+        self._callbacks.setdefault(user_id, []).append(on_inactive)
+        self._last_active.setdefault(user_id, time.time())
+        self._ensure_started()
+        self._registered.set()
+
+    def unregister(self, user_id: str, on_inactive):
+        callbacks = self._callbacks.get(user_id)
+        if not callbacks:
+            return
+        if on_inactive in callbacks:
+            callbacks.remove(on_inactive)
+        if not callbacks:
+            self._forget(user_id)
+
+    def _forget(self, user_id: str):
+        self._callbacks.pop(user_id, None)
+        self._last_active.pop(user_id, None)
+        self._inactive.pop(user_id, None)
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._registered = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Presence service started in '{self.mode}' mode")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            if not self._callbacks:
+                self._registered.clear()
+                await self._registered.wait()
+
+            user_ids = list(self._callbacks)
+            longpoll = self.mode == "longpoll"
+            # Only hold the request open once the state of every user is known; newly
+            # registered users get an immediate answer.
+            known = None
+            if longpoll and all(user_id in self._inactive for user_id in user_ids):
+                known = {user_id: self._inactive[user_id] for user_id in user_ids}
+            wait = self._longpoll_wait() if known else 0
+            started = time.monotonic()
+            try:
+                presence = await self._check(user_ids, wait, known)
+                await self._apply(presence)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error polling user presence: {e}")
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            if not longpoll or wait == 0:
+                # Also in longpoll mode when the request was not held: users the backend left
+                # out of its answer stay unknown and would otherwise be asked for again at once
+                await asyncio.sleep(self.poll_interval)
+            elif wait > 0 and time.monotonic() - started < wait / 2 and not self._changed(presence, known):
+                # A held request came back early with nothing new, e.g. from a backend that
+                # ignores waitMs; wait a poll interval instead of hammering it
+                await asyncio.sleep(self.poll_interval)
+
+    def _longpoll_wait(self) -> float:
+        # Wake up no later than the earliest pending inactivity deadline
+        now = time.time()
+        wait = self.longpoll_wait
+        for user_id, inactive in self._inactive.items():
+            if inactive:
+                deadline = self._last_active.get(user_id, now) + self.inactivity_limit
+                wait = min(wait, max(deadline - now, 0))
+        return wait
+
+    @staticmethod
+    def _changed(presence: dict, known: dict) -> bool:
+        return any(
+            bool(state.get("inactive", False)) != known.get(user_id)
+            for user_id, state in presence.items()
+            if user_id in known
+        )
+
+    async def _check(self, user_ids: list, wait: float, known: dict = None) -> dict:
+        payload = {"userIds": user_ids}
+        if wait > 0 and known:
+            payload["waitMs"] = int(wait * 1000)
+            payload["known"] = known
+        client = http_client.get_session()
+        async with client.post(
+            f"{self.backend_url}/api/presence/check",
+            json=payload,
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.backend_api_key}"
+            }
+        ) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+        return data.get("presence", {})
+
+    async def _apply(self, presence: dict):
+        now = time.time()
+        for user_id, state in presence.items():
+            if user_id not in self._callbacks:
+                continue  # Session ended while the request was in flight
+            inactive = bool(state.get("inactive", False))
+            self._inactive[user_id] = inactive
+            if not inactive:
+                self._last_active[user_id] = now
+                continue
+            if now - self._last_active.get(user_id, now) > self.inactivity_limit:
+                callbacks = self._callbacks.get(user_id, [])
+                self._forget(user_id)
+                for on_inactive in callbacks:
+                    task = asyncio.create_task(on_inactive())
+                    self._callback_tasks.add(task)
+                    task.add_done_callback(self._callback_tasks.discard)
+
+
+# Single instance per worker process
+presence_service = PresenceService()
@@ -0,0 +1,248 @@
+import asyncio
+import os
+import logging
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+SESSION_CHECKPOINT_ENABLED = os.getenv("SESSION_CHECKPOINT_ENABLED", "false").lower() == "true"
+SESSION_CHECKPOINT_PATH = os.getenv("SESSION_CHECKPOINT_PATH", "session_state.db")
+SESSION_CHECKPOINT_TTL = float(os.getenv("SESSION_CHECKPOINT_TTL", "900"))  # seconds a checkpoint can be resumed
+
+session_restores = registry.counter(
+    "voice_session_restores_total", "Sessions resumed from a checkpoint instead of starting fresh")
+session_restore_seconds = registry.histogram(
+    "voice_session_restore_seconds", "Time to load a session checkpoint and rebuild its chat history")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_key TEXT PRIMARY KEY,
+    summary TEXT NOT NULL DEFAULT '',
+    turns INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+CREATE TABLE IF NOT EXISTS messages (
+    session_key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    PRIMARY KEY (session_key, seq)
+);
+"""
+
+
+class SessionStore:
+    """Conversation checkpoints in a local SQLite file, shared by the worker processes on a host.
+
+    All database work runs on one background thread, so the event loop never waits on disk
+    and writes are applied in the order they were submitted. Checkpoints older than ``ttl``
+    are not resumed and are pruned.
+
+    Each key has an owner token. Loading a checkpoint with an ``owner`` hands the key to that
+    owner, and saves from any earlier owner are dropped from then on. When the same user joins
+    the same room again (a reconnect, or a second tab), the old session can no longer
+    overwrite the history the new one resumed from.
+    """
+
+    def __init__(self, path=SESSION_CHECKPOINT_PATH, ttl=SESSION_CHECKPOINT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-store")
+        self._conn = None
+        self._pending = set()
+
+        self.writes = 0
+        self.write_errors = 0
+        self.fenced_writes = 0
+        self.restores = 0
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+            if "owner" not in columns:
+                # Files written before checkpoints had owners
+                self._conn.execute("ALTER TABLE sessions ADD COLUMN owner TEXT")
+        return self._conn
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _load(self, session_key: str, owner=None):
+        conn = self._connect()
+        cutoff = time.time() - self.ttl
+        with conn:
+            expired = [row[0] for row in conn.execute("SELECT session_key FROM sessions WHERE updated_at < ?", (cutoff,))]
+            for key in expired:
+                conn.execute("DELETE FROM messages WHERE session_key = ?", (key,))
+            conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,))
+            row = conn.execute(
+                "SELECT summary, turns FROM sessions WHERE session_key = ?", (session_key,)
+            ).fetchone()
+            if owner is not None:
+                conn.execute(
+                    "INSERT INTO sessions (session_key, updated_at, owner) VALUES (?, ?, ?) "
+                    "ON CONFLICT(session_key) DO UPDATE SET owner = excluded.owner",
+                    (session_key, time.time(), owner),
+                )
+        if row is None:
+            return None
+        messages = conn.execute(
+            "SELECT seq, role, content FROM messages WHERE session_key = ? ORDER BY seq", (session_key,)
+        ).fetchall()
+        return {"summary": row[0], "turns": row[1], "messages": messages}
+
+    async def load(self, session_key: str, owner: str = None):
+        """The latest checkpoint for ``session_key`` (summary, turns, messages), or None.
+
+        With ``owner``, the key is handed to that owner; see the class docstring.
+        """
+        return await self._run(self._load, session_key, owner)
+
+    def _save(self, session_key: str, summary: str, turns: int, first_seq: int, messages: list, next_seq=None,
+              owner=None) -> bool:
+        conn = self._connect()
+        with conn:
+            if owner is not None:
+                row = conn.execute("SELECT owner FROM sessions WHERE session_key = ?", (session_key,)).fetchone()
+                if row is not None and row[0] not in (None, owner):
+                    return False  # another session has taken this key over
+            conn.execute(
+                "INSERT INTO sessions (session_key, summary, turns, updated_at, owner) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(session_key) DO UPDATE SET summary = excluded.summary, "
+                "turns = excluded.turns, updated_at = excluded.updated_at, owner = excluded.owner",
+                (session_key, summary, turns, time.time(), owner),
+            )
+            # Messages folded into the summary are no longer needed
+            conn.execute("DELETE FROM messages WHERE session_key = ? AND seq < ?", (session_key, first_seq))
+            if next_seq is not None:
+                # Messages rolled back since they were saved
+                conn.execute("DELETE FROM messages WHERE session_key = ? AND seq >= ?", (session_key, next_seq))
+            conn.executemany(
+                "INSERT OR REPLACE INTO messages (session_key, seq, role, content) VALUES (?, ?, ?, ?)",
+                [(session_key, seq, role, content) for seq, role, content in messages],
+            )
+        return True
+
+    def save(self, session_key: str, summary: str, turns: int, first_seq: int, messages: list, next_seq=None,
+             owner: str = None):
+        """Queue a checkpoint write and return its future immediately; writes are applied in order.
+
+        With ``next_seq``, saved messages numbered ``next_seq`` or later are deleted. With
+        ``owner``, the write is dropped (and the future resolves to False) when the key has
+        been handed to another owner.
+        """
+        future = asyncio.ensure_future(
+            self._run(self._save, session_key, summary, turns, first_seq, messages, next_seq, owner)
+        )
+        self._pending.add(future)
+        future.add_done_callback(self._saved)
+        return future
+
+    def _saved(self, future):
+        self._pending.discard(future)
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.write_errors += 1
+            logger.warning(f"Could not write session checkpoint: {future.exception()}")
+        elif not future.result():
+            self.fenced_writes += 1
+        else:
+            self.writes += 1
+
+    async def flush(self):
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def close(self):
+        await self.flush()
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "writes": self.writes,
+            "write_errors": self.write_errors,
+            "fenced_writes": self.fenced_writes,
+            "pending_writes": len(self._pending),
+            "restores": self.restores,
+        }
+
+
+class SessionCheckpoint:
+    """Incremental checkpoints of one session's ``ConversationMemory``.
+
+    Each ``save`` writes only the messages added since the previous one, drops the ones
+    folded into the summary, and updates the summary and turn count. ``restore`` takes
+    ownership of the key; once a later session for the same key has taken it over, this
+    checkpoint stops saving (``superseded``).
+    """
+
+    def __init__(self, store: SessionStore, session_key: str, memory):
+        self.store = store
+        self.session_key = session_key
+        self.memory = memory
+        self.turns = 0  # turns completed before this session resumed
+        self.owner = uuid.uuid4().hex
+        self.superseded = False
+        self._saved_seq = 0
+
+    async def restore(self) -> bool:
+        """Rebuild the chat history from the last checkpoint; returns False when there is none."""
+        started = time.perf_counter()
+        try:
+            state = await self.store.load(self.session_key, owner=self.owner)
+        except Exception as e:
+            logger.warning(f"Could not load session checkpoint: {e}")
+            return False
+        if state is None or not (state["messages"] or state["summary"]):
+            return False
+        self.memory.restore(state["summary"], state["messages"])
+        self.turns = state["turns"]
+        self._saved_seq = self.memory.appended
+        elapsed = time.perf_counter() - started
+        session_restore_seconds.observe(elapsed)
+        session_restores.inc()
+        self.store.restores += 1
+        logger.info(
+            f"Resumed session {self.session_key}: {len(state['messages'])} messages, "
+            f"{state['turns']} turns in {elapsed * 1000:.1f}ms"
+        )
+        return True
+
+    def rewind(self, seq: int):
+        """The memory was rolled back to ``seq``: the next save rewrites from there."""
+        self._saved_seq = min(self._saved_seq, seq)
+
+    def save(self, turns: int):
+        if self.superseded:
+            return
+        summary, first_seq, messages = self.memory.checkpoint_state(since=self._saved_seq)
+        self._saved_seq = self.memory.appended
+        future = self.store.save(
+            self.session_key, summary, turns, first_seq, messages, next_seq=self.memory.appended, owner=self.owner
+        )
+        future.add_done_callback(self._saved)
+
+    def _saved(self, future):
+        if future.cancelled() or future.exception() is not None or future.result() or self.superseded:
+            return
+        self.superseded = True
+        logger.warning(f"Session {self.session_key} was resumed by another session; no longer checkpointing it")
+
+
+# Single instance per worker process
+session_store = SessionStore()
@@ -0,0 +1,141 @@
+"""Runs one Jarvis agent worker process per CPU core and keeps them running.
+
+Each worker is a separate process with its own event loop, so one busy room cannot add
+latency to rooms handled by the other processes. Workers report their own load to the
+LiveKit dispatcher (see ``worker_load.py``). The supervisor:
+
+- restarts a worker that exits unexpectedly, with jittered exponential backoff
+- gives each worker its own metrics port and log file
+- on SIGTERM or SIGINT, forwards SIGTERM to every worker, so they stop taking jobs and let
+  active conversations finish, and kills any that are still running after the drain timeout
+
+Usage (from the ``voice-agent`` directory):
+
+    python supervisor.py
+"""
+import asyncio
+import os
+import logging
+import random
+import shlex
+import signal
+import sys
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - supervisor - %(message)s")
+logger = logging.getLogger("supervisor")
+
+# --- Configuration ---
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "0")) or os.cpu_count() or 1
+WORKER_COMMAND = os.getenv(
+    "WORKER_COMMAND",
+    "livekit-server agent run main_agent:request_fnc --url $LIVEKIT_WS_URL "
+    "--api-key $LIVEKIT_API_KEY --api-secret $LIVEKIT_API_SECRET",
+)
+WORKER_PIN_CPUS = os.getenv("WORKER_PIN_CPUS", "false").lower() == "true"
+WORKER_DRAIN_TIMEOUT = float(os.getenv("WORKER_DRAIN_TIMEOUT", "600"))  # must match the workers' setting
+WORKER_RESTART_MAX_DELAY = float(os.getenv("WORKER_RESTART_MAX_DELAY", "30"))  # seconds
+WORKER_STABLE_AFTER = float(os.getenv("WORKER_STABLE_AFTER", "60"))  # seconds of uptime that reset the restart backoff
+
+
+def _indexed_path(path: str, index: int) -> str:
+    """``jarvis_agent.log`` -> ``jarvis_agent.2.log``"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{index}{ext}"
+
+
+def worker_env(index: int) -> dict:
+    """Environment for worker ``index``: per-process metrics port, log file and JSON dump."""
+    env = dict(os.environ, WORKER_INDEX=str(index))
+    metrics_port = int(os.getenv("METRICS_PORT", "0"))
+    if metrics_port:
+        env["METRICS_PORT"] = str(metrics_port + index)
+    env["LOG_FILE"] = _indexed_path(os.getenv("LOG_FILE", "jarvis_agent.log"), index)
+    if os.getenv("METRICS_JSON_PATH"):
+        env["METRICS_JSON_PATH"] = _indexed_path(os.environ["METRICS_JSON_PATH"], index)
+    return env
+
+
+class WorkerSupervisor:
+    def __init__(self, processes=WORKER_PROCESSES, command=WORKER_COMMAND, drain_timeout=WORKER_DRAIN_TIMEOUT):
+        self.processes = processes
+        self.command = shlex.split(os.path.expandvars(command))
+        self.drain_timeout = drain_timeout
+        self._children = {}  # index -> asyncio.subprocess.Process
+        self._stopping = asyncio.Event()
+
+    async def _spawn(self, index: int):
+        preexec_fn = None
+        if WORKER_PIN_CPUS and hasattr(os, "sched_setaffinity"):
+            cpu = index % (os.cpu_count() or 1)
+            preexec_fn = lambda: os.sched_setaffinity(0, {cpu})
+        process = await asyncio.create_subprocess_exec(
+            *self.command,
+            env=worker_env(index),
+            preexec_fn=preexec_fn,
+        )
+        self._children[index] = process
+        logger.info(f"Started worker {index} (pid {process.pid})")
+        return process
+
+    async def _run_worker(self, index: int):
+        """Keep worker ``index`` running until the supervisor stops."""
+        restarts = 0
+        while not self._stopping.is_set():
+            started = time.monotonic()
+            process = await self._spawn(index)
+            if self._stopping.is_set():
+                process.send_signal(signal.SIGTERM)
+            code = await process.wait()
+            if self._stopping.is_set():
+                logger.info(f"Worker {index} (pid {process.pid}) exited with {code}")
+                return
+            if time.monotonic() - started >= WORKER_STABLE_AFTER:
+                restarts = 0
+            delay = min(WORKER_RESTART_MAX_DELAY, 0.5 * 2 ** restarts) * random.uniform(0.5, 1.5)
+            restarts += 1
+            logger.warning(f"Worker {index} (pid {process.pid}) exited with {code}, restarting in {delay:.1f}s")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self):
+        """Ask every worker to drain; they exit once their conversations end."""
+        if self._stopping.is_set():
+            return
+        logger.info(f"Stopping: draining {len(self._children)} worker(s) for up to {self.drain_timeout:.0f}s")
+        self._stopping.set()
+        for process in self._children.values():
+            if process.returncode is None:
+                process.send_signal(signal.SIGTERM)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stop)
+
+        runners = [asyncio.create_task(self._run_worker(index)) for index in range(self.processes)]
+        await self._stopping.wait()
+        # Workers drain on their own; give them the drain timeout plus a little slack
+        done, pending = await asyncio.wait(runners, timeout=self.drain_timeout + 10)
+        for index, process in self._children.items():
+            if process.returncode is None:
+                logger.warning(f"Worker {index} (pid {process.pid}) did not drain in time, killing it")
+                process.kill()
+        if pending:
+            await asyncio.wait(pending)
+
+
+def main():
+    if not WORKER_COMMAND.strip():
+        sys.exit("WORKER_COMMAND is empty")
+    logger.info(f"Starting {WORKER_PROCESSES} worker process(es): {WORKER_COMMAND}")
+    asyncio.run(WorkerSupervisor().run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Tests for ``ActionResultCache`` and the idempotency key of Pipedream actions.
+
+Run from the ``voice-agent`` directory: ``python -m unittest discover tests``.
+"""
+import asyncio
+import unittest
+from action_cache import ActionResultCache, current_action_turn, idempotency_key
+
+
+class CountingAction:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.runs = 0
+
+    async def __call__(self):
+        self.runs += 1
+        await asyncio.sleep(self.delay)
+        return f'{{"status": "ok", "run": {self.runs}}}'
+
+
+class IdempotencyKeyTest(unittest.TestCase):
+    def test_ignores_key_order_whitespace_and_nulls(self):
+        self.assertEqual(
+            idempotency_key("user", "create_asana_task", {"name": "Review", "project": "Q3", "due": None}),
+            idempotency_key("user", "create_asana_task", {"project": "Q3 ", "name": " Review"}),
+        )
+
+    def test_differs_per_user_and_action(self):
+        parameters = {"name": "Review"}
+        self.assertNotEqual(idempotency_key("a", "create_asana_task", parameters), idempotency_key("b", "create_asana_task", parameters))
+        self.assertNotEqual(idempotency_key("a", "create_asana_task", parameters), idempotency_key("a", "create_jira_ticket", parameters))
+
+    def test_turn_scoped_keys_differ_per_turn(self):
+        parameters = {"name": "Review"}
+        self.assertNotEqual(
+            idempotency_key("a", "send_email", parameters, turn="turn-1"),
+            idempotency_key("a", "send_email", parameters, turn="turn-2"),
+        )
+
+
+class ActionResultCacheTest(unittest.IsolatedAsyncioTestCase):
+    async def in_turn(self, turn, coroutine):
+        """Run ``coroutine`` in a task whose turn is ``turn``, as a response task would."""
+        async def run():
+            current_action_turn.set(turn)
+            return await coroutine
+        return await asyncio.create_task(run())
+
+    async def test_concurrent_calls_are_coalesced(self):
+        cache, action = ActionResultCache(), CountingAction(delay=0.02)
+        results = await asyncio.gather(*(cache.get_or_run("key", action) for _ in range(3)))
+        self.assertEqual(action.runs, 1)
+        self.assertEqual([repeated for _, repeated in results].count(False), 1)
+
+    async def test_side_effects_are_deduplicated_within_a_turn_only(self):
+        cache, action = ActionResultCache(), CountingAction()
+        turn = "turn-1"
+        await self.in_turn(turn, cache.get_or_run("key", action))
+        _, repeated = await self.in_turn(turn, cache.get_or_run("key", action))
+        self.assertTrue(repeated)
+        self.assertEqual(action.runs, 1)
+        # "Send it again" in a later turn runs the action again
+        _, repeated = await self.in_turn("turn-2", cache.get_or_run("key", action))
+        self.assertFalse(repeated)
+        self.assertEqual(action.runs, 2)
+
+    async def test_side_effects_outside_a_turn_are_not_kept(self):
+        cache, action = ActionResultCache(), CountingAction()
+        await cache.get_or_run("key", action)
+        await cache.get_or_run("key", action)
+        self.assertEqual(action.runs, 2)
+
+    async def test_opt_in_ttl_reuses_side_effects_across_turns(self):
+        cache, action = ActionResultCache(ttl=60), CountingAction()
+        await self.in_turn("turn-1", cache.get_or_run("key", action))
+        _, repeated = await self.in_turn("turn-2", cache.get_or_run("key", action))
+        self.assertTrue(repeated)
+        self.assertEqual(action.runs, 1)
+
+    async def test_read_only_results_are_reused_across_turns(self):
+        cache, action = ActionResultCache(read_only_ttl=60), CountingAction()
+        await self.in_turn("turn-1", cache.get_or_run("key", action, read_only=True))
+        await self.in_turn("turn-2", cache.get_or_run("key", action, read_only=True))
+        self.assertEqual(action.runs, 1)
+
+    async def test_failures_are_not_cached(self):
+        cache, calls = ActionResultCache(read_only_ttl=60), []
+
+        async def failing():
+            calls.append(1)
+            raise RuntimeError("backend down")
+
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                await cache.get_or_run("key", failing, read_only=True)
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""Tests for ``AudioRingBuffer`` and ``run_vad`` against the real ``livekit.rtc`` package.
+
+Run from the ``voice-agent`` directory: ``python -m unittest discover tests``.
+"""
+import asyncio
+import unittest
+from types import SimpleNamespace
+import numpy as np
+
+try:
+    from livekit import rtc
+    from livekit.agents import vad as lk_vad
+except ImportError:
+    raise unittest.SkipTest("livekit is not installed")
+
+from audio_buffer import AudioRingBuffer
+from endpointing import run_vad
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 320  # 20 ms
+
+
+def tone_frame(amplitude: int, samples=FRAME_SAMPLES, sample_rate=SAMPLE_RATE, num_channels=1):
+    values = np.full(samples * num_channels, amplitude, dtype=np.int16)
+    return rtc.AudioFrame(data=values.tobytes(), sample_rate=sample_rate, num_channels=num_channels,
+                          samples_per_channel=samples)
+
+
+def samples(frame) -> np.ndarray:
+    return np.frombuffer(frame.data, dtype=np.int16)
+
+
+class AudioRingBufferTest(unittest.IsolatedAsyncioTestCase):
+    async def test_frames_carry_written_samples(self):
+        buffer = AudioRingBuffer(sample_rate=SAMPLE_RATE, frame_ms=20, buffer_ms=100)
+        for amplitude in (1000, 2000, 3000):
+            await buffer.write(tone_frame(amplitude))
+        buffer.close()
+        received = [int(samples(frame).max()) async for frame in buffer]
+        self.assertEqual(received, [1000, 2000, 3000])
+
+    async def test_converts_sample_rate_and_channels(self):
+        buffer = AudioRingBuffer(sample_rate=SAMPLE_RATE, frame_ms=20, buffer_ms=100)
+        await buffer.write(tone_frame(1500, samples=960, sample_rate=48000, num_channels=2))
+        frame = await buffer.read()
+        self.assertIsInstance(frame, rtc.AudioFrame)
+        self.assertEqual(frame.samples_per_channel, FRAME_SAMPLES)
+        self.assertEqual(int(samples(frame).min()), 1500)
+        self.assertEqual(buffer.frames_converted, 1)
+
+    async def test_drop_oldest_keeps_latest_audio(self):
+        buffer = AudioRingBuffer(sample_rate=SAMPLE_RATE, frame_ms=20, buffer_ms=60, backpressure="drop_oldest")
+        for amplitude in range(1, 7):
+            await buffer.write(tone_frame(amplitude * 100))
+        buffer.close()
+        received = [int(samples(frame).max()) async for frame in buffer]
+        self.assertEqual(received, [400, 500, 600])
+        self.assertEqual(buffer.frames_dropped, 3)
+
+
+class _RecordingVADStream:
+    """Holds pushed frames until ``process`` is called, as a lagging VAD would."""
+
+    def __init__(self):
+        self.pushed = []
+        self.processed = 0
+        self._events = asyncio.Queue()
+
+    def push_frame(self, frame):
+        self.pushed.append(frame)
+
+    def process(self, count):
+        self.processed += count
+        self._events.put_nowait(SimpleNamespace(
+            type=lk_vad.VADEventType.INFERENCE_DONE, samples_index=self.processed * FRAME_SAMPLES))
+
+    def end_input(self):
+        self._events.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self._events.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    async def aclose(self):
+        pass
+
+
+class RunVADTest(unittest.IsolatedAsyncioTestCase):
+    async def test_vad_gets_owned_frames_and_backpressure_applies(self):
+        stream = _RecordingVADStream()
+        vad = SimpleNamespace(stream=lambda: stream)
+        endpointer = SimpleNamespace(on_speech_start=lambda: None, on_speech_end=lambda: None)
+        buffer = AudioRingBuffer(sample_rate=SAMPLE_RATE, frame_ms=20, buffer_ms=100, backpressure="drop_oldest")
+
+        async def frames():
+            for amplitude in range(1, 41):
+                yield tone_frame(amplitude)
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(run_vad(vad, frames(), endpointer, buffer))
+        stream.process(0)  # the VAD reports progress, but has not processed anything yet
+        for _ in range(100):
+            await asyncio.sleep(0)
+        # At most half the buffer is pushed ahead of the VAD; the rest backs up in the buffer
+        self.assertLessEqual(len(stream.pushed), buffer.capacity // 2 + 1)
+        self.assertGreater(buffer.frames_dropped, 0)
+
+        # Once the VAD catches up, the rest of the buffered audio is pushed and the input ends
+        while not task.done():
+            stream.process(len(stream.pushed) - stream.processed)
+            await asyncio.sleep(0)
+
+        # Every frame the VAD received still holds the audio it was pushed with
+        amplitudes = [int(samples(frame).max()) for frame in stream.pushed]
+        self.assertEqual(amplitudes, sorted(amplitudes))
+        self.assertTrue(all(samples(frame).min() == samples(frame).max() > 0 for frame in stream.pushed))
+        self.assertEqual(amplitudes[-1], 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""Tests for ``CircuitBreaker`` and the retry, hedging and breaker policy of ``BackendClient``.
+
+Run from the ``voice-agent`` directory: ``python -m unittest discover tests``.
+"""
+import asyncio
+import unittest
+from backend_client import (
+    ENDPOINTS, BackendClient, BackendHTTPError, BackendUnavailableError, CircuitBreaker, Endpoint,
+)
+
+
+class ScriptedBackendClient(BackendClient):
+    """Answers each attempt with the next ``(delay, result)`` from ``script``; exceptions are raised."""
+
+    def __init__(self, script):
+        super().__init__("http://backend.invalid", "test")
+        self.script = list(script)
+        self.attempts = 0
+
+    async def _attempt(self, endpoint, payload, response_format, headers, timeout):
+        delay, result = self.script[min(self.attempts, len(self.script) - 1)]
+        self.attempts += 1
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_at_the_error_rate_and_closes_after_a_good_probe(self):
+        breaker = CircuitBreaker("test", error_rate=0.5, min_requests=4, window=30, open_seconds=0)
+        for ok in (True, False, True, False):
+            self.assertTrue(breaker.allow())
+            breaker.record(ok)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertTrue(breaker.allow())  # open_seconds elapsed: one probe goes through
+        self.assertFalse(breaker.allow())
+        breaker.record(ok=True)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_stays_open_until_open_seconds_have_passed(self):
+        breaker = CircuitBreaker("test", error_rate=0.5, min_requests=1, window=30, open_seconds=60)
+        breaker.record(ok=False)
+        self.assertFalse(breaker.allow())
+
+
+class BackendClientTest(unittest.IsolatedAsyncioTestCase):
+    def endpoint(self, **kwargs):
+        endpoint = Endpoint("test", "/test", deadline=kwargs.pop("deadline", 2), **kwargs)
+        endpoint.breaker = CircuitBreaker("test", error_rate=0.5, min_requests=1, window=30, open_seconds=0)
+        ENDPOINTS["test"] = endpoint
+        self.addCleanup(ENDPOINTS.pop, "test", None)
+        return endpoint
+
+    async def test_retries_retryable_statuses(self):
+        self.endpoint(idempotent=True, retries=2)
+        client = ScriptedBackendClient([(0, BackendHTTPError(503, "")), (0, {"ok": True})])
+        self.assertEqual(await client.post("test", {}), {"ok": True})
+        self.assertEqual(client.attempts, 2)
+
+    async def test_does_not_retry_non_idempotent_endpoints(self):
+        self.endpoint(idempotent=False, retries=2)
+        client = ScriptedBackendClient([(0, BackendHTTPError(503, "")), (0, {"ok": True})])
+        with self.assertRaises(BackendHTTPError):
+            await client.post("test", {})
+        self.assertEqual(client.attempts, 1)
+
+    async def test_hedge_answers_when_the_first_attempt_is_slow(self):
+        endpoint = self.endpoint(idempotent=True, hedge=True)
+        endpoint.latencies.extend([0.01] * 50)  # p95 of 10ms, so the hedge goes out early
+        client = ScriptedBackendClient([(1.0, "slow"), (0, "fast")])
+        started = asyncio.get_running_loop().time()
+        self.assertEqual(await client.post("test", {}, response_format="text"), "fast")
+        self.assertLess(asyncio.get_running_loop().time() - started, 0.5)
+        self.assertEqual(client.attempts, 2)
+
+    async def test_unexpected_errors_settle_a_half_open_breaker(self):
+        endpoint = self.endpoint(idempotent=False)
+        endpoint.breaker.record(ok=False)  # open; open_seconds=0, so the next call is the probe
+        client = ScriptedBackendClient([(0, ValueError("not JSON"))])
+        with self.assertRaises(ValueError):
+            await client.post("test", {})
+        self.assertEqual(endpoint.breaker.state, CircuitBreaker.OPEN)
+        # The probe is no longer in flight, so the next call can probe again
+        client.script = [(0, {"ok": True})]
+        self.assertEqual(await client.post("test", {}), {"ok": True})
+        self.assertEqual(endpoint.breaker.state, CircuitBreaker.CLOSED)
+
+    async def test_open_breaker_fails_fast(self):
+        endpoint = self.endpoint(idempotent=False)
+        endpoint.breaker.open_seconds = 60
+        endpoint.breaker.record(ok=False)
+        client = ScriptedBackendClient([(0, {"ok": True})])
+        with self.assertRaises(BackendUnavailableError):
+            await client.post("test", {})
+        self.assertEqual(client.attempts, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
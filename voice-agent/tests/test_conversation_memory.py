@@ -0,0 +1,120 @@
+"""Tests for ``ConversationMemory``.
+
+Run from the ``voice-agent`` directory: ``python -m unittest discover tests``.
+"""
+import os
+import tempfile
+import unittest
+
+try:
+    import livekit.agents  # noqa: F401
+except ImportError:
+    raise unittest.SkipTest("livekit-agents is not installed")
+
+from conversation_memory import ConversationMemory, CHAT_SUMMARY_MAX_TOKENS, TOOL_OUTPUT_MAX_TOKENS, current_memory, remember_tool_result
+from tokens import estimate_tokens
+from session_store import SessionCheckpoint, SessionStore
+
+
+def contents(memory):
+    return [message.content for message in memory.messages()[1:]]
+
+
+class RecordingSummarizer:
+    """Answers with an empty stream and records the session memory visible to the request."""
+
+    def __init__(self):
+        self.seen_memory = []
+
+    async def chat(self, history):
+        self.seen_memory.append(current_memory.get())
+        return self._stream()
+
+    async def _stream(self):
+        return
+        yield
+
+
+class ConversationMemoryTest(unittest.IsolatedAsyncioTestCase):
+    async def test_rollback_replaces_a_corrected_turn(self):
+        memory = ConversationMemory("system")
+        memory.add_user("Hi")
+        memory.add_assistant("Hello!")
+        seq = memory.appended
+        memory.add_user("Email Mark.")
+        memory.add_assistant("Sending …")
+        memory.rollback(seq)
+        memory.add_user("Email Mark the quarterly numbers.")
+        self.assertEqual(contents(memory), ["Hi", "Hello!", "Email Mark the quarterly numbers."])
+        _, first_seq, messages = memory.checkpoint_state()
+        self.assertEqual([seq for seq, _, _ in messages], [0, 1, 2])
+
+    async def test_checkpoint_drops_rolled_back_messages(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = SessionStore(path=os.path.join(directory, "sessions.db"))
+            memory = ConversationMemory("system")
+            checkpoint = SessionCheckpoint(store, "room:user", memory)
+            memory.add_user("Hi")
+            memory.add_assistant("Hello!")
+            checkpoint.save(1)
+            seq = memory.appended
+            memory.add_user("Email Mark.")
+            memory.add_assistant("Sending …")
+            checkpoint.save(2)
+            memory.rollback(seq)
+            checkpoint.rewind(seq)
+            memory.add_user("Email Mark the quarterly numbers.")
+            checkpoint.save(2)
+            await store.flush()
+
+            restored = ConversationMemory("system")
+            self.assertTrue(await SessionCheckpoint(store, "room:user", restored).restore())
+            self.assertEqual(contents(restored), contents(memory))
+            await store.close()
+
+    async def test_failed_summary_keeps_the_earlier_summary(self):
+        memory = ConversationMemory("system", summarizer_llm=None, token_budget=10)
+        memory.summary = "User asked for the Q3 report."
+        memory.add_user("Send it to Mark when it is ready, please.")
+        memory.add_assistant("Will do, I'll send the report to Mark.")
+        await memory._summary_task
+        self.assertTrue(memory.summary.startswith("User asked for the Q3 report.\nuser: Send it to Mark"))
+        self.assertNotIn("ChatRole", memory.summary)
+
+    async def test_failed_summary_over_budget_keeps_the_newest_turns(self):
+        memory = ConversationMemory("system", summarizer_llm=None, token_budget=10)
+        memory.summary = "Earlier: " + "the user talked about the weather. " * 200
+        memory.add_user("Send the Q3 report to Mark when it is ready, please.")
+        memory.add_assistant("Will do, I'll send the report to Mark.")
+        await memory._summary_task
+        self.assertIn("user: Send the Q3 report to Mark", memory.summary)
+        self.assertTrue(memory.summary.startswith("[truncated]"))
+        self.assertLessEqual(estimate_tokens(memory.summary), CHAT_SUMMARY_MAX_TOKENS + 10)
+
+    async def test_summary_runs_outside_the_session_context(self):
+        summarizer = RecordingSummarizer()
+        memory = ConversationMemory("system", summarizer_llm=summarizer, token_budget=10)
+        token = current_memory.set(memory)
+        try:
+            memory.add_user("Send the Q3 report to Mark when it is ready, please.")
+            memory.add_assistant("Will do, I'll send the report to Mark.")
+            await memory._summary_task
+        finally:
+            current_memory.reset(token)
+        self.assertEqual(summarizer.seen_memory, [None])
+
+    async def test_tool_results_are_trimmed_into_the_current_memory(self):
+        memory = ConversationMemory("system")
+        token = current_memory.set(memory)
+        try:
+            output = "word " * (TOOL_OUTPUT_MAX_TOKENS * 4)
+            self.assertEqual(remember_tool_result("query_knowledge_base", output), output)
+        finally:
+            current_memory.reset(token)
+        recorded = contents(memory)[-1]
+        self.assertTrue(recorded.startswith("[query_knowledge_base result] "))
+        self.assertLessEqual(estimate_tokens(recorded), TOOL_OUTPUT_MAX_TOKENS + 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""Tests for ``TurnEndpointer``: when a turn may start early, and how a correction is reported.
+
+Run from the ``voice-agent`` directory: ``python -m unittest discover tests``.
+"""
+import asyncio
+import unittest
+
+try:
+    import livekit.agents  # noqa: F401
+except ImportError:
+    raise unittest.SkipTest("livekit-agents is not installed")
+
+from endpointing import EndOfTurnModel, TurnEndpointer, current_turn_confirmation, turn_confirmed
+
+
+class SlowDetector:
+    """Stand-in turn detector that takes ``delay`` seconds per prediction."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def predict_end_of_turn(self, chat_context):
+        await asyncio.sleep(self.delay)
+        return 0.9
+
+
+class EndOfTurnModelTest(unittest.IsolatedAsyncioTestCase):
+    async def test_requests_waiting_on_a_round_are_scored_together(self):
+        model = EndOfTurnModel(SlowDetector(0.05))
+        first = asyncio.create_task(model.predict([], "Send it."))
+        await asyncio.sleep(0.01)  # the first round is running
+        rest = [asyncio.create_task(model.predict([], f"Turn {i}.")) for i in range(3)]
+        self.assertEqual(await asyncio.gather(first, *rest), [0.9] * 4)
+        self.assertEqual(model.batches, 2)
+        self.assertEqual(model.max_batch_seen, 3)
+        await model.aclose()
+
+    async def test_a_lone_request_is_not_held_back(self):
+        model = EndOfTurnModel()
+        started = asyncio.get_running_loop().time()
+        await model.predict([], "Send it.")
+        self.assertLess(asyncio.get_running_loop().time() - started, 0.005)
+        await model.aclose()
+
+
+class TurnEndpointerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.model = EndOfTurnModel()
+        self.turns = []
+        self.confirmed = []
+
+        async def on_turn(text):
+            self.turns.append(text)
+            self.confirmed.append(await turn_confirmed())
+
+        self.endpointer = TurnEndpointer(self.model, on_turn, threshold=0.85)
+
+    async def asyncTearDown(self):
+        await self.endpointer.aclose()
+        await self.model.aclose()
+
+    async def settle(self):
+        for _ in range(20):
+            await asyncio.sleep(0)
+
+    async def test_interims_wait_for_the_end_of_speech(self):
+        self.endpointer.on_interim("Send the report to Mark.")
+        await self.settle()
+        self.assertEqual(self.turns, [])
+
+        self.endpointer.on_speech_start()
+        self.endpointer.on_interim("Send the report to Mark.")
+        await self.settle()
+        self.assertEqual(self.turns, [])
+
+        self.endpointer.on_speech_end()
+        await self.settle()
+        self.assertEqual(self.turns, ["Send the report to Mark."])
+
+    async def test_final_transcript_confirms_the_early_turn(self):
+        self.endpointer.on_speech_start()
+        self.endpointer.on_interim("What's on my calendar today?")
+        self.endpointer.on_speech_end()
+        await self.settle()
+        self.assertTrue(self.endpointer.on_final("what's on my calendar today"))
+        await self.settle()
+        self.assertEqual(self.confirmed, [True])
+
+    async def test_corrected_turn_is_not_confirmed(self):
+        self.endpointer.on_speech_start()
+        self.endpointer.on_interim("Email Mark.")
+        self.endpointer.on_speech_end()
+        await self.settle()
+        self.assertEqual(self.turns, ["Email Mark."])
+        self.assertFalse(self.endpointer.on_final("Email Mark the quarterly numbers."))
+        await self.settle()
+        self.assertEqual(self.confirmed, [False])
+
+    async def test_interims_after_a_final_wait_for_the_next_end_of_speech(self):
+        self.endpointer.on_speech_start()
+        self.endpointer.on_speech_end()
+        self.endpointer.on_final("Thanks.")
+        self.endpointer.on_interim("Create a task.")
+        await self.settle()
+        self.assertEqual(self.turns, [])
+
+    async def test_turns_not_started_early_need_no_confirmation(self):
+        self.assertIsNone(current_turn_confirmation.get())
+        self.assertTrue(await turn_confirmed())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""Tests for ``AgentEventEmitter`` against a local webhook receiver.
+
+Run from the ``voice-agent`` directory: ``python -m unittest discover tests``.
+"""
+import asyncio
+import unittest
+from aiohttp import web
+from event_emitter import AgentEventEmitter, EVENT_BATCH_VERSION
+from http_client import close_http_client
+
+
+class WebhookReceiver:
+    """Records every payload; events with ``"fail": true`` are answered with a 503."""
+
+    def __init__(self):
+        self.payloads = []
+        self._runner = None
+        self.url = None
+
+    async def _handle(self, request):
+        payload = await request.json()
+        self.payloads.append(payload)
+        events = payload.get("events", [payload])
+        if any(event.get("fail") for event in events):
+            return web.json_response({"success": False}, status=503)
+        return web.json_response({"success": True})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/agent-events", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/agent-events"
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    def delivered(self):
+        return [
+            event["n"] for payload in self.payloads for event in payload.get("events", [payload])
+            if not event.get("fail")
+        ]
+
+
+class AgentEventEmitterTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.receiver = WebhookReceiver()
+        await self.receiver.start()
+
+    async def asyncTearDown(self):
+        await close_http_client()
+        await self.receiver.stop()
+
+    def emitter(self, **kwargs):
+        kwargs.setdefault("flush_interval", 0.01)
+        kwargs.setdefault("retry_base_delay", 0.05)
+        return AgentEventEmitter(url=self.receiver.url, **kwargs)
+
+    async def test_sends_versioned_batches(self):
+        emitter = self.emitter(batch_max_size=10)
+        for n in range(3):
+            emitter.emit({"event_type": "agent_join", "n": n})
+        await emitter.drain(timeout=1)
+        self.assertEqual(self.receiver.payloads, [{
+            "version": EVENT_BATCH_VERSION,
+            "events": [{"event_type": "agent_join", "n": n} for n in range(3)],
+        }])
+        self.assertEqual(emitter.stats()["sent"], 3)
+
+    async def test_batch_size_one_sends_single_events(self):
+        emitter = self.emitter(batch_max_size=1)
+        emitter.emit({"event_type": "agent_join", "n": 0})
+        await emitter.drain(timeout=1)
+        self.assertEqual(self.receiver.payloads, [{"event_type": "agent_join", "n": 0}])
+
+    async def test_a_retrying_batch_does_not_hold_back_later_events(self):
+        emitter = self.emitter(batch_max_size=1, max_retries=3, retry_base_delay=0.2)
+        emitter.emit({"event_type": "agent_join", "n": 0, "fail": True})
+        await asyncio.sleep(0.05)  # the first batch has failed once and is backing off
+        emitter.emit({"event_type": "agent_join", "n": 1})
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.receiver.delivered(), [1])
+        await emitter.drain(timeout=0)
+        self.assertEqual(emitter.stats()["failed"], 1)
+
+    async def test_overflow_drops_the_oldest_event(self):
+        emitter = self.emitter(batch_max_size=10, queue_size=2, flush_interval=1)
+        for n in range(3):
+            emitter.emit({"event_type": "agent_join", "n": n})
+        await emitter.drain(timeout=1)
+        self.assertEqual(self.receiver.delivered(), [1, 2])
+        self.assertEqual(emitter.stats()["dropped_overflow"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
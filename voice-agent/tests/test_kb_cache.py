@@ -0,0 +1,33 @@
+"""Tests for ``KnowledgeBaseCache``.
+
+Run from the ``voice-agent`` directory: ``python -m unittest discover tests``.
+"""
+import unittest
+from kb_cache import KnowledgeBaseCache
+
+
+class InvalidateTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = KnowledgeBaseCache()
+        self.keys = {
+            kb_type: self.cache.make_key("vacation policy", kb_type, "user-1")
+            for kb_type in ("team", "organization", None)
+        }
+        for key in self.keys.values():
+            self.cache.put(key, "{}")
+
+    def test_kb_type_also_drops_searches_across_all_knowledge_bases(self):
+        self.assertEqual(self.cache.invalidate(kb_type="team"), 2)
+        self.assertIsNone(self.cache.get(self.keys["team"]))
+        self.assertIsNone(self.cache.get(self.keys[None]))
+        self.assertEqual(self.cache.get(self.keys["organization"]), "{}")
+
+    def test_other_users_are_kept(self):
+        other = self.cache.make_key("vacation policy", None, "user-2")
+        self.cache.put(other, "{}")
+        self.cache.invalidate(user_id="user-1", kb_type="team")
+        self.assertEqual(self.cache.get(other), "{}")
+
+
+if __name__ == "__main__":
+    unittest.main()
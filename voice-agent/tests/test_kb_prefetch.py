@@ -0,0 +1,57 @@
+"""Tests for ``KnowledgeBasePrefetcher.take`` with payloads serialized by ``kb_results.dumps``.
+
+Run from the ``voice-agent`` directory: ``python -m unittest discover tests``.
+"""
+import asyncio
+import unittest
+from kb_cache import kb_cache
+from kb_prefetch import KnowledgeBasePrefetcher, PrefetchStats
+from kb_results import dumps, result_count
+
+
+class KnowledgeBasePrefetcherTest(unittest.IsolatedAsyncioTestCase):
+    async def prefetch(self, payload: dict, text: str, use_cache=True):
+        stats = PrefetchStats()
+
+        async def search(query):
+            return dumps(payload)
+
+        prefetcher = KnowledgeBasePrefetcher(
+            search, user_id=self.id(), stable_ms=0, min_words=2, stats=stats, use_cache=use_cache)
+        prefetcher.on_interim(text)
+        await asyncio.sleep(0.01)  # the interim is stable and the search has finished
+        result = await prefetcher.take(text)
+        await prefetcher.aclose()
+        return result, stats
+
+    async def test_empty_results_are_not_injected(self):
+        result, stats = await self.prefetch(
+            {"message": "No results found for query: 'laptop setup guide'", "results": []}, "laptop setup guide")
+        self.assertIsNone(result)
+        self.assertEqual(stats.hits, 0)
+        self.assertEqual(stats.wasted, 1)
+
+    async def test_results_are_injected(self):
+        payload = {"message": "Found 1 relevant documents.", "results": [{"title": "Onboarding"}], "tokens_trimmed": 0}
+        result, stats = await self.prefetch(payload, "laptop setup guide")
+        self.assertEqual(result, dumps(payload))
+        self.assertEqual(stats.hits, 1)
+
+    async def test_prefetch_bypasses_a_disabled_cache(self):
+        payload = {"message": "Found 1 relevant documents.", "results": [{"title": "Onboarding"}], "tokens_trimmed": 0}
+        result, stats = await self.prefetch(payload, "laptop setup guide", use_cache=False)
+        self.assertEqual(result, dumps(payload))
+        self.assertEqual(stats.hits, 1)
+        self.assertIsNone(kb_cache.get(kb_cache.make_key("laptop setup guide", None, self.id())))
+
+
+class ResultCountTest(unittest.TestCase):
+    def test_counts_documents(self):
+        self.assertEqual(result_count(dumps({"results": [{"title": "a"}, {"title": "b"}]})), 2)
+        self.assertEqual(result_count(dumps({"results": []})), 0)
+        self.assertEqual(result_count(dumps({"error": "Failed to query knowledge base: 500"})), 0)
+        self.assertEqual(result_count("not json"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
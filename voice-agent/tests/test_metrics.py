@@ -0,0 +1,39 @@
+"""Tests for ``tool_span``.
+
+Run from the ``voice-agent`` directory: ``python -m unittest discover tests``.
+"""
+import asyncio
+import unittest
+from metrics import tool_cancellations, tool_errors, traced_tool
+
+
+class ToolSpanTest(unittest.IsolatedAsyncioTestCase):
+    def count(self, counter, tool):
+        return counter.snapshot().get(f'{{tool="{tool}"}}', 0)
+
+    async def test_cancellation_is_not_an_error(self):
+        @traced_tool("slow_tool")
+        async def arun():
+            await asyncio.sleep(10)
+
+        task = asyncio.create_task(arun())
+        await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(self.count(tool_errors, "slow_tool"), 0)
+        self.assertEqual(self.count(tool_cancellations, "slow_tool"), 1)
+
+    async def test_exception_is_an_error(self):
+        @traced_tool("failing_tool")
+        async def arun():
+            raise RuntimeError("backend down")
+
+        with self.assertRaises(RuntimeError):
+            await arun()
+        self.assertEqual(self.count(tool_errors, "failing_tool"), 1)
+        self.assertEqual(self.count(tool_cancellations, "failing_tool"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
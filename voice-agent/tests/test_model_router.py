@@ -0,0 +1,115 @@
+"""Tests for ``TurnClassifier`` routing and ``ModelRouter`` escalation, with scripted LLMs.
+
+Run from the ``voice-agent`` directory: ``python -m unittest discover tests``.
+"""
+import unittest
+from types import SimpleNamespace
+
+try:
+    import livekit.agents  # noqa: F401
+except ImportError:
+    raise unittest.SkipTest("livekit-agents is not installed")
+
+from livekit.agents import llm as lk_llm, tools as lk_tools
+from model_router import CAPABLE, FAST, EscalationTool, ModelRouter, Route, TurnClassifier
+
+
+class ScriptedLLM:
+    """Streams ``tokens``; with ``call_tool_after`` set, calls its first tool after that many tokens."""
+
+    def __init__(self, tokens, call_tool_after=None):
+        self.tokens = tokens
+        self.call_tool_after = call_tool_after
+        self.tools = []
+        self.requests = []
+        self.closed = 0
+
+    async def chat(self, history):
+        self.requests.append(history)
+        return self._stream()
+
+    async def _stream(self):
+        try:
+            for i, token in enumerate(self.tokens):
+                if i == self.call_tool_after:
+                    await self.tools[0].arun(None)
+                yield SimpleNamespace(type=lk_llm.LLMChunkEvent.CHUNK, text=token)
+        finally:
+            self.closed += 1
+
+
+async def collect(router, route, history=()):
+    return [llm_event.text async for llm_event in await router.chat(route, list(history))]
+
+
+class TurnClassifierTest(unittest.TestCase):
+    def test_routing_reasons(self):
+        cases = [
+            ("Hi, how are you?", None, (FAST, "simple")),
+            ("Send an email to Mark", None, (CAPABLE, "tool_terms")),
+            ("What is our travel policy?", None, (CAPABLE, "tool_terms")),
+            ("Tell me a little more about what you think of that idea and why", None, (CAPABLE, "long")),
+            ("What time is it?", "Office hours are 9 to 5.", (CAPABLE, "knowledge")),
+        ]
+        for text, retrieved_context, expected in cases:
+            with self.subTest(text=text):
+                route = TurnClassifier(fast_max_words=12).route(text, retrieved_context)
+                self.assertEqual((route.tier, route.reason), expected)
+
+    def test_confirmation_follows_the_capable_model(self):
+        classifier = TurnClassifier()
+        classifier.route("Create a task to review the report")
+        route = classifier.route("Yes, go ahead")
+        self.assertEqual((route.tier, route.reason), (CAPABLE, "follow_up"))
+        # Without a capable turn before it, a confirmation is a simple turn
+        self.assertEqual(TurnClassifier().route("Yes, go ahead").tier, FAST)
+
+    def test_confirmation_after_an_escalated_turn(self):
+        classifier = TurnClassifier()
+        classifier.route("Hello there").escalated = True
+        self.assertEqual(classifier.route("Yes please").reason, "follow_up")
+
+
+class ModelRouterTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tool = lk_tools.Tool(name="create_task", description="Create a task")
+
+    def test_fast_model_only_sees_escalation_tools(self):
+        fast, capable = ScriptedLLM([]), ScriptedLLM([])
+        ModelRouter(fast, capable, tools=[self.tool])
+        self.assertEqual(capable.tools, [self.tool])
+        self.assertIsInstance(fast.tools[0], EscalationTool)
+        self.assertEqual(fast.tools[0].name, "create_task")
+
+    async def test_simple_turn_is_answered_by_the_fast_model(self):
+        fast, capable = ScriptedLLM(["Hi ", "there."]), ScriptedLLM(["Unused."])
+        router = ModelRouter(fast, capable, tools=[self.tool])
+        self.assertEqual(await collect(router, Route(FAST, "simple")), ["Hi ", "there."])
+        self.assertEqual(len(capable.requests), 0)
+
+    async def test_tool_call_on_the_fast_model_escalates_with_the_same_history(self):
+        fast = ScriptedLLM(["Let ", "me ", "check."], call_tool_after=1)
+        capable = ScriptedLLM(["Task ", "created."])
+        router = ModelRouter(fast, capable, tools=[self.tool])
+        route = Route(FAST, "simple")
+        history = [lk_llm.ChatMessage(role=lk_llm.ChatRole.USER, content="Make a note of it")]
+        self.assertEqual(await collect(router, route, history), ["Let ", "Task ", "created."])
+        self.assertTrue(route.escalated)
+        self.assertEqual(fast.closed, 1)
+        self.assertEqual(capable.requests, [history])
+
+    async def test_capable_route_skips_the_fast_model(self):
+        fast, capable = ScriptedLLM(["Unused."]), ScriptedLLM(["Done."])
+        router = ModelRouter(fast, capable, tools=[self.tool])
+        self.assertEqual(await collect(router, Route(CAPABLE, "tool_terms")), ["Done."])
+        self.assertEqual(len(fast.requests), 0)
+
+    async def test_disabled_router_uses_the_capable_model(self):
+        capable = ScriptedLLM(["Done."])
+        router = ModelRouter(None, capable, tools=[self.tool])
+        self.assertFalse(router.enabled)
+        self.assertEqual(await collect(router, Route(FAST, "simple")), ["Done."])
+
+
+if __name__ == "__main__":
+    unittest.main()
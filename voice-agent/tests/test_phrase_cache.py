@@ -0,0 +1,67 @@
+"""Tests for ``PhraseAudioCache.warm``: loading, synthesizing and replacing corrupt files.
+
+Run from the ``voice-agent`` directory: ``python -m unittest discover tests``.
+"""
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+try:
+    from livekit import rtc  # noqa: F401
+except ImportError:
+    raise unittest.SkipTest("livekit is not installed")
+
+from phrase_cache import PhraseAudioCache
+
+PCM = b"\x01\x00" * 1600  # 100 ms of 16 kHz mono audio
+
+
+class FakeTTS:
+    def __init__(self):
+        self.requests = 0
+
+    def synthesize(self, text):
+        self.requests += 1
+        return self._stream()
+
+    async def _stream(self):
+        yield SimpleNamespace(frame=SimpleNamespace(data=PCM, sample_rate=16000, num_channels=1))
+
+
+class PhraseAudioCacheTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.key = PhraseAudioCache.make_key("Hello!", "voice", "model", "pcm")
+
+    async def asyncTearDown(self):
+        self.directory.cleanup()
+
+    async def warm(self):
+        cache = PhraseAudioCache(cache_dir=self.directory.name)
+        tts = FakeTTS()
+        await cache.warm(tts, [self.key])
+        self.addCleanup(cache.close)
+        return cache, tts
+
+    async def test_synthesizes_once_then_loads_from_disk(self):
+        cache, tts = await self.warm()
+        self.assertEqual((tts.requests, cache.synthesized), (1, 1))
+        cache, tts = await self.warm()
+        self.assertEqual((tts.requests, cache.loaded), (0, 1))
+        self.assertEqual(bytes(cache.get(self.key).pcm), PCM)
+
+    async def test_corrupt_files_are_replaced(self):
+        cache, _ = await self.warm()
+        path = cache._path(self.key)
+        cache.close()
+        for contents in (b"", b"JPA", b"garbage" * 10):
+            with open(path, "wb") as f:
+                f.write(contents)
+            cache, tts = await self.warm()
+            self.assertEqual((cache.corrupt, cache.synthesized, cache.failed), (1, 1, 0))
+            self.assertEqual(bytes(cache.get(self.key).pcm), PCM)
+            cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
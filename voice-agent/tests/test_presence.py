@@ -0,0 +1,86 @@
+"""Tests for ``PresenceService`` in poll and longpoll mode, against a scripted backend.
+
+Run from the ``voice-agent`` directory: ``python -m unittest discover tests``.
+"""
+import asyncio
+import unittest
+from presence import PresenceService
+
+
+class ScriptedPresenceService(PresenceService):
+    """Answers every check with ``answer(user_ids)`` after ``latency`` seconds, recording the requests."""
+
+    def __init__(self, answer, latency=0.0, **kwargs):
+        super().__init__(backend_url="http://backend.invalid", backend_api_key="test", **kwargs)
+        self.answer = answer
+        self.latency = latency
+        self.requests = []  # (user_ids, wait)
+
+    async def _check(self, user_ids, wait, known=None):
+        self.requests.append((list(user_ids), wait))
+        await asyncio.sleep(self.latency)
+        return self.answer(user_ids)
+
+
+class PresenceServiceTest(unittest.IsolatedAsyncioTestCase):
+    async def run_for(self, service, seconds):
+        await asyncio.sleep(seconds)
+        await service.stop()
+
+    async def test_inactive_user_triggers_the_callback_once(self):
+        service = ScriptedPresenceService(
+            lambda user_ids: {user_id: {"inactive": True} for user_id in user_ids},
+            poll_interval=0.01, inactivity_limit=0.02,
+        )
+        calls = []
+
+        async def on_inactive():
+            calls.append("user-1")
+
+        service.register("user-1", on_inactive)
+        await self.run_for(service, 0.1)
+        self.assertEqual(calls, ["user-1"])
+
+    async def test_unregistered_users_are_not_checked(self):
+        service = ScriptedPresenceService(lambda user_ids: {}, poll_interval=0.01)
+
+        async def on_inactive():
+            pass
+
+        service.register("user-1", on_inactive)
+        await asyncio.sleep(0.02)
+        service.unregister("user-1", on_inactive)
+        checked = len(service.requests)
+        await self.run_for(service, 0.05)
+        self.assertEqual(len(service.requests), checked)
+
+    async def test_longpoll_does_not_spin_on_users_missing_from_the_answer(self):
+        service = ScriptedPresenceService(lambda user_ids: {}, mode="longpoll", poll_interval=0.05, longpoll_wait=1)
+
+        async def on_inactive():
+            pass
+
+        service.register("user-1", on_inactive)
+        await self.run_for(service, 0.12)
+        self.assertLessEqual(len(service.requests), 3)
+        self.assertTrue(all(wait == 0 for _, wait in service.requests))
+
+    async def test_longpoll_holds_the_request_once_every_user_is_known(self):
+        service = ScriptedPresenceService(
+            lambda user_ids: {user_id: {"inactive": False} for user_id in user_ids},
+            mode="longpoll", poll_interval=0.01, longpoll_wait=1, latency=0.02,
+        )
+
+        async def on_inactive():
+            pass
+
+        service.register("user-1", on_inactive)
+        await self.run_for(service, 0.1)
+        self.assertEqual(service.requests[0][1], 0)
+        self.assertEqual(service.requests[1][1], 1)
+        # The held request came back early with nothing new, so the service waited in between
+        self.assertLessEqual(len(service.requests), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
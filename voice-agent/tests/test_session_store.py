@@ -0,0 +1,108 @@
+"""Tests for ``SessionStore`` and ``SessionCheckpoint``: round trips, TTL and owner fencing.
+
+Run from the ``voice-agent`` directory: ``python -m unittest discover tests``.
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+from session_store import SessionCheckpoint, SessionStore
+
+
+class FakeMemory:
+    """The part of ``ConversationMemory`` a checkpoint uses, with plain (role, content) messages."""
+
+    def __init__(self):
+        self.summary = ""
+        self.messages = []  # (seq, role, content)
+        self.appended = 0
+
+    def add(self, role, content):
+        self.messages.append((self.appended, role, content))
+        self.appended += 1
+
+    def checkpoint_state(self, since=0):
+        first_seq = self.messages[0][0] if self.messages else self.appended
+        return self.summary, first_seq, [message for message in self.messages if message[0] >= since]
+
+    def restore(self, summary, messages):
+        self.summary = summary
+        self.messages = list(messages)
+        self.appended = messages[-1][0] + 1 if messages else 0
+
+
+class SessionStoreTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "sessions.db")
+        self.store = SessionStore(path=self.path)
+
+    async def asyncTearDown(self):
+        await self.store.close()
+        self.directory.cleanup()
+
+    async def test_restores_saved_messages(self):
+        memory = FakeMemory()
+        checkpoint = SessionCheckpoint(self.store, "room:user", memory)
+        self.assertFalse(await checkpoint.restore())
+        memory.add("user", "Hi")
+        memory.add("assistant", "Hello!")
+        checkpoint.save(1)
+        await self.store.flush()
+
+        restored = FakeMemory()
+        resumed = SessionCheckpoint(self.store, "room:user", restored)
+        self.assertTrue(await resumed.restore())
+        self.assertEqual(restored.messages, memory.messages)
+        self.assertEqual(resumed.turns, 1)
+
+    async def test_expired_checkpoints_are_not_restored(self):
+        store = SessionStore(path=os.path.join(self.directory.name, "expiring.db"), ttl=-1)
+        memory = FakeMemory()
+        memory.add("user", "Hi")
+        SessionCheckpoint(store, "room:user", memory).save(1)
+        await store.flush()
+        self.assertFalse(await SessionCheckpoint(store, "room:user", FakeMemory()).restore())
+        await store.close()
+
+    async def test_a_resumed_session_fences_the_earlier_one(self):
+        memory = FakeMemory()
+        first = SessionCheckpoint(self.store, "room:user", memory)
+        await first.restore()
+        memory.add("user", "Hi")
+        first.save(1)
+        await self.store.flush()
+
+        second_memory = FakeMemory()
+        second = SessionCheckpoint(self.store, "room:user", second_memory)
+        self.assertTrue(await second.restore())
+        second_memory.add("user", "Email Mark.")
+        second.save(2)
+        # The earlier session is still running and saves its own, diverging history
+        memory.add("assistant", "Hello from the old session")
+        first.save(2)
+        await self.store.flush()
+
+        self.assertTrue(first.superseded)
+        self.assertEqual(self.store.stats()["fenced_writes"], 1)
+        restored = FakeMemory()
+        self.assertTrue(await SessionCheckpoint(self.store, "room:user", restored).restore())
+        self.assertEqual([content for _, _, content in restored.messages], ["Hi", "Email Mark."])
+
+    async def test_adds_the_owner_column_to_older_files(self):
+        conn = sqlite3.connect(self.path)
+        conn.executescript(
+            "CREATE TABLE sessions (session_key TEXT PRIMARY KEY, summary TEXT NOT NULL DEFAULT '',"
+            " turns INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL);"
+        )
+        conn.close()
+        memory = FakeMemory()
+        memory.add("user", "Hi")
+        checkpoint = SessionCheckpoint(self.store, "room:user", memory)
+        checkpoint.save(1)
+        await self.store.flush()
+        self.assertEqual(self.store.stats()["writes"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Tests for ``SentenceChunker`` and ``PlaybackEstimate``.
+
+Run from the ``voice-agent`` directory: ``python -m unittest discover tests``.
+"""
+import unittest
+from unittest import mock
+from tts_chunker import PlaybackEstimate, SentenceChunker
+
+
+def stream(chunker, tokens):
+    chunks = []
+    for token in tokens:
+        chunks.extend(chunker.push(token))
+    return chunks + chunker.flush()
+
+
+class SentenceChunkerTest(unittest.TestCase):
+    def test_first_chunk_is_released_at_a_clause_boundary(self):
+        chunker = SentenceChunker(first_chunk_min_chars=5, min_chars=20, max_chars=200)
+        self.assertEqual(chunker.push("Sure thing, "), ["Sure thing,"])
+        # After the first chunk only sentence ends release text
+        self.assertEqual(chunker.push("I'll send the report, "), [])
+        self.assertEqual(chunker.push("then book the room. Anything "), ["I'll send the report, then book the room."])
+        self.assertEqual(chunker.flush(), ["Anything"])
+
+    def test_short_sentences_are_merged(self):
+        chunker = SentenceChunker(first_chunk_min_chars=5, min_chars=30, max_chars=200)
+        chunks = stream(chunker, ["Hello there. ", "Yes. ", "No. ", "The meeting moved to Friday. ", "Ok."])
+        self.assertEqual(chunks, ["Hello there.", "Yes. No. The meeting moved to Friday.", "Ok."])
+
+    def test_abbreviations_initials_and_decimals_do_not_end_a_sentence(self):
+        chunker = SentenceChunker(first_chunk_min_chars=5, min_chars=5, max_chars=200)
+        chunks = stream(chunker, ["Dr. Smith met J. R. Doe at 3.5 p.m. today. ", "Then he left."])
+        self.assertEqual(chunks, ["Dr. Smith met J. R. Doe at 3.5 p.m. today.", "Then he left."])
+
+    def test_closing_quotes_stay_with_their_sentence(self):
+        chunker = SentenceChunker(first_chunk_min_chars=5, min_chars=5, max_chars=200)
+        chunks = stream(chunker, ['He said "send it now." ', "Done."])
+        self.assertEqual(chunks, ['He said "send it now."', "Done."])
+
+    def test_long_runs_are_split_at_a_word_boundary(self):
+        chunker = SentenceChunker(first_chunk_min_chars=5, min_chars=5, max_chars=20)
+        chunks = stream(chunker, ["one two three four five six seven eight nine"])
+        self.assertTrue(all(len(chunk) <= 20 for chunk in chunks))
+        self.assertEqual(" ".join(chunks), "one two three four five six seven eight nine")
+
+    def test_split_tokens_give_the_same_chunks(self):
+        text = "Sure, I can help. The report is ready and I sent it to Mark. Anything else?"
+        whole = stream(SentenceChunker(first_chunk_min_chars=5, min_chars=20, max_chars=200), [text])
+        by_char = stream(SentenceChunker(first_chunk_min_chars=5, min_chars=20, max_chars=200), list(text))
+        self.assertEqual(by_char, whole)
+
+    def test_text_returns_everything_pushed(self):
+        chunker = SentenceChunker()
+        stream(chunker, ["Hello ", "there. ", "", "Bye."])
+        self.assertEqual(chunker.text(), "Hello there. Bye.")
+
+
+class PlaybackEstimateTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        patcher = mock.patch("tts_chunker.time.perf_counter", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_nothing_is_heard_before_the_first_audio(self):
+        playback = PlaybackEstimate(chars_per_second=10, first_audio_delay=0.5)
+        playback.queued("Hello there. ")
+        self.now += 0.4
+        self.assertEqual(playback.spoken_text(), "")
+
+    def test_partly_heard_chunk_is_cut_at_a_word_boundary(self):
+        playback = PlaybackEstimate(chars_per_second=10, first_audio_delay=0.5)
+        playback.queued("Hello there, how are you? ")
+        self.now += 0.5 + 1.4  # 14 characters heard
+        self.assertEqual(playback.spoken_text(), "Hello there,")
+
+    def test_chunks_play_one_after_another(self):
+        playback = PlaybackEstimate(chars_per_second=10, first_audio_delay=0.5)
+        playback.queued("First part. ")  # plays from 100.5 to 101.7
+        self.now += 0.1
+        playback.queued("Second part here. ")  # starts when the first one ends
+        self.now = 101.7 + 0.7
+        self.assertEqual(playback.spoken_text(), "First part. Second")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""Tests for ``WorkerLoadMonitor`` admission and draining.
+
+Run from the ``voice-agent`` directory: ``python -m unittest discover tests``.
+"""
+import asyncio
+import unittest
+from worker_load import WorkerLoadMonitor
+
+
+def monitor(**kwargs):
+    # Lag and CPU are only sampled once start() is called, so load follows the session count here
+    return WorkerLoadMonitor(**{"max_sessions": 4, "threshold": 0.75, **kwargs})
+
+
+class WorkerLoadMonitorTest(unittest.IsolatedAsyncioTestCase):
+    async def test_jobs_are_admitted_below_the_threshold(self):
+        load = monitor()
+        for _ in range(2):
+            self.assertTrue(await load.admit(wait=0))
+            load.session_started()
+        self.assertEqual(load.load(), 0.5)
+        self.assertEqual(load.stats()["accepted"], 2)
+
+    async def test_full_worker_declines_after_the_wait(self):
+        load = monitor()
+        for _ in range(3):
+            load.session_started()
+        self.assertFalse(await load.admit(wait=0.05))
+        self.assertEqual((load.deferred, load.declined), (1, 1))
+
+    async def test_deferred_job_is_admitted_when_a_session_ends(self):
+        load = monitor()
+        for _ in range(3):
+            load.session_started()
+        admission = asyncio.create_task(load.admit(wait=5))
+        await asyncio.sleep(0.01)
+        self.assertFalse(admission.done())
+        load.session_finished()
+        self.assertTrue(await asyncio.wait_for(admission, timeout=1))
+        self.assertEqual((load.deferred, load.accepted, load.declined), (1, 1, 0))
+
+    async def test_draining_declines_new_jobs_and_waits_for_sessions(self):
+        load = monitor()
+        load.session_started()
+        drain = asyncio.create_task(load.drain(timeout=5))
+        await asyncio.sleep(0.01)
+        self.assertEqual(load.load(), 1.0)
+        self.assertFalse(await load.admit(wait=5))
+        self.assertFalse(drain.done())
+        load.session_finished()
+        self.assertTrue(await asyncio.wait_for(drain, timeout=1))
+
+    async def test_drain_times_out_with_sessions_left(self):
+        load = monitor()
+        load.session_started()
+        self.assertFalse(await load.drain(timeout=0.05))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+# tiktoken is optional; without it token counts are estimated from character length
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = " …[truncated]", keep_end: bool = False) -> str:
+    """Cut ``text`` down to roughly ``max_tokens`` tokens, adding ``marker`` where anything was removed.
+
+    The start of ``text`` is kept by default; with ``keep_end`` the end is kept instead and
+    ``marker`` is prepended.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if _encoding is not None:
+        encoded = _encoding.encode(text, disallowed_special=())
+        if keep_end:
+            return marker + _encoding.decode(encoded[-max_tokens:] if max_tokens > 0 else [])
+        return _encoding.decode(encoded[:max_tokens]) + marker
+    if keep_end:
+        return marker + (text[-max_tokens * CHARS_PER_TOKEN:] if max_tokens > 0 else "")
+    return text[:max_tokens * CHARS_PER_TOKEN] + marker
@@ -0,0 +1,142 @@
+import os
+import time
+
+# --- Configuration ---
+TTS_FIRST_CHUNK_MIN_CHARS = int(os.getenv("TTS_FIRST_CHUNK_MIN_CHARS", "12"))
+TTS_CHUNK_MIN_CHARS = int(os.getenv("TTS_CHUNK_MIN_CHARS", "40"))
+TTS_CHUNK_MAX_CHARS = int(os.getenv("TTS_CHUNK_MAX_CHARS", "250"))
+TTS_SPEAKING_RATE = float(os.getenv("TTS_SPEAKING_RATE", "15"))  # characters of speech per second
+TTS_FIRST_AUDIO_DELAY = float(os.getenv("TTS_FIRST_AUDIO_DELAY", "0.3"))  # seconds from queueing text to hearing it
+
+SENTENCE_END = ".!?…"
+CLAUSE_END = ",;:—–"
+CLOSERS = "\"')]”’"
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e",
+    "a.m", "p.m", "inc", "ltd", "co", "corp", "approx", "dept", "est", "no", "fig",
+    "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+}
+
+
+class SentenceChunker:
+    """Splits a streamed LLM response into speakable chunks for TTS.
+
+    The first chunk is released at the first clause boundary so audio can start as early as
+    possible; after that, text is released in sentence-sized chunks. Short sentences are merged
+    with the next one to avoid tiny TTS requests, abbreviations and decimals do not end a
+    sentence, and overly long runs without punctuation are split at a word boundary.
+    """
+
+    def __init__(
+        self,
+        first_chunk_min_chars=TTS_FIRST_CHUNK_MIN_CHARS,
+        min_chars=TTS_CHUNK_MIN_CHARS,
+        max_chars=TTS_CHUNK_MAX_CHARS,
+    ):
+        self.first_chunk_min_chars = first_chunk_min_chars
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.chunks_emitted = 0
+        self._parts = []  # every pushed token, joined once in text()
+        self._pending = ""  # text not yet released to TTS, at most about max_chars long
+        self._scanned = 0  # positions of _pending already checked for a boundary
+
+    def push(self, text: str) -> list:
+        """Add streamed text and return any chunks that are ready to be spoken."""
+        if not text:
+            return []
+        self._parts.append(text)
+        self._pending += text
+        chunks = []
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            chunk = self._pending[:cut].strip()
+            self._pending = self._pending[cut:].lstrip()
+            self._scanned = 0
+            if chunk:
+                chunks.append(chunk)
+                self.chunks_emitted += 1
+        return chunks
+
+    def flush(self) -> list:
+        """Return whatever text is left at the end of the response."""
+        chunk = self._pending.strip()
+        self._pending = ""
+        self._scanned = 0
+        if not chunk:
+            return []
+        self.chunks_emitted += 1
+        return [chunk]
+
+    def text(self) -> str:
+        """The full response text pushed so far."""
+        return "".join(self._parts)
+
+    def _find_cut(self):
+        pending = self._pending
+        first = self.chunks_emitted == 0
+        min_chars = self.first_chunk_min_chars if first else self.min_chars
+        # A boundary needs one character of lookahead, so the last character is never checked
+        for i in range(self._scanned, len(pending) - 1):
+            if not pending[i + 1].isspace() or i + 1 < min_chars:
+                continue
+            j = i - 1 if pending[i] in CLOSERS and i > 0 else i
+            ch = pending[j]
+            if ch in SENTENCE_END or (first and ch in CLAUSE_END):
+                if ch == "." and self._is_abbreviation(pending, j):
+                    continue
+                return i + 1
+        self._scanned = max(len(pending) - 1, 0)
+
+        if len(pending) > self.max_chars:
+            split = pending.rfind(" ", 0, self.max_chars)
+            return split if split > 0 else self.max_chars
+        return None
+
+    @staticmethod
+    def _is_abbreviation(text: str, dot_index: int) -> bool:
+        start = dot_index
+        while start > 0 and not text[start - 1].isspace():
+            start -= 1
+        word = text[start:dot_index].lower().strip("(\"'")
+        # Single letters cover initials ("J. Smith") and dotted acronyms ("U.S.")
+        return word in ABBREVIATIONS or all(len(part) == 1 for part in word.split("."))
+
+
+class PlaybackEstimate:
+    """Estimates how much of the text queued to TTS the user has heard so far.
+
+    Each chunk is assumed to start playing ``first_audio_delay`` after it was queued, or
+    when the previous chunk finishes if that is later, and to play at ``chars_per_second``.
+    Used on barge-in to keep only the spoken prefix of an interrupted response.
+    """
+
+    def __init__(self, chars_per_second=TTS_SPEAKING_RATE, first_audio_delay=TTS_FIRST_AUDIO_DELAY):
+        self.chars_per_second = chars_per_second
+        self.first_audio_delay = first_audio_delay
+        self._chunks = []  # (text, start of playback)
+        self._playback_end = 0.0
+
+    def queued(self, text: str):
+        start = max(time.perf_counter() + self.first_audio_delay, self._playback_end)
+        self._chunks.append((text, start))
+        self._playback_end = start + len(text) / self.chars_per_second
+
+    def spoken_text(self) -> str:
+        """The queued text heard up to now, cut back to a word boundary."""
+        now = time.perf_counter()
+        spoken = []
+        for text, start in self._chunks:
+            if now <= start:
+                break
+            heard = int((now - start) * self.chars_per_second)
+            if heard >= len(text):
+                spoken.append(text)
+                continue
+            cut = text.rfind(" ", 0, heard + 1)
+            if cut > 0:
+                spoken.append(text[:cut])
+            break
+        return "".join(spoken).strip()
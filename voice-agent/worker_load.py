@@ -0,0 +1,149 @@
+import asyncio
+import os
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+WORKER_MAX_SESSIONS = int(os.getenv("WORKER_MAX_SESSIONS", "25"))  # per process
+WORKER_LAG_LIMIT = float(os.getenv("WORKER_LAG_LIMIT", "0.1"))  # seconds of smoothed event-loop lag counted as full load
+WORKER_CPU_LIMIT = float(os.getenv("WORKER_CPU_LIMIT", "0.85"))  # share of one core counted as full load
+WORKER_LOAD_THRESHOLD = float(os.getenv("WORKER_LOAD_THRESHOLD", "0.8"))  # jobs are declined at or above this load
+WORKER_ADMISSION_WAIT = float(os.getenv("WORKER_ADMISSION_WAIT", "2"))  # seconds a job may wait for load to drop
+WORKER_DRAIN_TIMEOUT = float(os.getenv("WORKER_DRAIN_TIMEOUT", "600"))  # seconds to let sessions finish on SIGTERM
+WORKER_LOAD_SAMPLE_INTERVAL = float(os.getenv("WORKER_LOAD_SAMPLE_INTERVAL", "0.25"))  # seconds
+
+
+class WorkerLoadMonitor:
+    """Load of this worker process, from 0 (idle) to 1 (full).
+
+    Load is the highest of three ratios: active sessions to ``max_sessions``, smoothed
+    event-loop lag to ``lag_limit``, and process CPU time to ``cpu_limit`` of one core. A
+    draining worker always reports full load, so the dispatcher sends it no new jobs.
+    """
+
+    def __init__(
+        self,
+        max_sessions=WORKER_MAX_SESSIONS,
+        lag_limit=WORKER_LAG_LIMIT,
+        cpu_limit=WORKER_CPU_LIMIT,
+        threshold=WORKER_LOAD_THRESHOLD,
+        sample_interval=WORKER_LOAD_SAMPLE_INTERVAL,
+    ):
+        self.max_sessions = max_sessions
+        self.lag_limit = lag_limit
+        self.cpu_limit = cpu_limit
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        self.active_sessions = 0
+        self.draining = False
+        self.lag = 0.0  # exponentially smoothed, seconds
+        self.cpu = 0.0  # share of one core over the last sample
+        self._task = None
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._load_changed = asyncio.Event()
+
+        self.accepted = 0
+        self.deferred = 0
+        self.declined = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._sample())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sample(self):
+        wall, cpu = time.perf_counter(), time.process_time()
+        while True:
+            await asyncio.sleep(self.sample_interval)
+            now_wall, now_cpu = time.perf_counter(), time.process_time()
+            elapsed = now_wall - wall
+            lag = max(0.0, elapsed - self.sample_interval)
+            self.lag = 0.8 * self.lag + 0.2 * lag
+            self.cpu = (now_cpu - cpu) / elapsed if elapsed > 0 else 0.0
+            wall, cpu = now_wall, now_cpu
+            self._notify()
+
+    def load(self) -> float:
+        if self.draining:
+            return 1.0
+        return min(1.0, max(
+            self.active_sessions / self.max_sessions if self.max_sessions > 0 else 0.0,
+            self.lag / self.lag_limit if self.lag_limit > 0 else 0.0,
+            self.cpu / self.cpu_limit if self.cpu_limit > 0 else 0.0,
+        ))
+
+    def has_capacity(self) -> bool:
+        return self.load() < self.threshold
+
+    async def admit(self, wait=WORKER_ADMISSION_WAIT) -> bool:
+        """Decide whether to take a job, waiting up to ``wait`` seconds for load to drop below the threshold."""
+        if not self.has_capacity():
+            if self.draining:
+                self.declined += 1
+                return False
+            self.deferred += 1
+            deadline = time.monotonic() + wait
+            while not self.has_capacity():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.draining:
+                    self.declined += 1
+                    return False
+                self._load_changed.clear()
+                try:
+                    await asyncio.wait_for(self._load_changed.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+        self.accepted += 1
+        return True
+
+    def session_started(self):
+        self.active_sessions += 1
+        self._idle.clear()
+
+    def session_finished(self):
+        self.active_sessions -= 1
+        if self.active_sessions <= 0:
+            self._idle.set()
+        self._notify()
+
+    def _notify(self):
+        self._load_changed.set()
+
+    async def drain(self, timeout=WORKER_DRAIN_TIMEOUT) -> bool:
+        """Stop taking jobs and wait up to ``timeout`` seconds for active sessions to end."""
+        self.draining = True
+        self._notify()
+        logger.info(f"Draining worker: waiting for {self.active_sessions} active session(s)")
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"Drain timed out with {self.active_sessions} session(s) still active")
+            return False
+
+    def stats(self) -> dict:
+        return {
+            "load": round(self.load(), 3),
+            "active_sessions": self.active_sessions,
+            "loop_lag_seconds": round(self.lag, 4),
+            "cpu": round(self.cpu, 3),
+            "draining": int(self.draining),
+            "accepted": self.accepted,
+            "deferred": self.deferred,
+            "declined": self.declined,
+        }
+
+
+# Single instance per worker process
+worker_load = WorkerLoadMonitor()